@@ -0,0 +1,423 @@
+import os
+import sys
+import mmap
+import time
+import heapq
+import shutil
+import tempfile
+import struct
+import logging
+import argparse
+
+# 사전 규모(수십만~수백만 쌍)의 "오타 -> 교정" 목록을 위한 압축 자동자(DAWG) 규칙 소스.
+# 오타 단어들을 최소화된 비순환 자동자로 만들고(공통 접두사/접미사 공유), 각 단어의 사전순 번호
+# (완전 해시)로 교정 텍스트 표를 찾습니다. 파일은 mmap 으로 열어 필요한 페이지만 읽으므로
+# 목록 전체를 파이썬 딕셔너리로 올리지 않습니다.
+# 빌드: python autocorrect.py build typos.txt autocorrect.dawg   (한 줄에 "오타<TAB>교정" 또는 "오타 -> 교정")
+
+MAGIC = b"TRDAWG01"
+# 헤더: 매직, 상태 수, 전이 수, 단어 수, 가장 긴 단어 길이, 교정 텍스트 blob 크기
+_HEADER = struct.Struct("<8sIIII Q")
+# 상태: 첫 전이 번호, 전이 수, 최종 상태 여부
+_STATE = struct.Struct("<IIB")
+# 전이: 글자 코드 포인트, 도착 상태, 이 전이보다 앞선 형제 전이들로 끝나는 단어 수 (+ 출발 상태가 최종이면 1)
+_TRANSITION = struct.Struct("<III")
+# 교정 텍스트: blob 오프셋, 바이트 길이 (단어 번호 순서)
+_VALUE = struct.Struct("<II")
+SORT_RUN_PAIRS = 200_000 # 빌드 시 한 번에 메모리에서 정렬하는 쌍 수 (넘으면 임시 파일 런으로 외부 정렬)
+FIX_DEDUP_LIMIT = 200_000 # blob 에서 중복을 합치려고 기억하는 서로 다른 교정 텍스트 수 (넘으면 새 교정은 그대로 저장)
+
+class _BuildState:
+    """빌드 중인 자동자 상태 (전이는 입력이 정렬되어 있으므로 글자 순서대로 추가됨)"""
+
+    __slots__ = ("final", "edges", "number")
+
+    def __init__(self):
+        self.final = False
+        self.edges = [] # [(글자, _BuildState)]
+        self.number = None # 직렬화 시 상태 번호
+
+    def signature(self):
+        # 하위 상태는 이미 최소화(등록)되어 있으므로 객체 id로 같은 상태를 비교할 수 있음
+        return (self.final, tuple((label, id(target)) for label, target in self.edges))
+
+class DawgBuilder:
+    """
+    정렬된 단어를 하나씩 받아 최소화된 DAWG를 점진적으로 만드는 빌더 (Daciuk et al. 의 정렬 입력 알고리즘)
+
+    새 단어와 공통 접두사가 끝나는 지점 아래의 상태들은 더 이상 바뀌지 않으므로
+    그때마다 등록부에서 같은 상태를 찾아 합칩니다. 메모리는 최소화된 자동자 크기에 비례합니다.
+    """
+
+    def __init__(self):
+        self.root = _BuildState()
+        self._register = {}
+        self._unchecked = [] # (부모, 글자, 자식) - 아직 최소화하지 않은 마지막 단어의 경로
+        self._previous = ""
+        self.word_count = 0
+        self.max_word_length = 0
+
+    def _minimize(self, down_to):
+        while len(self._unchecked) > down_to:
+            parent, label, child = self._unchecked.pop()
+            signature = child.signature()
+            existing = self._register.get(signature)
+            if existing is not None:
+                parent.edges[-1] = (label, existing) # 자식은 항상 부모의 마지막 전이
+            else:
+                self._register[signature] = child
+
+    def add(self, word):
+        """단어를 추가합니다. 단어는 사전순(코드 포인트 순)으로, 중복 없이 들어와야 합니다."""
+        if word <= self._previous and self.word_count:
+            raise ValueError(f"Words must be added in sorted order without duplicates: '{word}' after '{self._previous}'")
+        common = 0
+        for a, b in zip(word, self._previous):
+            if a != b:
+                break
+            common += 1
+        self._minimize(common)
+        node = self._unchecked[-1][2] if self._unchecked else self.root
+        for label in word[common:]:
+            child = _BuildState()
+            node.edges.append((label, child))
+            self._unchecked.append((node, label, child))
+            node = child
+        node.final = True
+        self._previous = word
+        self.word_count += 1
+        self.max_word_length = max(self.max_word_length, len(word))
+
+    def finish(self):
+        """남은 경로를 최소화하고 루트 상태를 반환합니다."""
+        self._minimize(0)
+        self._register = {}
+        return self.root
+
+def _iter_pairs(source_path):
+    """텍스트 목록에서 (오타, 교정) 쌍을 한 줄씩 읽습니다. 빈 줄과 '#' 주석은 건너뜁니다."""
+    with open(source_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            if "\t" in line:
+                typo, fix = line.split("\t", 1)
+            elif " -> " in line:
+                typo, fix = line.split(" -> ", 1)
+            else:
+                logging.warning(f"[AUTOCORRECT] Line {line_number}: expected 'typo<TAB>fix' or 'typo -> fix'. Skipping.")
+                continue
+            typo, fix = typo.strip(), fix.strip()
+            if not typo or any(char.isspace() for char in typo):
+                logging.warning(f"[AUTOCORRECT] Line {line_number}: typo '{typo}' is empty or contains whitespace. Skipping.")
+                continue
+            yield typo, fix
+
+def _sorted_runs(pairs, run_pairs):
+    """
+    (오타, 교정) 쌍을 run_pairs 개씩 정렬해 임시 파일(런)에 쓰고, 각 런을 다시 읽는 이터레이터 목록을 반환합니다.
+    입력이 런 하나에 들어가면 임시 파일 없이 메모리에서 정렬합니다.
+    """
+    runs = []
+    chunk = []
+    for pair in pairs:
+        chunk.append(pair)
+        if len(chunk) >= run_pairs:
+            runs.append(_write_run(chunk))
+            chunk = []
+    if not runs:
+        chunk.sort(key=lambda pair: pair[0])
+        return [iter(chunk)]
+    if chunk:
+        runs.append(_write_run(chunk))
+    return [_read_run(run) for run in runs]
+
+def _write_run(chunk):
+    """정렬한 쌍을 임시 파일에 씁니다 (오타에는 공백이 없고 교정은 한 줄이므로 탭/줄바꿈으로 구분)."""
+    chunk.sort(key=lambda pair: pair[0]) # 안정 정렬: 같은 오타는 먼저 나온 항목이 앞에 옴
+    run = tempfile.TemporaryFile('w+', encoding='utf-8', newline='\n')
+    run.writelines(f"{typo}\t{fix}\n" for typo, fix in chunk)
+    run.seek(0)
+    return run
+
+def _read_run(run):
+    with run:
+        for line in run:
+            typo, fix = line[:-1].split("\t", 1)
+            yield typo, fix
+
+def build_autocorrect(source_path, output_path, run_pairs=SORT_RUN_PAIRS):
+    """
+    오타 목록 텍스트 파일을 DAWG 파일로 빌드합니다.
+    같은 오타가 여러 번 나오면 먼저 나온 교정을 사용합니다 (규칙 순서 우선과 같음).
+
+    목록을 run_pairs 쌍씩 정렬한 임시 런으로 나눈 뒤 병합하며 빌더에 넣고(외부 정렬),
+    교정 텍스트 표와 blob 도 임시 파일에 바로 쓰므로 메모리는 목록 크기가 아니라
+    런 하나 + 최소화된 자동자 + 서로 다른 교정 텍스트(최대 FIX_DEDUP_LIMIT 개) 크기에 비례합니다.
+
+    Returns:
+        dict: 빌드 통계 (단어 수, 상태/전이 수, 파일 크기, 소요 시간).
+    """
+    started = time.perf_counter()
+    builder = DawgBuilder()
+    duplicates = 0
+    previous = None
+    values = tempfile.TemporaryFile() # 단어 번호 순서의 (blob 오프셋, 길이)
+    blob = tempfile.TemporaryFile() # 교정 텍스트
+    blob_size = 0
+    blob_offsets = {} # 교정 텍스트 -> (오프셋, 길이). 같은 교정은 한 번만 저장
+    # DAWG는 정렬된 입력이 필요함 (heapq.merge 는 안정적이므로 같은 오타는 앞선 런, 즉 먼저 나온 항목이 앞에 옴)
+    for typo, fix in heapq.merge(*_sorted_runs(_iter_pairs(source_path), run_pairs), key=lambda pair: pair[0]):
+        if typo == previous:
+            duplicates += 1
+            continue
+        builder.add(typo)
+        previous = typo
+        entry = blob_offsets.get(fix)
+        if entry is None:
+            encoded = fix.encode('utf-8')
+            entry = (blob_size, len(encoded))
+            blob.write(encoded)
+            blob_size += len(encoded)
+            if len(blob_offsets) < FIX_DEDUP_LIMIT:
+                blob_offsets[fix] = entry
+        values.write(_VALUE.pack(*entry))
+    del blob_offsets
+    root = builder.finish()
+
+    # 상태 번호 매기기 (DFS 순서) 및 상태별 단어 수 계산
+    states = []
+    word_counts = {}
+    stack = [(root, False)]
+    while stack:
+        state, expanded = stack.pop()
+        if expanded:
+            word_counts[id(state)] = int(state.final) + sum(word_counts[id(target)] for _, target in state.edges)
+            continue
+        if state.number is not None:
+            continue
+        state.number = len(states)
+        states.append(state)
+        stack.append((state, True))
+        for _, target in reversed(state.edges):
+            if target.number is None:
+                stack.append((target, False))
+
+    transition_count = sum(len(state.edges) for state in states)
+    temp_path = output_path + ".tmp"
+    with open(temp_path, 'wb') as f, values, blob:
+        f.write(_HEADER.pack(MAGIC, len(states), transition_count, builder.word_count, builder.max_word_length, blob_size))
+        first = 0
+        for state in states:
+            f.write(_STATE.pack(first, len(state.edges), int(state.final)))
+            first += len(state.edges)
+        for state in states:
+            words_before = int(state.final)
+            for label, target in state.edges:
+                f.write(_TRANSITION.pack(ord(label), target.number, words_before))
+                words_before += word_counts[id(target)]
+        values.seek(0)
+        shutil.copyfileobj(values, f)
+        blob.seek(0)
+        shutil.copyfileobj(blob, f)
+    os.replace(temp_path, output_path)
+
+    stats = {"words": builder.word_count, "duplicates": duplicates, "states": len(states), "transitions": transition_count,
+             "bytes": os.path.getsize(output_path), "seconds": round(time.perf_counter() - started, 2)}
+    logging.info(f"[AUTOCORRECT] Built '{output_path}': {stats}")
+    return stats
+
+class AutocorrectGraph:
+    """
+    build_autocorrect()로 만든 DAWG 파일을 mmap 으로 열어 오타를 조회하는 읽기 전용 규칙 소스
+
+    조회 비용은 단어 길이 x log(상태별 전이 수) 이며, 목록 크기와 무관합니다.
+    pickle 시에는 파일 경로만 전달되고 받는 쪽(훅 프로세스)에서 다시 mmap 합니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, state_count, transition_count, word_count, max_word_length, blob_size = _HEADER.unpack_from(self._data, 0)
+            if magic != MAGIC:
+                raise ValueError(f"'{path}' is not an autocorrect graph file.")
+        except Exception:
+            self._file.close()
+            raise
+        self.word_count = word_count
+        self.max_key_length = max_word_length
+        self._states_offset = _HEADER.size
+        self._transitions_offset = self._states_offset + state_count * _STATE.size
+        self._values_offset = self._transitions_offset + transition_count * _TRANSITION.size
+        self._blob_offset = self._values_offset + word_count * _VALUE.size
+
+    def __getstate__(self):
+        return self.path
+
+    def __setstate__(self, path):
+        self.__init__(path)
+
+    def __len__(self):
+        return self.word_count
+
+    def __contains__(self, word):
+        return self._word_number(word) is not None
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+    def _word_number(self, word):
+        """단어의 사전순 번호를 반환합니다 (없으면 None)."""
+        data = self._data
+        states_offset = self._states_offset
+        transitions_offset = self._transitions_offset
+        state = 0
+        number = 0
+        for char in word:
+            first, count, _ = _STATE.unpack_from(data, states_offset + state * _STATE.size)
+            label = ord(char)
+            low, high = first, first + count
+            while low < high: # 전이는 글자 순으로 정렬되어 있음
+                middle = (low + high) // 2
+                if _TRANSITION.unpack_from(data, transitions_offset + middle * _TRANSITION.size)[0] < label:
+                    low = middle + 1
+                else:
+                    high = middle
+            if low == first + count:
+                return None
+            found_label, target, words_before = _TRANSITION.unpack_from(data, transitions_offset + low * _TRANSITION.size)
+            if found_label != label:
+                return None
+            number += words_before
+            state = target
+        if not _STATE.unpack_from(data, states_offset + state * _STATE.size)[2]:
+            return None
+        return number
+
+    def get(self, word, default=None):
+        """오타 단어의 교정 텍스트를 반환합니다 (없으면 default)."""
+        if not word or len(word) > self.max_key_length:
+            return default
+        number = self._word_number(word)
+        if number is None:
+            return default
+        offset, length = _VALUE.unpack_from(self._data, self._values_offset + number * _VALUE.size)
+        start = self._blob_offset + offset
+        return self._data[start:start + length].decode('utf-8')
+
+    def correct(self, word):
+        """
+        단어를 교정합니다. 목록에 없으면 첫 글자 대문자/전체 대문자 형태를 소문자로 바꿔 다시 찾고
+        교정 결과에 같은 대소문자 형태를 적용합니다 (예: "Teh" -> "The", "TEH" -> "THE").
+
+        Returns:
+            str | None: 교정 텍스트 (교정할 필요가 없으면 None).
+        """
+        fix = self.get(word)
+        if fix is not None or not word[:1].isupper():
+            return fix
+        lowered = word.lower()
+        fix = self.get(lowered)
+        if fix is None:
+            return None
+        if word.isupper() and len(word) > 1:
+            return fix.upper()
+        if word == lowered.capitalize():
+            return fix[:1].upper() + fix[1:]
+        return None
+
+def trailing_word(buffer):
+    """버퍼 끝의 단어(글자/숫자/아포스트로피 연속)를 반환합니다. 예: "(teh" -> "teh"."""
+    start = len(buffer)
+    while start > 0 and (buffer[start - 1].isalnum() or buffer[start - 1] == "'"):
+        start -= 1
+    return buffer[start:]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query an autocorrect word graph.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="build a graph file from a 'typo<TAB>fix' list")
+    build_parser.add_argument("source", help="plain-text list, one 'typo<TAB>fix' or 'typo -> fix' per line")
+    build_parser.add_argument("output", help="graph file to write")
+    lookup_parser = subparsers.add_parser("lookup", help="look up words in a graph file")
+    lookup_parser.add_argument("graph", help="graph file")
+    lookup_parser.add_argument("words", nargs="+")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "build":
+        stats = build_autocorrect(args.source, args.output)
+        print(f"[AUTOCORRECT] {stats['words']} words ({stats['duplicates']} duplicates skipped), {stats['states']} states, "
+              f"{stats['transitions']} transitions, {stats['bytes'] / 1024 / 1024:.1f} MiB in {stats['seconds']}s.")
+    else:
+        graph = AutocorrectGraph(args.graph)
+        for word in args.words:
+            print(f"{word} -> {graph.correct(word)}")
+        graph.close()
+    return 0
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(main())
+
+    # 테스트용 코드
+    import pickle
+    import random
+    import tempfile
+    logging.basicConfig(level=logging.INFO)
+    test_dir = tempfile.mkdtemp()
+    source_path = os.path.join(test_dir, "typos.txt")
+    graph_path = os.path.join(test_dir, "autocorrect.dawg")
+    with open(source_path, 'w', encoding='utf-8') as f:
+        f.write("# comment\nteh\tthe\nrecieve -> receive\nadress\taddress\nteh\tduplicate\n"
+                "dont\tdon't\n안녕하세여\t안녕하세요\nbad line\n")
+    stats = build_autocorrect(source_path, graph_path)
+    assert stats["words"] == 5 and stats["duplicates"] == 1
+    graph = AutocorrectGraph(graph_path)
+    assert graph.get("teh") == "the" and graph.get("recieve") == "receive" and graph.get("안녕하세여") == "안녕하세요"
+    assert graph.get("te") is None and graph.get("tehh") is None and graph.get("") is None
+    assert graph.correct("Teh") == "The" and graph.correct("TEH") == "THE" and graph.correct("tEh") is None
+    assert trailing_word("(teh") == "teh" and trailing_word("x dont") == "dont" and trailing_word("!") == ""
+    assert pickle.loads(pickle.dumps(graph)).get("adress") == "address" # 훅 프로세스로 전달 (경로만 pickle)
+
+    # 무작위 목록: 모든 단어가 딕셔너리와 같은 결과인지, 최소화로 상태 수가 줄어드는지 확인
+    rng = random.Random(1)
+    expected = {}
+    with open(source_path, 'w', encoding='utf-8') as f:
+        for _ in range(20000):
+            typo = "".join(rng.choice("abcdeéx") for _ in range(rng.randint(1, 9)))
+            fix = f"fix-{rng.randint(0, 500)}"
+            expected.setdefault(typo, fix)
+            f.write(f"{typo}\t{fix}\n")
+    stats = build_autocorrect(source_path, graph_path)
+    graph = AutocorrectGraph(graph_path)
+    assert len(graph) == len(expected) and stats["states"] < sum(len(word) for word in expected)
+    assert all(graph.get(typo) == fix for typo, fix in expected.items())
+    assert all(graph.get(typo + "z") is None for typo in list(expected)[:1000])
+    # 외부 정렬: 작은 런으로 나눠도 같은 그래프 (런을 넘나드는 중복 오타도 먼저 나온 교정 사용)
+    external_path = os.path.join(test_dir, "external.dawg")
+    external_stats = build_autocorrect(source_path, external_path, run_pairs=997)
+    assert external_stats["words"] == stats["words"] and external_stats["duplicates"] == stats["duplicates"]
+    with open(graph_path, 'rb') as a, open(external_path, 'rb') as b:
+        assert a.read() == b.read()
+
+    # KeyboardListener 재생 테스트: 규칙이 우선, 일치하는 규칙이 없을 때만 단어 단위로 교정
+    from pynput.keyboard import Key, KeyCode
+    from keyboard_listener import KeyboardListener
+    from window_provider import FakeActiveWindowProvider
+    with open(source_path, 'w', encoding='utf-8') as f:
+        f.write("teh\tthe\nbtw\tBETWEEN\nrecieve\treceive\n")
+    build_autocorrect(source_path, graph_path)
+    listener = KeyboardListener(rules={"btw": "by the way"}, window_provider=FakeActiveWindowProvider(),
+                                autocorrect=AutocorrectGraph(graph_path))
+    replaced = []
+    listener._perform_replacement = lambda keyword, text, plan=None: replaced.append((keyword, text))
+    for key in "teh btw (Teh xteh recieve ":
+        listener._on_press(Key.space if key == " " else KeyCode.from_char(key))
+    # 교정은 단어만 바꾸므로 함께 지운 스페이스를 다시 입력 (규칙 치환은 스페이스까지 치환)
+    assert replaced == [("teh", "the "), ("btw", "by the way"), ("Teh", "The "), ("recieve", "receive ")], replaced
+    print(f"AutocorrectGraph test finished. {stats}")
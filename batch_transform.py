@@ -0,0 +1,409 @@
+import os
+import re
+import sys
+import time
+import codecs
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from rule_index import RuleIndex # 실시간 입력과 같은 접미사 매칭 인덱스
+from autocorrect import trailing_word # 자동 교정 대상 단어 추출
+
+# 규칙 파일(rules.json)의 규칙을 파일/표준 입력에 오프라인으로 적용하는 일괄 변환 도구.
+# 사용법: python batch_transform.py --out-dir out docs/*.txt
+#         python batch_transform.py < template.txt > result.txt
+#         TextReplacerPAAK.exe /batch --in-place notes.md
+#         python batch_transform.py --self-test   (인자 없이 실행하면 표준 입력을 변환하므로 자체 테스트는 옵션으로 실행)
+
+CHUNK_BYTES = 1 << 20 # 한 번에 읽는 바이트 수 (파일 크기와 관계없이 메모리 사용량 일정)
+DEFAULT_TRIGGERS = " " # KeyboardListener.trigger_keys (스페이스)
+LOOKUP_CACHE_SIZE = 1 << 16 # 버퍼 -> 검사 결과 캐시 최대 크기 (문서에는 같은 단어가 반복되므로 대부분 캐시에서 처리)
+_MISS = object()
+
+def _buffer_limit(max_keyword_length):
+    """KeyboardListener._calculate_max_buffer_size 와 같은 버퍼 크기 정책"""
+    return max_keyword_length + 5 if max_keyword_length else 10
+
+class StreamTransformer:
+    """
+    텍스트 조각을 순서대로 받아 KeyboardListener._check_for_replacement 와 같은 의미로 치환합니다.
+
+    - 트리거 문자(기본: 스페이스)를 만나면 직전 경계 이후의 단어(버퍼 최대 크기까지)가 키워드로 끝나는지
+      포커스 앱 규칙 -> 전역 규칙 -> 활성 그룹 순으로 검사하고, 일치하는 규칙이 없으면 자동 교정을 조회합니다.
+    - 일치하면 키워드와 트리거 문자가 치환 텍스트로 바뀝니다 (실시간 치환이 Shift+Left 로 키워드와 스페이스를
+      함께 선택해 지우는 것과 같음). keep_trigger=True 면 트리거 문자를 남깁니다.
+      자동 교정은 단어만 고치므로 트리거 문자를 항상 남깁니다 (실시간 교정도 스페이스를 다시 입력).
+    - 트리거가 아닌 공백(줄바꿈, 탭)은 버퍼만 초기화합니다. 실시간 입력에서는 Enter/Tab 이 버퍼를 지우지 않지만,
+      키워드에는 공백이 들어갈 수 없으므로 줄을 넘어 일치하는 경우만 다릅니다.
+    - 한글은 이미 조합된 텍스트로 보고 자모 조합(HangulComposer)은 하지 않습니다.
+    - 마지막 경계 이후의 미완성 단어는 버퍼 최대 크기만큼만 보관하므로 긴 입력도 메모리 사용량이 일정합니다.
+    """
+
+    def __init__(self, indexes, autocorrect=None, triggers=DEFAULT_TRIGGERS, keep_trigger=False):
+        """
+        Args:
+            indexes (Sequence[RuleIndex]): 검사 순서대로 컴파일된 규칙 (compile_layers 결과, 변환기끼리 공유 가능).
+            autocorrect (AutocorrectGraph): 자동 교정 소스 (선택).
+            triggers (str): 치환을 시도하는 문자들.
+            keep_trigger (bool): True면 치환 후에도 트리거 문자를 남깁니다.
+        """
+        self.indexes = tuple(indexes)
+        self.autocorrect = autocorrect
+        self.triggers = frozenset(triggers)
+        self.keep_trigger = keep_trigger
+        max_length = max([index.max_keyword_length for index in self.indexes] +
+                         [autocorrect.max_key_length if autocorrect is not None else 0])
+        self.max_buffer_size = _buffer_limit(max_length)
+        # 경계 문자 하나씩 분리 (split 결과는 단어, 경계, 단어, ... 순서)
+        self._boundary = re.compile("([" + re.escape(triggers) + r"]|\s)" if triggers else r"(\s)")
+        self._tail = "" # 마지막 경계 이후 아직 내보내지 않은 글자 (최대 max_buffer_size)
+        self._cache = {} # 버퍼 -> _lookup 결과 (규칙이 바뀌지 않으므로 결과도 같음)
+        self.replacements = 0
+
+    def _lookup(self, buffer):
+        """_check_for_replacement 와 같은 순서로 (키워드, 치환 텍스트, 자동 교정 여부) 또는 None을 반환합니다."""
+        for index in self.indexes:
+            found = index.match(buffer)
+            if found is not None:
+                return (found[0], found[1], False) if found[0] else None # 빈 키워드가 먼저 일치하면 치환 없음
+        if self.autocorrect is not None:
+            word = trailing_word(buffer)
+            if word and len(word) < self.max_buffer_size: # KeyboardListener._correct_word 와 같은 조건
+                fix = self.autocorrect.correct(word)
+                if fix is not None and fix != word:
+                    return word, fix, True
+        return None
+
+    def feed(self, text):
+        """텍스트 조각을 처리하고 내보낼 수 있는 결과를 반환합니다 (끝부분 일부는 다음 조각까지 보관)."""
+        parts = self._boundary.split(text)
+        if self._tail:
+            parts[0] = self._tail + parts[0]
+        output = []
+        limit = self.max_buffer_size
+        triggers = self.triggers
+        cache = self._cache
+        unchanged_from = 0 # 아직 내보내지 않은 바뀌지 않은 parts 시작 위치 (치환이 있을 때만 끊어서 합침)
+        for position in range(1, len(parts), 2):
+            word = parts[position - 1]
+            if not word or parts[position] not in triggers:
+                continue
+            buffer = word[-limit:]
+            found = cache.get(buffer, _MISS)
+            if found is _MISS:
+                found = self._lookup(buffer)
+                if len(cache) >= LOOKUP_CACHE_SIZE:
+                    cache.clear()
+                cache[buffer] = found
+            if found is None:
+                continue
+            keyword, replacement_text, autocorrected = found
+            output.append("".join(parts[unchanged_from:position - 1]))
+            output.append(word[:len(word) - len(keyword)])
+            output.append(replacement_text)
+            if self.keep_trigger or autocorrected:
+                output.append(parts[position])
+            unchanged_from = position + 1
+            self.replacements += 1
+        tail = parts.pop()
+        output.append("".join(parts[unchanged_from:]))
+        if len(tail) > limit: # 버퍼에서 잘려 나갈 앞부분은 바로 내보냄
+            output.append(tail[:-limit])
+            tail = tail[-limit:]
+        self._tail = tail
+        return "".join(output)
+
+    def finish(self):
+        """남은 글자를 반환합니다 (입력 끝에는 트리거가 없으므로 치환하지 않음)."""
+        tail, self._tail = self._tail, ""
+        return tail
+
+def transform_stream(source, target, transformer, encoding="utf-8"):
+    """
+    바이너리 스트림을 CHUNK_BYTES 단위로 읽어 변환 결과를 바이너리 스트림에 씁니다 (줄바꿈은 그대로 유지).
+
+    Returns:
+        int: 읽은 바이트 수.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    bytes_read = 0
+    while True:
+        chunk = source.read(CHUNK_BYTES)
+        if not chunk:
+            break
+        bytes_read += len(chunk)
+        target.write(transformer.feed(decoder.decode(chunk)).encode(encoding))
+    target.write((transformer.feed(decoder.decode(b"", final=True)) + transformer.finish()).encode(encoding))
+    return bytes_read
+
+def compile_layers(layers):
+    """(이름, 규칙) 층 목록을 검사 순서대로 RuleIndex 튜플로 컴파일합니다 (빈 층은 제외)."""
+    return tuple(RuleIndex(rules, name=name) for name, rules in layers if rules)
+
+def load_layers(config_manager, profile=None, app=None):
+    """
+    설정 파일의 규칙을 StreamTransformer 검사 순서(앱 규칙 -> 전역 규칙 -> 활성 그룹)의 층 목록으로 만듭니다.
+    프로세스 풀로 넘길 수 있도록 일반 딕셔너리로 복사합니다 (blob 에 있는 긴 본문도 여기서 읽음).
+
+    Returns:
+        tuple: (층 목록, 자동 교정 소스 또는 None)
+    """
+    config = config_manager.load_config()
+    autocorrect = config_manager.load_autocorrect(config)
+    if profile is None:
+        rule_set = config_manager.load_rule_set(config)
+    else:
+        if profile not in config_manager.list_profiles():
+            raise ValueError(f"unknown rule profile '{profile}' (available: {', '.join(config_manager.list_profiles())})")
+        rule_set = config_manager.load_profile(profile, config)
+    layers = []
+    if app:
+        scoped = {name.lower(): view for name, view in rule_set.scope_views().items()}
+        if app.lower() in scoped:
+            layers.append((app.lower(), dict(scoped[app.lower()].items())))
+        else:
+            logging.warning(f"[BATCH] No app-specific rules for '{app}'. Using global rules only.")
+    layers.append(("global", dict(rule_set.items())))
+    for name, group in rule_set.group_configs().items():
+        if group["enabled"]:
+            layers.append((f"group:{name}", dict(group["rules"].items())))
+    return layers, autocorrect
+
+def transform_file(path, output_path, indexes, autocorrect=None, triggers=DEFAULT_TRIGGERS, keep_trigger=False, encoding="utf-8"):
+    """
+    파일 하나를 변환해 output_path 에 씁니다 (임시 파일에 쓴 뒤 교체하므로 output_path == path 도 안전).
+
+    Returns:
+        tuple: (읽은 바이트 수, 치환 횟수, 소요 시간 초)
+    """
+    started = time.perf_counter()
+    transformer = StreamTransformer(indexes, autocorrect, triggers, keep_trigger)
+    temp_path = output_path + ".tmp"
+    try:
+        with open(path, 'rb') as source, open(temp_path, 'wb') as target:
+            bytes_read = transform_stream(source, target, transformer, encoding)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return bytes_read, transformer.replacements, time.perf_counter() - started
+
+# --- 프로세스 풀 작업자 (규칙은 작업자마다 한 번만 전달받아 컴파일) ---
+_worker_options = None
+
+def _init_worker(layers, autocorrect, triggers, keep_trigger, encoding):
+    global _worker_options
+    logging.disable(logging.INFO)
+    _worker_options = (compile_layers(layers), autocorrect, triggers, keep_trigger, encoding)
+
+def _transform_file_task(path, output_path):
+    return transform_file(path, output_path, *_worker_options)
+
+def _output_paths(paths, out_dir, in_place):
+    """입력 파일 -> 출력 파일 경로. --out-dir 에서는 파일 이름이 겹치면 오류."""
+    if in_place:
+        return {path: path for path in paths}
+    outputs = {}
+    seen = {}
+    for path in paths:
+        name = os.path.basename(path)
+        if name in seen:
+            raise ValueError(f"'{path}' and '{seen[name]}' would both be written to '{os.path.join(out_dir, name)}'")
+        seen[name] = path
+        outputs[path] = os.path.join(out_dir, name)
+    return outputs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply the saved text replacement rules to files or stdin.")
+    parser.add_argument("files", nargs="*", help="files to transform (default: read stdin, write stdout)")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--out-dir", help="write transformed files to this directory")
+    output.add_argument("--in-place", action="store_true", help="overwrite the input files")
+    parser.add_argument("--profile", help="rule profile to use (default: the active profile)")
+    parser.add_argument("--app", help="also apply the app-specific rules of this app (e.g. code.exe)")
+    parser.add_argument("--triggers", default=DEFAULT_TRIGGERS, help="characters that trigger a replacement (default: space)")
+    parser.add_argument("--keep-trigger", action="store_true", help="keep the trigger character after a replacement")
+    parser.add_argument("--encoding", default="utf-8", help="text encoding of input and output (default: utf-8)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes for multiple files")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.disable(logging.INFO)
+    if args.files and not (args.out_dir or args.in_place):
+        parser.error("--out-dir or --in-place is required when files are given")
+
+    from config_manager import ConfigManager # PyQt/pynput 없이 규칙 파일만 읽음
+    try:
+        layers, autocorrect = load_layers(ConfigManager(), args.profile, args.app)
+        outputs = _output_paths(args.files, args.out_dir, args.in_place)
+    except ValueError as e:
+        parser.error(str(e))
+    rule_count = sum(len(rules) for _, rules in layers)
+    indexes = compile_layers(layers)
+
+    started = time.perf_counter()
+    if not args.files:
+        transformer = StreamTransformer(indexes, autocorrect, args.triggers, args.keep_trigger)
+        total_bytes = transform_stream(sys.stdin.buffer, sys.stdout.buffer, transformer, args.encoding)
+        sys.stdout.flush()
+        total_replacements, errors, file_count = transformer.replacements, 0, 1
+    else:
+        if args.out_dir:
+            os.makedirs(args.out_dir, exist_ok=True)
+        total_bytes = total_replacements = errors = 0
+        file_count = len(args.files)
+        jobs = max(1, min(args.jobs, file_count))
+
+        def report(path, result):
+            bytes_read, replacements, seconds = result
+            print(f"[BATCH] {path}: {bytes_read / 1e6:.2f} MB, {replacements} replacement(s), {seconds:.2f}s", file=sys.stderr)
+
+        if jobs == 1:
+            for path in args.files:
+                try:
+                    result = transform_file(path, outputs[path], indexes, autocorrect, args.triggers, args.keep_trigger, args.encoding)
+                except (OSError, UnicodeError) as e:
+                    print(f"[BATCH] {path}: FAILED ({e})", file=sys.stderr)
+                    errors += 1
+                    continue
+                report(path, result)
+                total_bytes += result[0]
+                total_replacements += result[1]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                     initargs=(layers, autocorrect, args.triggers, args.keep_trigger, args.encoding)) as pool:
+                futures = {pool.submit(_transform_file_task, path, outputs[path]): path for path in args.files}
+                for future in as_completed(futures):
+                    path = futures[future]
+                    try:
+                        result = future.result()
+                    except (OSError, UnicodeError) as e:
+                        print(f"[BATCH] {path}: FAILED ({e})", file=sys.stderr)
+                        errors += 1
+                        continue
+                    report(path, result)
+                    total_bytes += result[0]
+                    total_replacements += result[1]
+    elapsed = time.perf_counter() - started
+    print(f"[BATCH] {file_count} input(s), {rule_count} rules, {total_bytes / 1e6:.2f} MB in {elapsed:.2f}s "
+          f"({total_bytes / 1e6 / elapsed if elapsed > 0 else 0:.1f} MB/s), {total_replacements} replacement(s), "
+          f"{errors} error(s).", file=sys.stderr)
+    return 1 if errors else 0
+
+def _naive_transform(text, layers, triggers=DEFAULT_TRIGGERS, keep_trigger=False, autocorrect=None):
+    """자체 테스트용 기준 구현: 한 글자씩 처리하고 규칙을 endswith() 로 하나씩 검사합니다."""
+    max_length = max([len(keyword) for _, rules in layers for keyword in rules] +
+                     [autocorrect.max_key_length if autocorrect is not None else 0])
+    limit = _buffer_limit(max_length)
+    output = []
+    word = ""
+    for char in text:
+        if char in triggers and word:
+            buffer = word[-limit:]
+            found = None
+            for _, rules in layers:
+                keyword = next((keyword for keyword in rules if buffer.endswith(keyword)), None)
+                if keyword is not None:
+                    found = (keyword, rules[keyword], False)
+                    break
+            if found is None and autocorrect is not None:
+                typo = trailing_word(buffer)
+                fix = autocorrect.correct(typo) if typo and len(typo) < limit else None
+                if fix is not None and fix != typo:
+                    found = (typo, fix, True)
+            if found is not None:
+                keyword, replacement_text, autocorrected = found
+                del output[len(output) - len(keyword):]
+                output.append(replacement_text)
+                if keep_trigger or autocorrected:
+                    output.append(char)
+                word = ""
+                continue
+        output.append(char)
+        word = "" if char in triggers or char.isspace() else word + char
+    return "".join(output)
+
+def _self_test():
+    import io
+    import random
+    import tempfile
+    from autocorrect import build_autocorrect, AutocorrectGraph
+    global CHUNK_BYTES
+    logging.basicConfig(level=logging.WARNING)
+
+    layers = [("code.exe", {"!fn": "def ", "sig": "SIG"}),
+              ("global", {"!mail": "me@example.com", "mail": "MAIL", "!sig": "Best regards,\nMe", "!긴": "긴 본문 " * 3}),
+              ("group:emoji", {"!ok": "👍", "sig": "unused (code.exe 규칙이 먼저)"})]
+    indexes = compile_layers(layers)
+
+    def run(text, chunk_size, **options):
+        transformer = StreamTransformer(indexes, **options)
+        pieces = [transformer.feed(text[start:start + chunk_size]) for start in range(0, len(text), chunk_size)]
+        return "".join(pieces) + transformer.finish()
+
+    # 기본 의미: 키워드와 트리거가 함께 치환되고, 줄바꿈/탭은 버퍼만 초기화, 입력 끝(트리거 없음)은 치환하지 않음
+    assert run("a !mail b\n!ok\n!fn x !ok", 4) == "a me@example.comb\n!ok\ndef x !ok"
+    assert run("x!sig !ok\t!fn !fn", 3) == "x!SIG!ok\tdef !fn" # 앱 규칙 "sig" 가 전역 "!sig" 보다 먼저
+    assert run("mail !ok.", 2, triggers=" .", keep_trigger=True) == "MAIL 👍."
+    assert run("mail !ok.", 2, triggers=" .") == "MAIL👍"
+
+    # 자동 교정은 단어만 고치고 트리거(스페이스)를 항상 남김, 규칙이 먼저
+    test_dir = tempfile.mkdtemp()
+    source_path = os.path.join(test_dir, "typos.txt")
+    with open(source_path, 'w', encoding='utf-8') as f:
+        f.write("teh\tthe\nmial\tmail\nsig\tSIGNAL\n")
+    build_autocorrect(source_path, os.path.join(test_dir, "typos.dawg"))
+    autocorrect = AutocorrectGraph(os.path.join(test_dir, "typos.dawg"))
+    assert run("Teh mial !mail teh", 5, autocorrect=autocorrect) == "The mail me@example.comteh"
+    assert run("teh sig ", 1, autocorrect=autocorrect) == "the SIG" # "sig" 는 code.exe 규칙이 교정보다 먼저
+
+    # 무작위 입력: 조각 크기(1~1000)와 관계없이 같은 결과이며 기준 구현과 일치
+    rng = random.Random(7)
+    tokens = ["!mail", "mail", "!sig", "x!sig", "!fn", "sig", "!ok", "!긴", "teh", "Teh", "mial", "ab", "!", "가나", "🙂"]
+    separators = [" ", " ", " ", "  ", "\n", "\t", ".", "\r\n"]
+    text = "".join(rng.choice(tokens) + rng.choice(separators) for _ in range(700)) + "!mail"
+    for options in ({}, {"keep_trigger": True}, {"triggers": " ."}, {"autocorrect": autocorrect},
+                    {"triggers": " .", "keep_trigger": True, "autocorrect": autocorrect}):
+        expected = _naive_transform(text, layers, **options)
+        assert run(text, len(text), **options) == expected, options
+        for chunk_size in range(1, 1001):
+            assert run(text, chunk_size, **options) == expected, (options, chunk_size)
+
+    # 바이트 스트림: 멀티바이트 문자가 읽기 조각 경계에서 잘려도 같은 결과
+    encoded = text.encode("utf-8")
+    expected = _naive_transform(text, layers).encode("utf-8")
+    chunk_bytes = CHUNK_BYTES
+    for CHUNK_BYTES in range(1, 64):
+        target = io.BytesIO()
+        assert transform_stream(io.BytesIO(encoded), target, StreamTransformer(indexes)) == len(encoded)
+        assert target.getvalue() == expected, CHUNK_BYTES
+    CHUNK_BYTES = chunk_bytes
+
+    # --in-place / --out-dir: 설정 파일의 규칙으로 파일을 변환 (프로세스 풀 포함)
+    os.environ["LOCALAPPDATA"] = test_dir
+    from config_manager import ConfigManager
+    assert ConfigManager().save_rules(dict(layers[1][1]))
+    documents = []
+    for number in range(3):
+        path = os.path.join(test_dir, f"doc{number}.txt")
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        documents.append(path)
+    expected = _naive_transform(text, [layers[1]])
+    out_dir = os.path.join(test_dir, "out")
+    assert main(["--out-dir", out_dir, "--jobs", "2"] + documents) == 0
+    assert main(["--in-place", documents[0]]) == 0
+    for path in [documents[0]] + [os.path.join(out_dir, os.path.basename(path)) for path in documents]:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            assert f.read() == expected, path
+    assert not [name for name in os.listdir(test_dir) if name.endswith(".tmp")]
+    with open(documents[1], 'r', encoding='utf-8', newline='') as f:
+        assert f.read() == text # --out-dir 은 입력 파일을 바꾸지 않음
+    autocorrect.close()
+    print("StreamTransformer test finished.")
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ["--self-test"]:
+        _self_test()
+        sys.exit(0)
+    sys.exit(main())
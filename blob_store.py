@@ -0,0 +1,208 @@
+import json
+import hashlib
+import logging
+import os
+import time
+import weakref
+from rule_set import RuleSet # 공유 압축 규칙 표현
+
+INLINE_BODY_LIMIT = 256 # 이 길이(바이트) 이하의 치환 텍스트는 메모리에 그대로 유지
+STAMP_READ_BYTES = 1 << 20 # 스탬프 해시 계산 시 한 번에 읽는 크기
+_live_rule_sets = weakref.WeakValueDictionary() # id -> 이 프로세스에서 blob 을 참조하는 RuleSet (남아 있는 동안 그 세대 파일은 삭제하지 않음)
+
+class ReplacementBlobStore:
+    """긴 치환 텍스트를 blob 파일 + 인덱스 파일로 저장/로드하는 클래스
+
+    rules.json 은 계속 원본으로 유지되며, blob은 원본 파일의 (수정 시각, 크기, 내용 해시)가
+    바뀌었을 때만 다시 씁니다. blob 파일은 세대별 이름으로 새로 만들고, 직전 세대와 이 프로세스에서
+    아직 살아 있는 RuleSet(프로필 LRU, 고정된 그룹 인덱스 등)이 참조하는 세대는 남겨 두므로
+    이전 매핑을 쓰고 있는 리스너가 교체 도중에 잘못된 본문을 읽지 않습니다.
+    다른 프로세스(훅 프로세스)의 사본이 삭제된 세대를 읽으면 RuleSet 이 오류를 기록하고 그 치환만 건너뜁니다.
+    """
+
+    def __init__(self, directory, name="rules_bodies", inline_limit=INLINE_BODY_LIMIT):
+        """
+        Args:
+            directory (str): blob/인덱스 파일을 둘 디렉토리 (보통 설정 디렉토리).
+            name (str): 파일 이름 접두사.
+            inline_limit (int): 이 바이트 길이 이하의 본문은 메모리에 유지.
+        """
+        self.directory = directory
+        self.name = name
+        self.index_path = os.path.join(directory, f"{name}.idx.json")
+        self.inline_limit = inline_limit
+
+    @staticmethod
+    def source_stamp(source_path):
+        """
+        원본 파일의 변경 여부를 판단할 [수정 시각 ns, 크기, 내용 SHA-256] 스탬프를 반환합니다. 파일이 없으면 None.
+        수정 시각 해상도가 낮은 파일 시스템(FAT)이나 수정 시각을 보존하는 도구로 같은 크기의 내용이 바뀌어도 감지합니다.
+        """
+        try:
+            stat = os.stat(source_path)
+            digest = hashlib.sha256()
+            with open(source_path, 'rb') as f:
+                for block in iter(lambda: f.read(STAMP_READ_BYTES), b""):
+                    digest.update(block)
+            return [stat.st_mtime_ns, stat.st_size, digest.hexdigest()]
+        except OSError:
+            return None
+
+    def _load_index(self, stamp):
+        """스탬프가 일치하는 인덱스가 있으면 (blob 경로, 키워드 -> (오프셋, 길이))를 반환, 없으면 (None, None)."""
+        if stamp is None or not os.path.exists(self.index_path):
+            return None, None
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            blob_path = os.path.join(self.directory, index["blob_file"])
+            if (index.get("source_stamp") != stamp or index.get("inline_limit") != self.inline_limit
+                    or not os.path.exists(blob_path)):
+                return None, None
+            return blob_path, {keyword: tuple(entry) for keyword, entry in index["offsets"].items()}
+        except Exception as e:
+            logging.warning(f"Failed to read blob index '{self.index_path}'. Rebuilding: {e}")
+            return None, None
+
+    def _remove_old_generations(self, keep):
+        """keep 에 포함되지 않은 이전 세대 blob 파일을 삭제합니다."""
+        prefix = f"{self.name}."
+        for file_name in os.listdir(self.directory):
+            if file_name.startswith(prefix) and file_name.endswith(".blob") and file_name not in keep:
+                try:
+                    os.remove(os.path.join(self.directory, file_name))
+                except OSError as e:
+                    logging.debug(f"Could not remove old blob '{file_name}': {e}")
+
+    def _write(self, rules, stamp):
+        """긴 본문을 새 세대 blob 파일에 쓰고 인덱스를 저장합니다. (blob 경로, 키워드 -> (오프셋, 길이))를 반환합니다."""
+        previous_blob_file = None
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                previous_blob_file = json.load(f).get("blob_file")
+        except Exception:
+            pass
+
+        blob_file = f"{self.name}.{time.time_ns()}.blob"
+        blob_path = os.path.join(self.directory, blob_file)
+        offsets = {}
+        temp_blob_path = blob_path + ".tmp"
+        with open(temp_blob_path, 'wb') as f:
+            position = 0
+            for keyword, body in rules.items():
+                encoded = body.encode('utf-8')
+                if len(encoded) <= self.inline_limit:
+                    continue
+                f.write(encoded)
+                offsets[keyword] = (position, len(encoded))
+                position += len(encoded)
+        os.replace(temp_blob_path, blob_path)
+
+        temp_index_path = self.index_path + ".tmp"
+        with open(temp_index_path, 'w', encoding='utf-8') as f:
+            json.dump({"source_stamp": stamp, "inline_limit": self.inline_limit, "blob_file": blob_file,
+                       "offsets": {keyword: list(entry) for keyword, entry in offsets.items()}},
+                      f, ensure_ascii=False)
+        os.replace(temp_index_path, self.index_path)
+        in_use = {os.path.basename(rule_set.blob_path) for rule_set in list(_live_rule_sets.values())}
+        self._remove_old_generations(keep={blob_file, previous_blob_file} | in_use)
+        logging.info(f"Wrote {len(offsets)} out-of-line replacement bodies to '{blob_path}' ({position} bytes).")
+        return blob_path, offsets
+
+    def load(self, rules, source_path, scoped_rules=None, groups=None, stamp=None):
+        """
+        파싱된 규칙으로부터 긴 전역 규칙 본문을 blob 파일에 둔 RuleSet을 만듭니다.
+        호출 측은 이후 원본 딕셔너리 참조를 버려야 긴 본문이 메모리에서 해제됩니다.
+
+        Args:
+            rules (dict): 전역 규칙, 키워드 -> 치환 텍스트 (rules.json 에서 파싱한 값).
+            source_path (str): 원본 rules.json 경로 (blob 재사용 여부 판단용).
+            scoped_rules (dict): 앱별 규칙 (RuleSet에 함께 담김, 본문은 메모리 유지).
+            groups (dict): 규칙 그룹 (RuleSet에 함께 담김, 본문은 메모리 유지).
+            stamp (list): rules 를 파싱하기 전에 구한 source_stamp(source_path) (없으면 지금 계산).
+
+        Returns:
+            RuleSet: blob 저장에 실패하면 모든 본문을 메모리에 둔 RuleSet.
+        """
+        if stamp is None:
+            stamp = self.source_stamp(source_path)
+        blob_path, offsets = self._load_index(stamp)
+        if offsets is not None and any(keyword not in rules for keyword in offsets):
+            offsets = None # 인덱스와 규칙이 맞지 않음 -> 다시 생성
+        try:
+            if offsets is None:
+                if all(len(body) * 4 <= self.inline_limit for body in rules.values()):
+                    # 긴 본문이 확실히 없으면 blob 불필요 (UTF-8 최대 4바이트/문자 기준)
+                    return RuleSet(rules, scoped_rules, groups)
+                blob_path, offsets = self._write(rules, stamp)
+            else:
+                logging.debug(f"Reusing blob index '{self.index_path}' ({len(offsets)} bodies).")
+        except Exception as e:
+            logging.error(f"Failed to write replacement blob in '{self.directory}'. Keeping rules in memory: {e}", exc_info=True)
+            return RuleSet(rules, scoped_rules, groups)
+
+        rule_set = RuleSet(rules, scoped_rules, groups, blob_path=blob_path, blob_offsets=offsets)
+        _live_rule_sets[id(rule_set)] = rule_set # RuleSet 은 Mapping 이라 해시할 수 없어 id 로 보관
+        return rule_set
+
+if __name__ == '__main__':
+    # 테스트용 코드
+    import tempfile
+    logging.basicConfig(level=logging.DEBUG)
+
+    test_dir = tempfile.mkdtemp()
+    source_path = os.path.join(test_dir, "rules.json")
+    test_rules = {"!short": "short text", "!long": "긴 본문 " * 200, "!long2": "x" * 1000}
+    with open(source_path, 'w', encoding='utf-8') as f:
+        json.dump({"rules": test_rules}, f, ensure_ascii=False)
+
+    store = ReplacementBlobStore(test_dir)
+    lazy = store.load(test_rules, source_path)
+    assert lazy.blob_path is not None
+    assert list(lazy) == list(test_rules) # 순서 유지
+    assert dict(lazy) == test_rules
+    assert not lazy.is_out_of_line("!short") and lazy.is_out_of_line("!long")
+    assert lazy.preview("!long", 10) == ("긴 본문 " * 2)[:10] + "…"
+    assert lazy.body_length("!long2") == 1000
+
+    # 원본이 바뀌지 않았으면 blob을 다시 쓰지 않음
+    lazy_again = store.load(test_rules, source_path)
+    assert lazy_again.blob_path == lazy.blob_path
+    assert lazy_again["!long2"] == "x" * 1000
+
+    # 수정 시각과 크기가 같아도 내용이 바뀌면 다시 씀 (수정 시각 해상도가 낮거나 보존된 경우)
+    source_stat = os.stat(source_path)
+    test_rules["!long2"] = "z" * 1000
+    with open(source_path, 'w', encoding='utf-8') as f:
+        json.dump({"rules": test_rules}, f, ensure_ascii=False)
+    os.utime(source_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+    assert os.path.getsize(source_path) == source_stat.st_size
+    lazy_same_size = store.load(test_rules, source_path)
+    assert lazy_same_size.blob_path != lazy.blob_path and lazy_same_size["!long2"] == "z" * 1000
+
+    # 원본이 바뀌면 새 세대를 쓰되, 이전 매핑은 계속 읽을 수 있어야 함
+    test_rules["!long2"] = "y" * 2000
+    with open(source_path, 'w', encoding='utf-8') as f:
+        json.dump({"rules": test_rules}, f, ensure_ascii=False)
+    lazy_new = store.load(test_rules, source_path)
+    assert lazy_new.blob_path != lazy.blob_path
+    assert lazy_new["!long2"] == "y" * 2000
+    assert lazy_same_size["!long2"] == "z" * 1000 # 직전 세대는 남아 있음
+    assert lazy["!long2"] == "x" * 1000 # 더 이전 세대도 참조하는 RuleSet 이 살아 있으면 남아 있음
+
+    # 참조가 사라진 세대는 다음 저장 때 삭제되고, 다른 프로세스의 사본(pickle)은 그 본문만 건너뜀
+    import gc
+    import pickle
+    from rule_index import RuleIndex
+    hook_process_copy = pickle.loads(pickle.dumps(lazy))
+    del lazy, lazy_again
+    gc.collect()
+    test_rules["!long2"] = "w" * 2000
+    with open(source_path, 'w', encoding='utf-8') as f:
+        json.dump({"rules": test_rules}, f, ensure_ascii=False)
+    lazy_newest = store.load(test_rules, source_path)
+    assert not os.path.exists(hook_process_copy.blob_path) and os.path.exists(lazy_same_size.blob_path)
+    assert hook_process_copy.get("!long2") is None and hook_process_copy["!short"] == "short text"
+    assert RuleIndex(hook_process_copy).match("x !long2") is None and hook_process_copy.preview("!long") == ""
+    assert store.load({"!a": "b"}, source_path).blob_path is None # 짧은 본문만 있으면 blob 없음
+    print("\nReplacementBlobStore test finished.")
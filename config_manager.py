@@ -1,9 +1,21 @@
 import json
 import logging
 import os
+from collections import OrderedDict
+from blob_store import ReplacementBlobStore # 긴 치환 텍스트 지연 로드
+from autocorrect import AutocorrectGraph, build_autocorrect # 사전 규모 자동 교정 목록
+from snapshot_store import RuleSnapshotStore, RULE_SECTIONS # 저장할 때마다 남기는 규칙 이력 (바뀐 청크만 저장)
+
+DEFAULT_PROFILE = "default" # rules.json 자체의 규칙을 쓰는 기본 프로필
+PROFILE_CACHE_SIZE = 3 # 컴파일된 프로필(RuleSet + 키워드 인덱스)을 메모리에 유지할 최대 개수
 
 class ConfigManager:
-    """애플리케이션 설정을 JSON 파일로 관리하는 클래스 (규칙 및 일반 설정 포함)"""
+    """애플리케이션 설정을 JSON 파일로 관리하는 클래스 (규칙 및 일반 설정 포함)
+
+    규칙은 프로필 단위로 관리합니다. 기본 프로필은 rules.json 의 규칙 섹션이고,
+    그 외 프로필은 profiles/<이름>.json 파일(rules, scoped_rules, groups)에 따로 저장되어
+    활성 프로필만 로드/컴파일됩니다. 최근 사용한 프로필은 LRU 캐시에 남아 다시 전환할 때 즉시 적용됩니다.
+    """
 
     def __init__(self):
         """
@@ -19,6 +31,8 @@ class ConfigManager:
             
         self.app_config_dir = os.path.join(base_dir, "TextReplacerPAAK")
         self.config_file_path = os.path.join(self.app_config_dir, "rules.json")
+        self.usage_stats_file_path = os.path.join(self.app_config_dir, "usage_stats.json") # 규칙 사용 통계 (rules.json과 분리)
+        self.profiles_dir = os.path.join(self.app_config_dir, "profiles") # 기본 프로필 외의 규칙 프로필 파일
         logging.info(f"ConfigManager initialized. Config file path set to: {self.config_file_path}")
 
         try:
@@ -27,6 +41,13 @@ class ConfigManager:
         except Exception as e:
             logging.error(f"Failed to create config directory '{self.app_config_dir}': {e}", exc_info=True)
 
+        # 긴 치환 텍스트를 설정 디렉토리의 blob 파일로 분리해 필요할 때만 읽음
+        self.blob_store = ReplacementBlobStore(self.app_config_dir)
+        # 프로필 이름 -> (원본 파일 스탬프, RuleSet), 가장 최근에 사용한 항목이 끝
+        self._profile_cache = OrderedDict()
+        # "Save All Rules" 이력 (저장 전후의 규칙 섹션 스냅샷, 이력 창에서 복원)
+        self.snapshot_store = RuleSnapshotStore(os.path.join(self.app_config_dir, "snapshots"))
+
     def get_default_config(self):
         """기본 설정 (규칙 및 세팅)을 포함하는 딕셔너리를 반환합니다."""
         return {
@@ -36,19 +57,60 @@ class ConfigManager:
                 "!greet": "Hello there! Have a nice day.",
                 "longkwtest": "This is a test for a longer keyword replacement."
             },
+            "scoped_rules": {
+                # 앱 이름(소문자 실행 파일명) -> 해당 앱에서만 적용되는 규칙
+                # 예: "code.exe": {"!fn": "def function():"}
+            },
+            "groups": {
+                # 그룹 이름 -> 트레이 메뉴에서 켜고 끌 수 있는 규칙 묶음
+                # 예: "support": {"enabled": True, "rules": {"!ty": "Thank you for contacting us."}}
+            },
             "settings": {
-                "start_on_boot": False # 기본값: 시작 시 실행 안 함
+                "start_on_boot": False, # 기본값: 시작 시 실행 안 함
+                "hook_process": False, # True면 키보드 훅을 별도 프로세스에서 실행 (GUI 작업 중 입력 끊김 방지)
+                "active_profile": DEFAULT_PROFILE, # 사용할 규칙 프로필 (profiles/<이름>.json, 기본은 rules.json 의 규칙)
+                "autocorrect_file": "", # 자동 교정 목록 ("오타<TAB>교정" 텍스트 또는 빌드된 .dawg, 상대 경로는 설정 디렉토리 기준, 빈 값이면 끔)
+                "suggestions_enabled": False, # True면 키워드 입력 중 접두사가 일치하는 키워드를 팝업으로 추천 (훅 프로세스 모드 제외)
+                "suggestion_min_prefix": 2, # 추천을 시작할 최소 입력 글자 수
+                "suggestion_count": 5, # 추천 키워드 최대 개수 (사용 횟수 순)
+                "suggestion_accept_key": "f8" # 첫 번째 추천을 치환하는 키 (pynput Key 이름)
                 # 나중에 다른 설정 추가 가능
             }
         }
 
+    @staticmethod
+    def _normalize_rule_sections(data):
+        """앱별 규칙(scoped_rules)과 규칙 그룹(groups) 섹션의 형식을 검사하고, 잘못된 항목은 제외합니다 (제자리 수정)."""
+        if "scoped_rules" not in data or not isinstance(data.get("scoped_rules"), dict):
+            if "scoped_rules" in data:
+                logging.warning("'scoped_rules' is not a dict in config file. Ignoring app-scoped rules.")
+            data["scoped_rules"] = {}
+        else:
+            # 앱별 규칙 값이 딕셔너리가 아니면 제외
+            for app_name in [name for name, rules in data["scoped_rules"].items() if not isinstance(rules, dict)]:
+                logging.warning(f"Scoped rules for '{app_name}' are not a dict. Ignoring them.")
+                del data["scoped_rules"][app_name]
+        if "groups" not in data or not isinstance(data.get("groups"), dict):
+            if "groups" in data:
+                logging.warning("'groups' is not a dict in config file. Ignoring rule groups.")
+            data["groups"] = {}
+        else:
+            # 형식이 잘못된 그룹은 제외하고, enabled 키가 없으면 활성화 상태로 간주
+            for group_name in list(data["groups"].keys()):
+                group = data["groups"][group_name]
+                if not isinstance(group, dict) or not isinstance(group.get("rules"), dict):
+                    logging.warning(f"Rule group '{group_name}' is malformed (needs a 'rules' dict). Ignoring it.")
+                    del data["groups"][group_name]
+                    continue
+                group.setdefault("enabled", True)
+
     def load_config(self):
         """
         설정 파일에서 전체 설정을 로드합니다.
         파일이 없거나 JSON 디코딩/형식 오류 시 기본 설정을 반환합니다.
 
         Returns:
-            dict: 로드된 전체 설정 (rules와 settings 포함).
+            dict: 로드된 전체 설정 (rules, scoped_rules, groups, settings 포함).
         """
         if not os.path.exists(self.config_file_path):
             logging.warning(f"Config file '{self.config_file_path}' not found. Returning default config.")
@@ -64,6 +126,7 @@ class ConfigManager:
             if "rules" not in config or not isinstance(config.get("rules"), dict):
                 logging.warning("'rules' key missing or not a dict in config file. Using default rules.")
                 config["rules"] = default_config["rules"]
+            self._normalize_rule_sections(config)
             if "settings" not in config or not isinstance(config.get("settings"), dict):
                 logging.warning("'settings' key missing or not a dict in config file. Using default settings.")
                 config["settings"] = default_config["settings"]
@@ -108,10 +171,199 @@ class ConfigManager:
             logging.error(f"Error saving config to '{self.config_file_path}': {e}", exc_info=True)
             return False
 
+    def profile_path(self, name: str):
+        """프로필 규칙이 저장된 파일 경로를 반환합니다 (기본 프로필은 rules.json)."""
+        if name == DEFAULT_PROFILE:
+            return self.config_file_path
+        return os.path.join(self.profiles_dir, f"{name}.json")
+
+    def _profile_blob_store(self, name: str):
+        """프로필의 긴 본문을 저장할 blob 저장소 (프로필마다 별도 파일)."""
+        if name == DEFAULT_PROFILE:
+            return self.blob_store
+        return ReplacementBlobStore(self.profiles_dir, name=f"{name}_bodies")
+
+    def list_profiles(self):
+        """사용 가능한 프로필 이름 목록을 반환합니다 (기본 프로필이 항상 첫 번째)."""
+        names = []
+        try:
+            names = sorted(file_name[:-len(".json")] for file_name in os.listdir(self.profiles_dir)
+                           if file_name.endswith(".json") and file_name[:-len(".json")] != DEFAULT_PROFILE)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.error(f"Failed to list rule profiles in '{self.profiles_dir}': {e}", exc_info=True)
+        return [DEFAULT_PROFILE] + names
+
+    def get_active_profile(self, config: dict = None):
+        """
+        활성 프로필 이름을 반환합니다. 설정된 프로필 파일이 없으면 기본 프로필을 사용합니다.
+
+        Args:
+            config (dict): load_config() 결과. None이면 설정 파일에서 새로 로드합니다.
+        """
+        if config is None:
+            config = self.load_config()
+        name = config.get("settings", {}).get("active_profile", DEFAULT_PROFILE)
+        if name != DEFAULT_PROFILE and not os.path.exists(self.profile_path(name)):
+            logging.warning(f"Rule profile '{name}' not found in '{self.profiles_dir}'. Using default profile.")
+            return DEFAULT_PROFILE
+        return name
+
+    def _load_profile_data(self, name: str):
+        """프로필 파일의 규칙 섹션(rules, scoped_rules, groups)을 로드합니다. 실패하면 빈 섹션을 반환합니다."""
+        path = self.profile_path(name)
+        data = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                logging.warning(f"Rule profile '{path}' is not a JSON object. Ignoring it.")
+                data = {}
+        except FileNotFoundError:
+            logging.warning(f"Rule profile '{path}' not found. Using empty rules.")
+        except Exception as e:
+            logging.error(f"Error loading rule profile from '{path}'. Using empty rules.: {e}", exc_info=True)
+        if not isinstance(data.get("rules"), dict):
+            if "rules" in data:
+                logging.warning(f"'rules' is not a dict in rule profile '{path}'. Ignoring it.")
+            data["rules"] = {}
+        self._normalize_rule_sections(data)
+        return data
+
+    def _save_profile_data(self, name: str, data: dict):
+        """프로필 규칙 섹션을 프로필 파일에 저장합니다. 저장 성공 여부를 반환합니다."""
+        path = self.profile_path(name)
+        try:
+            os.makedirs(self.profiles_dir, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=4)
+            logging.info(f"Successfully saved rule profile to '{path}'.")
+            return True
+        except Exception as e:
+            logging.error(f"Error saving rule profile to '{path}': {e}", exc_info=True)
+            return False
+
+    def load_profile(self, name: str, config: dict = None):
+        """
+        프로필의 규칙을 컴파일된 RuleSet으로 반환합니다.
+        최근 사용한 프로필은 파일이 바뀌지 않았으면 캐시된 RuleSet(키워드 인덱스 포함)을 그대로 돌려줍니다.
+
+        Args:
+            name (str): 프로필 이름.
+            config (dict): 기본 프로필일 때 이미 로드한 load_config() 결과 (없으면 새로 로드).
+                           전달된 config의 "rules"는 꺼내서 해제되도록 제거됩니다.
+
+        Returns:
+            RuleSet: 프로필의 전역 규칙, 앱별 규칙, 규칙 그룹.
+        """
+        path = self.profile_path(name)
+        stamp = ReplacementBlobStore.source_stamp(path) # 파싱 전에 계산 (내용 해시 포함)
+        cached = self._profile_cache.get(name)
+        if cached is not None and stamp is not None and cached[0] == stamp:
+            self._profile_cache.move_to_end(name)
+            if config is not None:
+                config.pop("rules", None)
+            logging.debug(f"Rule profile '{name}' served from cache.")
+            return cached[1]
+
+        if name == DEFAULT_PROFILE:
+            data = config if config is not None else self.load_config()
+        else:
+            data = self._load_profile_data(name)
+        rule_set = self._profile_blob_store(name).load(data.pop("rules", {}), path,
+                                                       scoped_rules=data.get("scoped_rules", {}),
+                                                       groups=data.get("groups", {}), stamp=stamp)
+        self._profile_cache[name] = (stamp, rule_set)
+        self._profile_cache.move_to_end(name)
+        while len(self._profile_cache) > PROFILE_CACHE_SIZE:
+            evicted, _ = self._profile_cache.popitem(last=False)
+            logging.debug(f"Rule profile '{evicted}' evicted from cache.")
+        logging.info(f"Loaded rule profile '{name}' from '{path}'.")
+        return rule_set
+
+    def switch_profile(self, name: str):
+        """
+        활성 프로필을 바꾸고 설정에 저장합니다.
+
+        Returns:
+            RuleSet | None: 새 활성 프로필의 규칙 (프로필이 없거나 저장 실패 시 None).
+        """
+        if name not in self.list_profiles():
+            logging.warning(f"Rule profile '{name}' does not exist.")
+            return None
+        config = self.load_config()
+        config["settings"]["active_profile"] = name
+        # 설정 저장으로 rules.json 스탬프가 바뀌어도, 그 직전까지 유효했던 기본 프로필 캐시는 유지
+        default_cached = self._profile_cache.get(DEFAULT_PROFILE)
+        default_valid = default_cached is not None and default_cached[0] == ReplacementBlobStore.source_stamp(self.config_file_path)
+        if not self.save_config(config):
+            return None
+        if default_valid:
+            self._profile_cache[DEFAULT_PROFILE] = (ReplacementBlobStore.source_stamp(self.config_file_path), default_cached[1])
+        logging.info(f"Switched to rule profile '{name}'.")
+        return self.load_profile(name, config if name == DEFAULT_PROFILE else None)
+
+    def load_autocorrect(self, config: dict = None, previous: AutocorrectGraph = None):
+        """
+        설정된 자동 교정 목록을 엽니다. 텍스트 목록이면 목록 버전(수정 시각, 크기)이 들어간
+        '<이름>.<버전>.dawg' 파일로 빌드해 두고 목록이 바뀌었을 때만 새 버전을 빌드합니다.
+        실행 중인 리스너가 mmap 한 이전 버전 파일은 덮어쓰지 않으므로 Windows 에서도 재로드 중에 다시 빌드할 수 있습니다.
+        빌드에 오래 걸릴 수 있으므로 GUI 스레드에서는 호출하지 마세요.
+
+        Args:
+            config (dict): load_config() 결과. None이면 설정 파일에서 새로 로드합니다.
+            previous (AutocorrectGraph): 현재 사용 중인 그래프. 같은 파일이면 다시 열지 않고 그대로 반환하며,
+                새 목록을 빌드하거나 열 수 없으면 이 그래프를 유지합니다.
+
+        Returns:
+            AutocorrectGraph | None: 설정되지 않았으면 None, 열 수 없으면 previous.
+        """
+        if config is None:
+            config = self.load_config()
+        path = config.get("settings", {}).get("autocorrect_file", "")
+        if not path:
+            return None
+        path = os.path.join(self.app_config_dir, os.path.expandvars(path)) # 절대 경로면 그대로 사용
+        try:
+            if not path.lower().endswith(".dawg"):
+                source_stat = os.stat(path)
+                stem = os.path.splitext(path)[0]
+                graph_path = f"{stem}.{source_stat.st_mtime_ns:x}-{source_stat.st_size:x}.dawg"
+                if not os.path.exists(graph_path):
+                    logging.info(f"Building autocorrect graph '{graph_path}' from '{path}'...")
+                    build_autocorrect(path, graph_path)
+                    self._remove_stale_autocorrect_graphs(stem, graph_path)
+                path = graph_path
+            if previous is not None and os.path.normcase(os.path.abspath(previous.path)) == os.path.normcase(os.path.abspath(path)):
+                return previous # 목록이 바뀌지 않음
+            graph = AutocorrectGraph(path)
+            logging.info(f"Loaded autocorrect graph '{path}' ({len(graph)} words).")
+            return graph
+        except Exception as e:
+            if previous is not None:
+                logging.error(f"Failed to load autocorrect list '{path}'. Keeping the current list: {e}", exc_info=True)
+                return previous
+            logging.error(f"Failed to load autocorrect list '{path}'. Autocorrect disabled: {e}", exc_info=True)
+            return None
+
+    def _remove_stale_autocorrect_graphs(self, stem, current_path):
+        """이전 버전의 '<이름>.<버전>.dawg' 파일을 지웁니다. 아직 mmap 중인 파일(Windows)은 다음 빌드 때 지웁니다."""
+        directory, base_name = os.path.split(stem)
+        for file_name in os.listdir(directory or "."):
+            file_path = os.path.join(directory, file_name)
+            if (file_name.startswith(base_name + ".") and file_name.endswith(".dawg")
+                    and file_name.count(".") == base_name.count(".") + 2 and file_path != current_path):
+                try:
+                    os.remove(file_path)
+                    logging.info(f"Removed stale autocorrect graph '{file_path}'.")
+                except OSError as e:
+                    logging.debug(f"Stale autocorrect graph '{file_path}' is still in use: {e}")
+
     def save_rules(self, rules_data: dict):
         """
-        주어진 규칙 데이터를 설정 파일에 저장합니다.
-        기존 설정(settings)은 유지됩니다.
+        주어진 규칙 데이터를 활성 프로필 파일에 저장합니다.
+        기존 설정(settings)과 앱별 규칙, 규칙 그룹은 유지됩니다.
 
         Args:
             rules_data (dict): 저장할 규칙 데이터.
@@ -120,8 +372,115 @@ class ConfigManager:
             bool: 저장 성공 여부.
         """
         current_config = self.load_config() # 기존 전체 설정 로드
-        current_config["rules"] = rules_data # rules 부분만 업데이트
-        return self.save_config(current_config) # 전체 설정 저장
+        name = self.get_active_profile(current_config)
+        data = self._load_profile_data(name) if name != DEFAULT_PROFILE else current_config
+        self._snapshot(name, data, "before save") # 파일에만 있던 변경(직접 편집 등)도 이력에 남김 (바뀐 것이 없으면 생략됨)
+        data["rules"] = rules_data # rules 부분만 업데이트
+        saved = self._save_profile_data(name, data) if name != DEFAULT_PROFILE else self.save_config(data)
+        if saved:
+            self._snapshot(name, data, "save")
+        return saved
+
+    def _snapshot(self, name: str, data: dict, reason: str):
+        """프로필 규칙 섹션의 스냅샷을 남깁니다. 실패해도 저장은 계속합니다."""
+        try:
+            return self.snapshot_store.create(name, data, reason)
+        except Exception as e:
+            logging.error(f"Failed to snapshot rule profile '{name}' ({reason}): {e}", exc_info=True)
+            return None
+
+    def list_snapshots(self):
+        """활성 프로필의 규칙 스냅샷 요약 목록을 최신순으로 반환합니다."""
+        return self.snapshot_store.snapshots(self.get_active_profile())
+
+    def restore_snapshot(self, snapshot_id: str):
+        """
+        활성 프로필의 규칙 섹션(rules, scoped_rules, groups)을 스냅샷 내용으로 되돌립니다 (settings 는 유지).
+        복원 직전 상태도 스냅샷으로 남으므로 복원을 다시 되돌릴 수 있습니다.
+
+        Returns:
+            RuleSet | None: 복원된 활성 프로필의 규칙 (스냅샷이 없거나 다른 프로필이거나 저장 실패 시 None).
+        """
+        try:
+            profile, restored = self.snapshot_store.read(snapshot_id)
+        except Exception as e:
+            logging.error(f"Failed to read rule snapshot '{snapshot_id}': {e}", exc_info=True)
+            return None
+        current_config = self.load_config()
+        name = self.get_active_profile(current_config)
+        if profile != name:
+            logging.warning(f"Rule snapshot '{snapshot_id}' belongs to profile '{profile}', not the active profile '{name}'.")
+            return None
+        data = self._load_profile_data(name) if name != DEFAULT_PROFILE else current_config
+        self._snapshot(name, data, "before restore")
+        for section in RULE_SECTIONS:
+            data[section] = restored[section]
+        saved = self._save_profile_data(name, data) if name != DEFAULT_PROFILE else self.save_config(data)
+        if not saved:
+            return None
+        self._snapshot(name, data, f"restore {snapshot_id}")
+        logging.info(f"Restored rule profile '{name}' from snapshot '{snapshot_id}'.")
+        return self.load_rule_set()
+
+    def make_lazy_rules(self, rules_data: dict):
+        """
+        파싱된 전역 규칙 딕셔너리를 긴 본문만 blob 파일에 둔 RuleSet으로 변환합니다.
+        활성 프로필 파일이 마지막 변환 이후 바뀌지 않았으면 기존 blob 파일을 재사용합니다.
+        호출 측은 반환값만 보관하고 원본 딕셔너리는 버려야 메모리가 해제됩니다.
+
+        Args:
+            rules_data (dict): 키워드 -> 치환 텍스트.
+
+        Returns:
+            RuleSet: 키워드 -> 치환 텍스트 읽기 전용 매핑 (전역 규칙만 포함).
+        """
+        name = self.get_active_profile()
+        return self._profile_blob_store(name).load(rules_data, self.profile_path(name))
+
+    def load_rule_set(self, config: dict = None):
+        """
+        활성 프로필의 전역 규칙, 앱별 규칙, 규칙 그룹을 하나의 RuleSet으로 만듭니다.
+        RuleSet은 KeyboardListener와 GUI가 복사 없이 그대로 공유합니다.
+
+        Args:
+            config (dict): load_config() 결과. None이면 설정 파일에서 새로 로드합니다.
+                           전달된 config의 "rules"는 꺼내서 해제되도록 제거됩니다.
+
+        Returns:
+            RuleSet: 모든 규칙 섹션을 담은 규칙 집합.
+        """
+        if config is None:
+            config = self.load_config()
+        name = self.get_active_profile(config)
+        if name != DEFAULT_PROFILE:
+            config.pop("rules", None) # 기본 프로필 규칙은 사용하지 않으므로 바로 해제
+            return self.load_profile(name)
+        return self.load_profile(name, config)
+
+    def set_group_enabled(self, group_name: str, enabled: bool):
+        """
+        활성 프로필의 규칙 그룹 활성화 상태를 파일에 저장합니다.
+        다른 설정과 규칙은 유지됩니다.
+
+        Args:
+            group_name (str): 그룹 이름.
+            enabled (bool): 활성화 여부.
+
+        Returns:
+            bool: 저장 성공 여부 (그룹이 없으면 False).
+        """
+        current_config = self.load_config()
+        name = self.get_active_profile(current_config)
+        if name != DEFAULT_PROFILE:
+            current_config = self._load_profile_data(name)
+        group = current_config["groups"].get(group_name)
+        if group is None:
+            logging.warning(f"Rule group '{group_name}' not found in config. Nothing to save.")
+            return False
+        group["enabled"] = enabled
+        if name != DEFAULT_PROFILE:
+            return self._save_profile_data(name, current_config)
+        return self.save_config(current_config)
 
 if __name__ == '__main__':
     # 테스트용 코드
@@ -178,9 +537,40 @@ if __name__ == '__main__':
     assert loaded_corrupted_2["settings"]["start_on_boot"] == False # 기본값 복원 확인
     assert loaded_corrupted_2["settings"]["another_setting"] == True # 기존 설정 유지 확인
 
+    # 테스트 5: 프로필 전환 (활성 프로필만 로드, 최근 프로필은 캐시에서 재사용)
+    import shutil
+    cm_test.save_config(cm_test.get_default_config())
+    test_profile_path = cm_test.profile_path("test_support")
+    cm_test._save_profile_data("test_support", {"rules": {"!ty": "Thank you."}, "scoped_rules": {},
+                                                "groups": {"extra": {"rules": {"!bye": "Goodbye."}}}})
+    assert "test_support" in cm_test.list_profiles()
+    default_rules = cm_test.load_rule_set()
+    assert "!email" in default_rules and cm_test.get_active_profile() == "default"
+    support_rules = cm_test.switch_profile("test_support")
+    assert list(support_rules) == ["!ty"] and support_rules.group_configs()["extra"]["enabled"]
+    assert cm_test.load_rule_set() is support_rules # 파일이 바뀌지 않았으면 캐시 재사용
+    assert cm_test.save_rules({"!ty": "Thanks!", "!hi": "Hi."})
+    assert cm_test.load_rule_set()["!ty"] == "Thanks!" # 저장 후에는 다시 로드
+    assert "!ty" not in cm_test.load_config()["rules"] # 기본 프로필 규칙은 그대로
+    assert cm_test.switch_profile("default") is default_rules # 설정 저장만으로는 기본 프로필 캐시가 무효화되지 않음
+    assert cm_test.switch_profile("missing_profile") is None
+
+    # 테스트 6: 저장 이력 스냅샷과 복원 (settings 는 유지, 복원 직전 상태도 이력에 남음)
+    assert cm_test.save_rules({"!a": "first"})
+    assert cm_test.save_rules({"!a": "bad save"})
+    history = cm_test.list_snapshots()
+    assert history[0]["reason"] == "save" and all(snapshot["profile"] == "default" for snapshot in history)
+    good_id = next(snapshot["id"] for snapshot in history if cm_test.snapshot_store.read(snapshot["id"])[1]["rules"] == {"!a": "first"})
+    restored_rules = cm_test.restore_snapshot(good_id)
+    assert dict(restored_rules) == {"!a": "first"} and cm_test.load_config()["rules"] == {"!a": "first"}
+    assert cm_test.list_snapshots()[0]["reason"] == f"restore {good_id}"
+    assert cm_test.restore_snapshot("missing") is None
+    shutil.rmtree(cm_test.snapshot_store.directory, ignore_errors=True)
+
     # 테스트 종료 후 생성된 파일 삭제
     if os.path.exists(test_file_path):
         os.remove(test_file_path)
         print(f"\nRemoved test file: {test_file_path}")
+    shutil.rmtree(cm_test.profiles_dir, ignore_errors=True)
     
     print("\nConfigManager test finished.") 
\ No newline at end of file
@@ -1,18 +1,27 @@
 import sys
 import logging # logging 추가
 import os # <<< os 임포트 추가
-import winreg # <<< winreg 임포트 추가
+import time # 지표 스냅샷 파일명용
+import threading # 자동 교정 목록 백그라운드 로드용
+try:
+    import winreg # <<< winreg 임포트 추가
+except ImportError: # Windows 가 아니면 시작 프로그램 등록 없음 (offscreen 벤치마크 등)
+    winreg = None
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QLabel, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem, 
     QGroupBox, QFormLayout, QHeaderView, QStatusBar, QMessageBox, 
-    QSystemTrayIcon, QMenu, QAction, QStyle, QCheckBox # <<< QCheckBox 추가
+    QSystemTrayIcon, QMenu, QAction, QActionGroup, QStyle, QCheckBox, # <<< QCheckBox 추가
+    QDialog, QListWidget, QListWidgetItem, QDialogButtonBox
 )
-from PyQt5.QtCore import Qt, QSize # <<< QSize 추가
-from PyQt5.QtGui import QIcon # <<< 추가
+from PyQt5.QtCore import Qt, QSize, QTimer, QPoint, pyqtSignal # <<< QSize, QTimer 추가
+from PyQt5.QtGui import QIcon, QCursor # <<< 추가
+from rule_set import make_preview # 테이블 미리보기용
+from profile_capture import ProfileCapture # 트레이 메뉴 프로파일 캡처
+from rule_report import compile_rules # 저장 시 규칙 컴파일 보고서
 
 # keyboard_listener 모듈 임포트 (타입 힌트용)
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING, Dict, Mapping, Set
 if TYPE_CHECKING:
     from keyboard_listener import KeyboardListener 
     from config_manager import ConfigManager
@@ -30,16 +39,133 @@ def resource_path(relative_path):
 # +++ resource_path 함수 추가 끝 +++
 
 APP_NAME_FOR_REGISTRY = "TextReplacerPAAK" # 시작 프로그램 등록 시 사용할 앱 이름
+METRICS_REFRESH_INTERVAL_MS = 1000 # 상태 표시줄 지표 갱신 주기 (ms)
+PROFILE_CAPTURE_SECONDS = 10 # 트레이 메뉴 프로파일 캡처 시간 (초)
+
+# 규칙 테이블 열 인덱스
+COL_KEYWORD, COL_REPLACEMENT, COL_USES, COL_LAST_USED = range(4)
+# 키워드 항목에 저장하는 규칙 순서 (헤더 정렬로 표시 순서가 바뀌어도 저장 시 원래 우선순위를 유지)
+ROLE_RULE_ORDER = Qt.UserRole + 1
+
+class SortableTableItem(QTableWidgetItem):
+    """표시 텍스트 대신 UserRole 값으로 정렬하는 테이블 항목 (사용 횟수/마지막 사용 시각 열용)"""
+
+    def __init__(self, text, sort_key):
+        super().__init__(text)
+        self.setData(Qt.UserRole, sort_key)
+
+    def __lt__(self, other):
+        return self.data(Qt.UserRole) < other.data(Qt.UserRole)
+
+class SuggestionPopup(QWidget):
+    """키워드 접두사 추천을 입력 중인 캐럿(알 수 없으면 마우스 커서) 아래에 보여주는 작은 팝업 (포커스를 가져가지 않음)"""
+
+    # 추천 엔진 작업 스레드에서 emit -> Qt가 GUI 스레드로 전달 (queued connection)
+    suggestions_ready = pyqtSignal(str, list)
+
+    CURSOR_OFFSET = 16 # 마우스 커서와 팝업 사이 간격 (px)
+    CARET_OFFSET = 4 # 캐럿 아래쪽 끝과 팝업 사이 간격 (px)
+
+    def __init__(self, listener):
+        super().__init__(None, Qt.ToolTip | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.WindowDoesNotAcceptFocus)
+        self.listener = listener
+        self.setAttribute(Qt.WA_ShowWithoutActivating) # 입력 중인 앱의 포커스 유지
+        self.label = QLabel(self)
+        self.label.setTextFormat(Qt.PlainText)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 4, 6, 4)
+        layout.addWidget(self.label)
+        self.suggestions_ready.connect(self._show_suggestions)
+
+    def _show_suggestions(self, prefix, keywords):
+        if not keywords:
+            self.hide()
+            return
+        rules = self.listener.rules
+        preview = getattr(rules, "preview", None)
+        lines = []
+        for keyword in keywords:
+            if keyword not in rules:
+                continue # 추천 계산 이후 규칙이 바뀐 경우
+            lines.append(f"{keyword}  →  {preview(keyword) if preview else make_preview(rules[keyword])}")
+        if not lines:
+            self.hide()
+            return
+        accept_key = getattr(self.listener.suggestion_accept_key, "name", str(self.listener.suggestion_accept_key))
+        lines.append(f"[{accept_key.upper()}] expand '{keywords[0]}'")
+        self.label.setText("\n".join(lines))
+        self.adjustSize()
+        self.move(self._anchor_position())
+        self.show()
+        logging.debug(f"[SUGGEST] Showing {len(keywords)} suggestion(s) for prefix '{prefix}'.")
+
+    def _anchor_position(self):
+        """팝업 위치: 포커스된 앱의 텍스트 캐럿 바로 아래, 캐럿을 알 수 없으면 마우스 커서 옆."""
+        provider = getattr(self.listener, "window_provider", None)
+        caret = provider.get_caret_position() if provider is not None else None
+        if caret is None:
+            return QCursor.pos() + QPoint(self.CURSOR_OFFSET, self.CURSOR_OFFSET)
+        # Win32 좌표는 물리 픽셀이므로 고DPI 배율로 나눠 Qt 논리 좌표로 변환
+        screen = QApplication.screenAt(QCursor.pos()) or QApplication.primaryScreen()
+        ratio = screen.devicePixelRatio() if screen is not None else 1.0
+        return QPoint(round(caret[0] / ratio), round(caret[1] / ratio) + self.CARET_OFFSET)
+
+class SnapshotHistoryDialog(QDialog):
+    """저장 이력(규칙 스냅샷) 목록을 보여주고 복원할 스냅샷을 고르는 대화 상자"""
+
+    def __init__(self, snapshots, parent=None):
+        """
+        Args:
+            snapshots (list[dict]): ConfigManager.list_snapshots() 결과 (최신순).
+        """
+        super().__init__(parent)
+        self.setWindowTitle("Rule History")
+        self.resize(480, 360)
+        self.selected_snapshot_id = None
+        self.snapshot_list = QListWidget()
+        for snapshot in snapshots:
+            created = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot["created"]))
+            item = QListWidgetItem(f"{created}  |  {snapshot['rule_count']} rules  |  {snapshot['reason']}")
+            item.setData(Qt.UserRole, snapshot["id"])
+            self.snapshot_list.addItem(item)
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Cancel)
+        self.restore_button = self.buttons.addButton("Restore", QDialogButtonBox.AcceptRole)
+        self.restore_button.setEnabled(False)
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Each save keeps the rules before and after it. Restoring also keeps the current rules in the history."))
+        layout.addWidget(self.snapshot_list)
+        layout.addWidget(self.buttons)
+        self.snapshot_list.itemSelectionChanged.connect(lambda: self.restore_button.setEnabled(bool(self.snapshot_list.selectedItems())))
+        self.snapshot_list.itemDoubleClicked.connect(lambda item: self.accept())
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+
+    def accept(self):
+        items = self.snapshot_list.selectedItems()
+        if not items:
+            return
+        self.selected_snapshot_id = items[0].data(Qt.UserRole)
+        super().accept()
 
 class TextReplacerSettingsWindow(QMainWindow):
     """텍스트 치환 설정 GUI 메인 윈도우 클래스"""
+    # 두 번째 실행이 IPC로 전달한 명령 (IPC 스레드에서 emit -> GUI 스레드에서 처리)
+    instance_command_received = pyqtSignal(str, list)
+    # 자동 교정 목록 로드 스레드에서 emit (로드 번호, 그래프) -> GUI 스레드에서 리스너에 반영
+    autocorrect_loaded = pyqtSignal(int, object)
     # def __init__(self): # 이전 시그니처
-    def __init__(self, keyboard_listener: 'KeyboardListener', config_manager: 'ConfigManager', initial_rules: Dict[str, str], start_on_boot_setting: bool): 
+    def __init__(self, keyboard_listener: 'KeyboardListener', config_manager: 'ConfigManager', initial_rules: Mapping[str, str], start_on_boot_setting: bool): 
         super().__init__()
         self.listener = keyboard_listener # 리스너 인스턴스 저장
         self.config_manager = config_manager # ConfigManager 인스턴스 저장
         self.rules_changed_since_last_save = False # <<< 변경 감지 플래그 추가
         self.start_on_boot_setting = start_on_boot_setting # <<< 초기 설정값 저장
+        self._rule_source = {} # 테이블 행의 본문을 읽어올 원본 규칙 매핑 (지연 로드 매핑일 수 있음)
+        self._next_rule_order = 0 # 새로 추가하는 규칙에 부여할 순서 (항상 기존 규칙 뒤)
+        self._autocorrect_load_number = 0 # 가장 최근에 시작한 자동 교정 목록 로드 번호
+        self.profile_capture = None # 진행 중이거나 마지막으로 실행한 프로파일 캡처
+        self.last_compile_report = None # 마지막 "Save All Rules" 의 규칙 컴파일 보고서
+        self.suggestion_popup = None # 접두사 추천 팝업 (리스너에 추천 엔진이 있을 때만)
 
         self.setWindowTitle("TextReplacerPAAK")
         # self.setGeometry(100, 100, 600, 400) # 이전 코드 주석 처리
@@ -74,9 +200,15 @@ class TextReplacerSettingsWindow(QMainWindow):
         self.rules_changed_since_last_save = False # 초기 로드 후 플래그 리셋
 
         self._connect_signals()
+        self._create_suggestion_popup()
         self._update_status_bar() # 리스너 상태 표시
         self._on_rule_selection_changed() # 초기 버튼 상태 설정
 
+        # 리스너 지표를 주기적으로 상태 표시줄에 반영 (창이 보일 때만 갱신)
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self._on_metrics_timer)
+        self.metrics_timer.start(METRICS_REFRESH_INTERVAL_MS)
+
         # <<< 프로그램 시작 시 현재 설정에 맞게 레지스트리 상태 동기화 >>>
         self._update_startup_registry(self.start_on_boot_setting)
         logging.info(f"Initial 'Start on Boot' registry status updated to: {self.start_on_boot_setting}")
@@ -109,9 +241,12 @@ class TextReplacerSettingsWindow(QMainWindow):
         layout = QVBoxLayout()
 
         self.rules_table = QTableWidget()
-        self.rules_table.setColumnCount(2)
-        self.rules_table.setHorizontalHeaderLabels(["Keyword", "Replacement Text"])
-        self.rules_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.rules_table.setColumnCount(4)
+        self.rules_table.setHorizontalHeaderLabels(["Keyword", "Replacement Text", "Uses", "Last Used"])
+        self.rules_table.horizontalHeader().setSectionResizeMode(COL_REPLACEMENT, QHeaderView.Stretch)
+        self.rules_table.horizontalHeader().setSectionResizeMode(COL_USES, QHeaderView.ResizeToContents)
+        self.rules_table.horizontalHeader().setSectionResizeMode(COL_LAST_USED, QHeaderView.ResizeToContents)
+        self.rules_table.setSortingEnabled(True) # 헤더 클릭으로 정렬 (사용 횟수 등)
         self.rules_table.setSelectionBehavior(QTableWidget.SelectRows)
         self.rules_table.setSelectionMode(QTableWidget.SingleSelection)
         self.rules_table.setEditTriggers(QTableWidget.NoEditTriggers) # 직접 수정 불가
@@ -127,6 +262,7 @@ class TextReplacerSettingsWindow(QMainWindow):
 
         self.delete_button = QPushButton("Delete Selected Rule")
         self.save_all_button = QPushButton("Save All Rules") # 저장 버튼
+        self.history_button = QPushButton("History...") # 저장 이력 보기/복원
         self.close_button = QPushButton("Hide Window") # <<< 버튼 텍스트 변경
 
         self.delete_button.setEnabled(False) # 초기 비활성화
@@ -134,6 +270,7 @@ class TextReplacerSettingsWindow(QMainWindow):
         layout.addWidget(self.delete_button)
         layout.addStretch()
         layout.addWidget(self.save_all_button)
+        layout.addWidget(self.history_button)
         layout.addWidget(self.close_button)
 
         group_box.setLayout(layout)
@@ -151,6 +288,10 @@ class TextReplacerSettingsWindow(QMainWindow):
         # 선택된 규칙 표시 레이블 (왼쪽, 상태 메시지 다음)
         self.selected_rule_label = QLabel("")
         self.statusBar.addWidget(self.selected_rule_label) 
+
+        # 리스너 런타임 지표 레이블 (키 수, 치환 수, 매칭/치환 시간)
+        self.metrics_label = QLabel("")
+        self.statusBar.addWidget(self.metrics_label)
         
         # 오른쪽 정렬될 위젯들
         # <<< Start on Boot 체크박스 생성 >>>
@@ -190,12 +331,41 @@ class TextReplacerSettingsWindow(QMainWindow):
         # 트레이 메뉴 생성
         tray_menu = QMenu()
         show_action = QAction("Settings", self)
+        export_metrics_action = QAction("Export Metrics (JSON)", self)
+        self.capture_profile_action = QAction(f"Capture Profile ({PROFILE_CAPTURE_SECONDS}s)", self)
         quit_action = QAction("Exit", self)
 
         show_action.triggered.connect(self.show_window) # 설정 메뉴 연결
+        export_metrics_action.triggered.connect(self._export_metrics) # 지표 내보내기 연결
+        self.capture_profile_action.triggered.connect(self._capture_profile) # 프로파일 캡처 연결
         quit_action.triggered.connect(self.quit_app)   # 종료 메뉴 연결
 
         tray_menu.addAction(show_action)
+        tray_menu.addAction(export_metrics_action)
+        tray_menu.addAction(self.capture_profile_action)
+
+        # 규칙 프로필 전환 서브메뉴 (기본 프로필 외의 프로필이 있을 때만)
+        self.profile_actions = {}
+        list_profiles = getattr(self.config_manager, "list_profiles", None)
+        profile_names = list_profiles() if list_profiles else []
+        if len(profile_names) > 1:
+            profiles_menu = tray_menu.addMenu("Profiles")
+            profile_group = QActionGroup(self)
+            profile_group.setExclusive(True)
+            active_profile = self.config_manager.get_active_profile()
+            for profile_name in profile_names:
+                profile_action = QAction(profile_name, self, checkable=True)
+                profile_action.setChecked(profile_name == active_profile)
+                profile_action.triggered.connect(lambda checked, name=profile_name: self._on_profile_selected(name))
+                profile_group.addAction(profile_action)
+                profiles_menu.addAction(profile_action)
+                self.profile_actions[profile_name] = profile_action
+        self.active_profile = next((name for name, action in self.profile_actions.items() if action.isChecked()), None)
+
+        # 규칙 그룹 켜기/끄기 서브메뉴 (그룹이 있을 때만 표시)
+        self.groups_menu = tray_menu.addMenu("Rule Groups")
+        self._populate_groups_menu()
+
         tray_menu.addSeparator()
         tray_menu.addAction(quit_action)
 
@@ -210,12 +380,25 @@ class TextReplacerSettingsWindow(QMainWindow):
         # 첫 실행 시 간단한 메시지 표시 (선택적)
         # self.tray_icon.showMessage("TextReplacerPAAK", "Application started.", self.app_icon, 2000)
 
+    def _create_suggestion_popup(self):
+        """리스너에 추천 엔진이 있으면 추천 결과를 팝업으로 표시하도록 연결합니다."""
+        suggestions = getattr(self.listener, "suggestions", None)
+        if suggestions is None:
+            return
+        self.suggestion_popup = SuggestionPopup(self.listener)
+        suggestions.callback = self.suggestion_popup.suggestions_ready.emit
+        logging.info("Suggestion popup connected to the suggestion engine.")
+
     def _update_status_bar(self):
         """상태 표시줄을 업데이트합니다."""
         if self.listener and self.listener.is_running():
             status = "Listener Running"
         else:
             status = "Listener Stopped"
+        # 훅 감시로 다시 시작된 횟수 (훅 프로세스 모드의 프로세스 재시작 포함, 훅 재시작은 지표 요약에 표시)
+        process_restarts = getattr(self.listener, "restart_count", 0)
+        if process_restarts:
+            status += f" (hook process restarted {process_restarts}x)"
         
         selected_item = self.rules_table.currentItem()
         if selected_item:
@@ -230,6 +413,166 @@ class TextReplacerSettingsWindow(QMainWindow):
             
         self.status_label.setText(status)
 
+        # 리스너 지표 요약 (Mock 리스너 등 지표가 없는 경우 비움)
+        metrics = getattr(self.listener, "metrics", None)
+        self.metrics_label.setText(metrics.summary_text() if metrics else "")
+
+    def _populate_groups_menu(self):
+        """리스너의 현재 규칙 그룹으로 트레이의 그룹 서브메뉴를 다시 채웁니다."""
+        self.groups_menu.clear()
+        self.group_actions = {}
+        group_names = list(getattr(self.listener, "groups", {}).keys())
+        for group_name in group_names:
+            group_action = QAction(group_name, self, checkable=True)
+            group_action.setChecked(self.listener.is_group_enabled(group_name))
+            group_action.toggled.connect(lambda checked, name=group_name: self._on_group_toggled(name, checked))
+            self.groups_menu.addAction(group_action)
+            self.group_actions[group_name] = group_action
+        self.groups_menu.menuAction().setVisible(bool(group_names))
+
+    def _on_profile_selected(self, profile_name):
+        """트레이 메뉴에서 규칙 프로필을 선택했을 때 호출됩니다 (최근 프로필은 캐시된 컴파일 결과로 즉시 전환)."""
+        if profile_name == self.active_profile:
+            return
+        if self.rules_changed_since_last_save:
+            reply = QMessageBox.question(self, 'Unsaved Changes',
+                                         f"Discard unsaved rule changes and switch to profile '{profile_name}'?",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                self.profile_actions[self.active_profile].setChecked(True) # 선택 되돌리기
+                return
+
+        started = time.perf_counter()
+        rule_set = self.config_manager.switch_profile(profile_name)
+        if rule_set is None:
+            self.profile_actions[self.active_profile].setChecked(True)
+            self.tray_icon.showMessage("TextReplacerPAAK", f"Failed to switch to profile '{profile_name}'.", self.app_icon, 3000)
+            return
+        self.listener.update_rules(rule_set, rule_set.scope_views())
+        self.listener.update_groups(rule_set.group_configs())
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logging.info(f"Switched to rule profile '{profile_name}' in {elapsed_ms:.2f} ms. Rules: {len(rule_set)}")
+
+        self.active_profile = profile_name
+        self.profile_actions[profile_name].setChecked(True)
+        self._load_rules_into_table(rule_set)
+        self.rules_changed_since_last_save = False
+        self._populate_groups_menu()
+        self.statusBar.showMessage(f"Switched to rule profile '{profile_name}'.", 3000)
+        self._update_status_bar()
+
+    def _on_instance_command(self, command, args):
+        """두 번째 실행에서 전달된 명령(창 표시, 규칙 재로드, 프로필 전환)을 처리합니다."""
+        logging.info(f"Handling command '{command}' {args} forwarded from another launch.")
+        if command == "show":
+            self.show_window()
+        elif command == "reload":
+            self.reload_rules()
+        elif command == "profile":
+            profile_name = args[0]
+            if profile_name not in self.profile_actions:
+                logging.warning(f"Forwarded profile '{profile_name}' is not in the Profiles menu. Ignoring it.")
+                self.tray_icon.showMessage("TextReplacerPAAK", f"Rule profile '{profile_name}' not found.", self.app_icon, 3000)
+                return
+            self._on_profile_selected(profile_name)
+        else:
+            logging.warning(f"Unknown forwarded command '{command}'. Ignoring it.")
+
+    def reload_rules(self):
+        """설정 파일을 다시 읽어 리스너 규칙을 교체합니다 (저장하지 않은 편집이 있으면 테이블은 그대로 유지)."""
+        config = self.config_manager.load_config()
+        rule_set = self.config_manager.load_rule_set(config)
+        self.listener.update_rules(rule_set, rule_set.scope_views())
+        self.listener.update_groups(rule_set.group_configs())
+        self.load_autocorrect_in_background(config)
+        self._populate_groups_menu()
+        if self.rules_changed_since_last_save:
+            self.statusBar.showMessage("Rules reloaded from file. Unsaved edits in the table were kept.", 5000)
+        else:
+            self._load_rules_into_table(rule_set)
+            self.rules_changed_since_last_save = False
+            self.statusBar.showMessage("Rules reloaded from file.", 3000)
+        logging.info(f"Rules reloaded from '{self.config_manager.config_file_path}'. Count: {len(rule_set)}")
+        self._update_status_bar()
+
+    def load_autocorrect_in_background(self, config):
+        """
+        자동 교정 목록을 백그라운드 스레드에서 로드합니다 (큰 목록은 다시 빌드하는 데 수십 초 걸릴 수 있음).
+        시작 시와 규칙 다시 읽기 때 모두 사용하며, 로드가 끝나기 전까지 리스너는 이전 목록(시작 시에는 없음)으로 동작합니다.
+        """
+        self._autocorrect_load_number += 1
+        load_number = self._autocorrect_load_number
+        previous = getattr(self.listener, "autocorrect", None)
+        def load():
+            graph = self.config_manager.load_autocorrect(config, previous=previous)
+            self.autocorrect_loaded.emit(load_number, graph)
+        threading.Thread(target=load, daemon=True, name="AutocorrectLoadThread").start()
+
+    def _on_autocorrect_loaded(self, load_number, graph):
+        """자동 교정 목록 로드가 끝났을 때 호출됩니다 (더 나중에 요청된 로드가 있으면 무시)."""
+        if load_number != self._autocorrect_load_number:
+            return
+        if graph is not getattr(self.listener, "autocorrect", None):
+            self.listener.update_autocorrect(graph)
+
+    def _on_group_toggled(self, group_name, enabled):
+        """트레이 메뉴에서 규칙 그룹을 켜거나 껐을 때 호출됩니다 (리스너 즉시 반영 후 설정 저장)."""
+        started = time.perf_counter()
+        self.listener.set_group_enabled(group_name, enabled)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logging.info(f"Rule group '{group_name}' toggled to {enabled} in {elapsed_ms:.2f} ms.")
+
+        if not self.config_manager.set_group_enabled(group_name, enabled):
+            logging.error(f"Failed to save enabled state of rule group '{group_name}'.")
+            self.tray_icon.showMessage("TextReplacerPAAK", f"Failed to save rule group '{group_name}' state.", self.app_icon, 3000)
+            return
+        self.statusBar.showMessage(f"Rule group '{group_name}' {'enabled' if enabled else 'disabled'}.", 3000)
+
+    def _on_metrics_timer(self):
+        """지표 갱신 타이머 슬롯. 창이 숨겨져 있으면 아무것도 하지 않습니다."""
+        if self.isVisible():
+            self._update_status_bar()
+
+    def _export_metrics(self):
+        """현재 리스너 지표 스냅샷을 설정 디렉토리에 JSON 파일로 저장합니다."""
+        metrics = getattr(self.listener, "metrics", None)
+        if metrics is None:
+            logging.warning("Metrics export requested, but listener has no metrics.")
+            return
+        base_dir = getattr(self.config_manager, "app_config_dir", ".")
+        file_path = os.path.join(base_dir, f"metrics_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        try:
+            metrics.dump_json(file_path)
+            logging.info(f"Metrics snapshot exported to '{file_path}'.")
+            self.tray_icon.showMessage("TextReplacerPAAK", f"Metrics saved to {file_path}", self.app_icon, 3000)
+        except Exception as e:
+            logging.error(f"Failed to export metrics to '{file_path}': {e}", exc_info=True)
+            QMessageBox.critical(self, "Export Error", "Failed to export metrics. Check logs for details.")
+
+    def _capture_profile(self):
+        """스택 샘플, tracemalloc 스냅샷, 훅 지연 시간을 PROFILE_CAPTURE_SECONDS 동안 기록합니다 (백그라운드)."""
+        if self.profile_capture is not None and self.profile_capture.is_running():
+            logging.warning("Profile capture requested, but a capture is already running.")
+            return
+        base_dir = getattr(self.config_manager, "app_config_dir", ".")
+        self.profile_capture = ProfileCapture(base_dir, listener=self.listener, duration=PROFILE_CAPTURE_SECONDS)
+        self.profile_capture.start()
+        self.capture_profile_action.setEnabled(False)
+        self.tray_icon.showMessage("TextReplacerPAAK", f"Capturing profile for {PROFILE_CAPTURE_SECONDS} seconds...", self.app_icon, 2000)
+        QTimer.singleShot(PROFILE_CAPTURE_SECONDS * 1000, self._check_profile_capture)
+
+    def _check_profile_capture(self):
+        """프로파일 캡처 완료 여부를 확인하고, 끝났으면 결과를 알립니다 (아직이면 잠시 후 다시 확인)."""
+        capture = self.profile_capture
+        if capture.is_running():
+            QTimer.singleShot(250, self._check_profile_capture)
+            return
+        self.capture_profile_action.setEnabled(True)
+        if capture.error is not None:
+            QMessageBox.critical(self, "Profile Error", "Failed to capture profile. Check logs for details.")
+            return
+        self.tray_icon.showMessage("TextReplacerPAAK", f"Profile saved to {capture.bundle_path}", self.app_icon, 3000)
+
     def _connect_signals(self):
         """위젯 시그널을 슬롯 메서드에 연결합니다."""
         logging.debug("Connecting GUI signals.")
@@ -238,20 +581,87 @@ class TextReplacerSettingsWindow(QMainWindow):
         self.edit_button.clicked.connect(self._edit_rule) # 수정 버튼 연결
         self.delete_button.clicked.connect(self._delete_rule)
         self.save_all_button.clicked.connect(self._save_all_rules) # 저장 버튼 연결
+        self.history_button.clicked.connect(self._show_history) # 이력 버튼 연결
         self.close_button.clicked.connect(self.hide) # <<< Hide Window 버튼 -> 창 숨기기
+        self.instance_command_received.connect(self._on_instance_command)
+        self.autocorrect_loaded.connect(self._on_autocorrect_loaded)
         # 키워드 입력 변경 시 버튼 상태 업데이트 등 추가 가능
         # self.tray_icon.activated 시그널은 _create_tray_icon 에서 연결
 
-    def _load_rules_into_table(self, rules: Dict[str, str]):
-        """주어진 규칙 딕셔너리를 테이블 위젯에 로드합니다."""
+    def _load_rules_into_table(self, rules: Mapping[str, str]):
+        """
+        주어진 규칙 매핑을 테이블 위젯에 로드합니다.
+        테이블에는 본문 미리보기만 넣고, 전체 본문은 필요할 때 원본 매핑에서 읽습니다.
+        """
+        self._rule_source = rules
+        self.rules_table.setSortingEnabled(False) # 행을 채우는 동안 정렬로 행이 이동하지 않도록 비활성화
         self.rules_table.setRowCount(0) # 기존 행 모두 삭제
         self.rules_table.setRowCount(len(rules))
         row = 0
-        for keyword, replacement in rules.items():
-            self.rules_table.setItem(row, 0, QTableWidgetItem(keyword))
-            self.rules_table.setItem(row, 1, QTableWidgetItem(replacement))
+        for keyword in rules:
+            self._fill_rule_row(row, keyword, row, source_keyword=keyword)
             row += 1
+        self._next_rule_order = row
+        self.rules_table.setSortingEnabled(True)
         logging.info(f"Loaded {len(rules)} rules into table.")
+
+    def _fill_rule_row(self, row: int, keyword: str, order: int, source_keyword: str = None, replacement: str = None):
+        """
+        테이블의 한 행에 규칙과 사용 통계를 채웁니다. 호출 측에서 정렬을 비활성화해야 합니다.
+
+        Args:
+            row (int): 행 번호 (현재 표시 순서).
+            keyword (str): 표시할 키워드.
+            order (int): 규칙 순서 (먼저 일치하는 규칙이 이기므로 저장할 때 이 순서를 따름).
+            source_keyword (str): 본문을 읽어올 원본 규칙의 키워드 (새로 추가된 행은 None).
+            replacement (str): 새로 입력된 본문. None이면 원본 규칙의 본문을 사용합니다.
+        """
+        keyword_item = QTableWidgetItem(keyword)
+        keyword_item.setData(Qt.UserRole, source_keyword)
+        keyword_item.setData(ROLE_RULE_ORDER, order)
+        if replacement is None:
+            preview = getattr(self._rule_source, "preview", None)
+            preview_text = preview(source_keyword) if preview else make_preview(self._rule_source[source_keyword])
+        else:
+            preview_text = make_preview(replacement)
+        replacement_item = QTableWidgetItem(preview_text)
+        replacement_item.setData(Qt.UserRole, replacement) # 편집된 본문만 보관
+        self.rules_table.setItem(row, COL_KEYWORD, keyword_item)
+        self.rules_table.setItem(row, COL_REPLACEMENT, replacement_item)
+        self._fill_usage_cells(row, keyword)
+
+    def _replacement_for_row(self, row: int) -> str:
+        """행의 전체 본문을 반환합니다 (편집된 본문이 없으면 원본 매핑에서 읽음)."""
+        replacement = self.rules_table.item(row, COL_REPLACEMENT).data(Qt.UserRole)
+        if replacement is not None:
+            return replacement
+        return self._rule_source[self.rules_table.item(row, COL_KEYWORD).data(Qt.UserRole)]
+
+    def _get_current_keywords(self) -> Set[str]:
+        """현재 테이블의 키워드 집합을 반환합니다 (본문을 읽지 않음)."""
+        keywords = set()
+        for row in range(self.rules_table.rowCount()):
+            keyword_item = self.rules_table.item(row, COL_KEYWORD)
+            if keyword_item:
+                keywords.add(keyword_item.text())
+        return keywords
+
+    def _fill_usage_cells(self, row: int, keyword: str):
+        """행의 사용 횟수/마지막 사용 시각 열을 채웁니다 (통계가 없으면 0 / 빈칸)."""
+        usage_stats = getattr(self.listener, "usage_stats", None)
+        count, last_used = usage_stats.get(keyword) if usage_stats is not None else (0, None)
+        last_used_text = time.strftime("%Y-%m-%d %H:%M", time.localtime(last_used)) if last_used else ""
+        self.rules_table.setItem(row, COL_USES, SortableTableItem(str(count), count))
+        self.rules_table.setItem(row, COL_LAST_USED, SortableTableItem(last_used_text, last_used or 0.0))
+
+    def _refresh_usage_columns(self):
+        """모든 행의 사용 통계 열을 최신 값으로 갱신합니다."""
+        self.rules_table.setSortingEnabled(False)
+        for row in range(self.rules_table.rowCount()):
+            keyword_item = self.rules_table.item(row, COL_KEYWORD)
+            if keyword_item:
+                self._fill_usage_cells(row, keyword_item.text())
+        self.rules_table.setSortingEnabled(True)
         # self.rules_changed_since_last_save = False # 로드 후 플래그 리셋은 __init__에서
 
     def _on_rule_selection_changed(self):
@@ -265,7 +675,7 @@ class TextReplacerSettingsWindow(QMainWindow):
         if is_selected:
             selected_row = self.rules_table.currentRow()
             keyword = self.rules_table.item(selected_row, 0).text()
-            replacement = self.rules_table.item(selected_row, 1).text()
+            replacement = self._replacement_for_row(selected_row) # 편집기에 표시할 때만 전체 본문 읽기
             self.keyword_input.setText(keyword)
             self.replacement_input.setText(replacement)
             self.selected_rule_label.setText(f"Selected: {keyword}") # 선택된 규칙 레이블 업데이트
@@ -279,13 +689,20 @@ class TextReplacerSettingsWindow(QMainWindow):
         self._update_status_bar()
 
     def _get_current_rules_from_table(self) -> Dict[str, str]:
-        """현재 테이블 위젯의 모든 규칙을 딕셔너리로 반환합니다."""
-        rules = {}
+        """
+        현재 테이블 위젯의 모든 규칙을 딕셔너리로 반환합니다.
+        표시 순서(헤더 정렬)가 아니라 규칙 순서대로 만들어 일치 우선순위가 바뀌지 않게 합니다.
+        """
+        ordered_rows = []
         for row in range(self.rules_table.rowCount()):
             keyword_item = self.rules_table.item(row, 0)
             replacement_item = self.rules_table.item(row, 1)
             if keyword_item and replacement_item: # 항목이 실제로 존재하는지 확인
-                rules[keyword_item.text()] = replacement_item.text()
+                ordered_rows.append((keyword_item.data(ROLE_RULE_ORDER), row))
+        ordered_rows.sort()
+        rules = {}
+        for _, row in ordered_rows:
+            rules[self.rules_table.item(row, 0).text()] = self._replacement_for_row(row)
         return rules
 
     def _add_rule(self):
@@ -298,16 +715,17 @@ class TextReplacerSettingsWindow(QMainWindow):
             return
 
         # 현재 테이블에서 키워드 중복 확인
-        current_rules = self._get_current_rules_from_table()
-        if keyword in current_rules:
+        if keyword in self._get_current_keywords():
             QMessageBox.warning(self, "Duplicate Keyword", f"The keyword '{keyword}' already exists.")
             return
 
         # 테이블에 행 추가
         row_count = self.rules_table.rowCount()
+        self.rules_table.setSortingEnabled(False)
         self.rules_table.insertRow(row_count)
-        self.rules_table.setItem(row_count, 0, QTableWidgetItem(keyword))
-        self.rules_table.setItem(row_count, 1, QTableWidgetItem(replacement))
+        self._fill_rule_row(row_count, keyword, self._next_rule_order, replacement=replacement)
+        self._next_rule_order += 1
+        self.rules_table.setSortingEnabled(True)
         logging.info(f"Rule added to table: '{keyword}' -> '{replacement[:20]}...'")
         self.rules_changed_since_last_save = True # <<< 플래그 설정
 
@@ -335,18 +753,22 @@ class TextReplacerSettingsWindow(QMainWindow):
             return
 
         # 현재 테이블에서 키워드 중복 확인 (자기 자신 제외)
-        current_rules = self._get_current_rules_from_table()
-        if new_keyword != original_keyword and new_keyword in current_rules:
+        if new_keyword != original_keyword and new_keyword in self._get_current_keywords():
             QMessageBox.warning(self, "Duplicate Keyword", f"The keyword '{new_keyword}' already exists.")
             return
             
         # 테이블 업데이트 (변경 확인 후 플래그 설정)
         keyword_changed = (self.rules_table.item(selected_row, 0).text() != new_keyword)
-        replacement_changed = (self.rules_table.item(selected_row, 1).text() != new_replacement)
+        replacement_changed = (self._replacement_for_row(selected_row) != new_replacement)
         
         if keyword_changed or replacement_changed:
-            self.rules_table.setItem(selected_row, 0, QTableWidgetItem(new_keyword))
-            self.rules_table.setItem(selected_row, 1, QTableWidgetItem(new_replacement))
+            source_keyword = self.rules_table.item(selected_row, 0).data(Qt.UserRole)
+            order = self.rules_table.item(selected_row, 0).data(ROLE_RULE_ORDER) # 수정해도 우선순위 유지
+            # 본문이 바뀌지 않았으면 기존 편집 본문(또는 원본 참조)을 그대로 유지
+            replacement = new_replacement if replacement_changed else self.rules_table.item(selected_row, 1).data(Qt.UserRole)
+            self.rules_table.setSortingEnabled(False)
+            self._fill_rule_row(selected_row, new_keyword, order, source_keyword, replacement)
+            self.rules_table.setSortingEnabled(True)
             logging.info(f"Rule updated in table: '{original_keyword}' -> '{new_keyword}' = '{new_replacement[:20]}...'")
             self.rules_changed_since_last_save = True # <<< 플래그 설정
         else:
@@ -389,18 +811,34 @@ class TextReplacerSettingsWindow(QMainWindow):
             self._update_status_bar() # 변경 상태 반영
 
     def _save_all_rules(self):
-        """현재 테이블의 모든 규칙을 파일에 저장하고 리스너를 업데이트합니다."""
+        """현재 테이블의 모든 규칙을 검사/컴파일한 뒤 파일에 저장하고 리스너를 업데이트합니다."""
         current_rules = self._get_current_rules_from_table()
-        
+
+        # 저장 전에 리스너와 같은 방식으로 컴파일해 비용을 보고하고, 매칭 엔진에서 동작할 수 없는 규칙이 있으면 중단
+        report = compile_rules(current_rules)
+        self.last_compile_report = report
+        if not report.ok:
+            error_box = QMessageBox(QMessageBox.Critical, "Invalid Rules",
+                                    f"{len(report.errors)} rule(s) cannot work and nothing was saved. "
+                                    f"First: '{report.errors[0][0]}' - {report.errors[0][1]}", QMessageBox.Ok, self)
+            error_box.setDetailedText(report.details_text())
+            error_box.exec_()
+            self.statusBar.showMessage(report.summary_text(), 5000)
+            return False
+
         save_success = self.config_manager.save_rules(current_rules)
         
         if save_success:
+            # 긴 본문은 blob 파일로 분리한 매핑으로 교체 (저장용으로 모은 전체 본문은 해제)
+            current_rules = self.config_manager.make_lazy_rules(current_rules)
             # 리스너에게도 변경된 규칙 알림
             self.listener.update_rules(current_rules)
+            self._load_rules_into_table(current_rules) # 편집된 본문 대신 새 매핑을 참조하도록 다시 로드
             self.rules_changed_since_last_save = False # <<< 저장 성공 시 플래그 리셋
-            self.statusBar.showMessage("All rules saved successfully!", 3000)
-            logging.info("All rules saved and listener updated.")
+            self.statusBar.showMessage(f"All rules saved. {report.summary_text()}", 10000)
+            logging.info(f"All rules saved and listener updated.\n{report.details_text()}")
             self._update_status_bar() # 상태 표시줄 업데이트
+            self.status_label.setToolTip(report.details_text()) # 상태 표시줄에 마우스를 올리면 상세 보고서
             return True # 저장 성공
         else:
             QMessageBox.critical(self, "Save Error", "Failed to save rules to the file. Check logs for details.")
@@ -408,6 +846,33 @@ class TextReplacerSettingsWindow(QMainWindow):
             self._update_status_bar() # 상태 표시줄 업데이트 (실패 상태 유지)
             return False # 저장 실패
 
+    def _show_history(self):
+        """저장 이력 창을 열고, 고른 스냅샷으로 활성 프로필 규칙을 복원해 리스너에 바로 반영합니다."""
+        dialog = SnapshotHistoryDialog(self.config_manager.list_snapshots(), self)
+        if dialog.exec_() != QDialog.Accepted or dialog.selected_snapshot_id is None:
+            return
+        if self.rules_changed_since_last_save:
+            reply = QMessageBox.question(self, 'Unsaved Changes', "Discard unsaved rule changes and restore the selected version?",
+                                         QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                return
+
+        started = time.perf_counter()
+        rule_set = self.config_manager.restore_snapshot(dialog.selected_snapshot_id)
+        if rule_set is None:
+            QMessageBox.critical(self, "Restore Error", "Failed to restore the selected version. Check logs for details.")
+            return
+        self.listener.update_rules(rule_set, rule_set.scope_views())
+        self.listener.update_groups(rule_set.group_configs())
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logging.info(f"Restored rules from snapshot '{dialog.selected_snapshot_id}' in {elapsed_ms:.2f} ms. Rules: {len(rule_set)}")
+
+        self._load_rules_into_table(rule_set)
+        self.rules_changed_since_last_save = False
+        self._populate_groups_menu()
+        self.statusBar.showMessage(f"Restored {len(rule_set)} rules from history.", 5000)
+        self._update_status_bar()
+
     # <<< 트레이 아이콘 관련 슬롯 추가 >>>
     def _on_tray_icon_activated(self, reason):
         """트레이 아이콘 활성화 시 호출 (예: 클릭)"""
@@ -418,6 +883,7 @@ class TextReplacerSettingsWindow(QMainWindow):
     def show_window(self):
         """설정 창을 보여주고 활성화합니다."""
         if self.isHidden() or self.isMinimized():
+            self._refresh_usage_columns() # 숨겨진 동안 바뀐 사용 통계 반영
             self.showNormal() # 최소화/숨김 상태면 보통 크기로 표시
         self.raise_() # 다른 창 위로 올림
         self.activateWindow() # 창 활성화
@@ -492,6 +958,9 @@ class TextReplacerSettingsWindow(QMainWindow):
         Returns:
             bool: 작업 성공 여부.
         """
+        if winreg is None:
+            logging.info("Startup registry is not available on this platform. Skipping startup registration.")
+            return False
         registry_key_path = r"Software\Microsoft\Windows\CurrentVersion\Run"
         try:
             # 실행 파일 경로 가져오기 (PyInstaller로 빌드된 경우 포함)
@@ -530,7 +999,7 @@ if __name__ == '__main__':
     
     # 테스트를 위한 Mock 객체 또는 실제 객체 생성 필요
     class MockListener: rules = {"!t1": "test1", "!t2": "test2"}; is_running=lambda:True; update_rules=lambda x: print("Mock update:", x); stop=lambda: print("Mock listener stopped")
-    class MockConfigManager: save_rules=lambda x: print("Mock save:", x); load_rules=lambda: {}
+    class MockConfigManager: save_rules=lambda x: print("Mock save:", x); load_rules=lambda: {}; make_lazy_rules=staticmethod(lambda x: x)
     window = TextReplacerSettingsWindow(MockListener(), MockConfigManager(), {"!t1": "test1", "!t2": "test2"}, False)
     # window.show() # <<< 시작 시 창 표시 안 함
     
@@ -546,7 +1015,7 @@ if __name__ == '__main__':
     
     # 테스트를 위한 Mock 객체 또는 실제 객체 생성 필요
     class MockListener: rules = {"!t1": "test1", "!t2": "test2"}; is_running=lambda:True; update_rules=lambda x: print("Mock update:", x); stop=lambda: print("Mock listener stopped")
-    class MockConfigManager: save_rules=lambda x: print("Mock save:", x); load_rules=lambda: {}
+    class MockConfigManager: save_rules=lambda x: print("Mock save:", x); load_rules=lambda: {}; make_lazy_rules=staticmethod(lambda x: x)
     window = TextReplacerSettingsWindow(MockListener(), MockConfigManager(), {"!t1": "test1", "!t2": "test2"}, False)
     # window.show() # <<< 시작 시 창 표시 안 함
     
@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tracemalloc
+import statistics
+from unittest import mock
+
+# 설정 창 성능 벤치마크:
+# TextReplacerSettingsWindow 를 Qt offscreen 플랫폼에서 가짜 리스너/ConfigManager 와 함께 띄우고
+# 규칙 수(기본 1천/1만/10만)마다 창 생성, 테이블 채우기, 선택, 추가/수정/삭제, 테이블 읽기, 저장 시간과 최대 메모리를 측정합니다.
+# Windows 가 아닌 환경(Linux/macOS CI)에서도 실행됩니다 (gui 는 winreg 가 없으면 시작 프로그램 등록만 건너뜀).
+# 사용법: python gui_benchmark.py --sizes 1000 10000 100000 --ops 50 --json gui_bench.json
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen") # PyQt5 임포트 전에 설정 (화면 없이 실행)
+if sys.platform != "win32":
+    os.environ.setdefault("PYNPUT_BACKEND", "dummy") # 키 입력을 보내지 않으므로 X 서버 없이도 pynput 임포트 가능
+
+from PyQt5.QtWidgets import QApplication, QMessageBox
+from metrics import ListenerMetrics
+import gui
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_OPS = 50 # 크기마다 반복하는 선택/추가/수정/삭제 횟수
+LONG_BODY_RATIO = 0.05 # 긴 치환 텍스트(미리보기로 잘리는 본문) 비율
+LONG_BODY_CHARS = 2000 # 긴 치환 텍스트 길이
+
+class BenchListener:
+    """KeyboardListener 대신 쓰는 가짜 리스너 (훅 없음, 규칙 교체만 기록)"""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.groups = {}
+        self.usage_stats = None
+        self.suggestions = None
+        self.metrics = ListenerMetrics()
+        self.updates = 0
+
+    def is_running(self):
+        return True
+
+    def update_rules(self, new_rules, scoped_rules=None):
+        self.rules = new_rules
+        self.updates += 1
+
+    def update_groups(self, groups):
+        self.groups = groups
+
+    def is_group_enabled(self, name):
+        return False
+
+    def stop(self):
+        pass
+
+class BenchConfigManager:
+    """ConfigManager 대신 쓰는 가짜 설정 관리자 (파일을 쓰지 않고 저장된 규칙 수만 기록)"""
+
+    def __init__(self):
+        self.app_config_dir = "."
+        self.saved_rule_count = None
+
+    def save_rules(self, rules_data):
+        self.saved_rule_count = len(rules_data)
+        return True
+
+    def make_lazy_rules(self, rules_data):
+        return rules_data
+
+    def list_profiles(self):
+        return ["default"]
+
+    def list_snapshots(self):
+        return []
+
+def build_rules(rng, count):
+    """벤치마크용 규칙 (키워드 순서는 무작위, 일부는 긴 본문)"""
+    rules = {}
+    for i in rng.sample(range(count), count):
+        body = f"Replacement text number {i} for the settings window benchmark."
+        if rng.random() < LONG_BODY_RATIO:
+            body = (body + " ") * (LONG_BODY_CHARS // len(body))
+        rules[f"!kw{i:06d}"] = body
+    return rules
+
+def peak_rss_mb():
+    """프로세스 최대 메모리 사용량(MB). 측정할 수 없으면 None."""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        if ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize / 2**20
+        return None
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024 # macOS 는 바이트, Linux 는 KB
+
+class GuiBenchmark:
+    """규칙 수 하나에 대한 설정 창 벤치마크 실행"""
+
+    def __init__(self, app, rule_count, ops, seed, trace_memory=False):
+        self.app = app
+        self.rule_count = rule_count
+        self.ops = ops
+        self.rng = random.Random(seed)
+        self.trace_memory = trace_memory
+        self.results = {} # 단계 이름 -> {"ms": ..., "heap_peak_mb": ...} 또는 작업별 지연 요약
+
+    def _phase(self, name, function):
+        """한 번 실행하는 단계의 시간을 재고 (trace_memory 면 Python 힙 최대 사용량도) 결과를 반환합니다."""
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            heap_before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        result = function()
+        self.app.processEvents() # 지연된 레이아웃/그리기까지 포함
+        entry = {"ms": round((time.perf_counter() - started) * 1000, 2)}
+        if self.trace_memory:
+            entry["heap_peak_mb"] = round((tracemalloc.get_traced_memory()[1] - heap_before) / 2**20, 2)
+        self.results[name] = entry
+        return result
+
+    def _repeat(self, name, operation):
+        """여러 번 반복하는 작업(선택/추가/수정/삭제)의 작업당 지연 시간을 기록합니다."""
+        samples = []
+        for i in range(self.ops):
+            started = time.perf_counter()
+            operation(i)
+            self.app.processEvents()
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        self.results[name] = {"count": len(samples), "mean_ms": round(statistics.mean(samples), 3),
+                              "p50_ms": round(samples[len(samples) // 2], 3),
+                              "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+                              "max_ms": round(samples[-1], 3)}
+
+    def run(self):
+        rules = build_rules(self.rng, self.rule_count)
+        listener = BenchListener(rules)
+        config_manager = BenchConfigManager()
+        # 시작 프로그램 레지스트리를 건드리지 않도록 막고, 삭제 확인 대화 상자는 항상 "예"
+        with mock.patch.object(gui.TextReplacerSettingsWindow, "_update_startup_registry", return_value=True), \
+             mock.patch.object(gui.QMessageBox, "question", return_value=QMessageBox.Yes):
+            window = self._phase("construct", lambda: gui.TextReplacerSettingsWindow(listener, config_manager, rules, False))
+            self._phase("show", window.show)
+            self._phase("populate_table", lambda: window._load_rules_into_table(rules))
+            table = window.rules_table
+
+            def select(i):
+                table.selectRow(self.rng.randrange(table.rowCount()))
+            self._repeat("select", select)
+
+            def add(i):
+                window.keyword_input.setText(f"!bench_add_{i}")
+                window.replacement_input.setText(f"added {i}")
+                window._add_rule()
+            self._repeat("add", add)
+
+            def edit(i):
+                table.selectRow(self.rng.randrange(table.rowCount()))
+                window.replacement_input.setText(f"edited {i}")
+                window._edit_rule()
+            self._repeat("edit", edit)
+
+            def delete(i):
+                table.selectRow(self.rng.randrange(table.rowCount()))
+                window._delete_rule()
+            self._repeat("delete", delete)
+
+            current_rules = self._phase("read_table", window._get_current_rules_from_table)
+            assert len(current_rules) == self.rule_count, (len(current_rules), self.rule_count) # 추가한 만큼 삭제됨
+            saved = self._phase("save_all", window._save_all_rules)
+            assert saved and config_manager.saved_rule_count == self.rule_count and listener.updates == 1
+
+            window.metrics_timer.stop()
+            window.tray_icon.hide()
+            window.deleteLater()
+            self.app.processEvents()
+        self.results["peak_rss_mb"] = peak_rss_mb()
+        return self.results
+
+def print_report(rule_count, results):
+    print(f"[GUI_BENCH] {rule_count} rules:")
+    for name, entry in results.items():
+        if name == "peak_rss_mb":
+            print(f"[GUI_BENCH]   process peak RSS so far: {entry:.1f} MB" if entry is not None else "[GUI_BENCH]   peak RSS unavailable")
+        elif "ms" in entry:
+            heap = f", Python heap peak +{entry['heap_peak_mb']:.1f} MB" if "heap_peak_mb" in entry else ""
+            print(f"[GUI_BENCH]   {name:<15} {entry['ms']:>10.1f} ms{heap}")
+        else:
+            print(f"[GUI_BENCH]   {name:<15} mean {entry['mean_ms']:.2f} ms  p50 {entry['p50_ms']:.2f} ms  p95 {entry['p95_ms']:.2f} ms  max {entry['max_ms']:.2f} ms  (x{entry['count']})")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the settings window offscreen at several rule counts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="rule counts to benchmark")
+    parser.add_argument("--ops", type=lambda value: max(1, int(value)), default=DEFAULT_OPS, help="select/add/edit/delete operations per size")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also record the Python heap peak of each phase with tracemalloc (slows down all timings)")
+    parser.add_argument("--json", default=None, help="write the results to this JSON file")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.disable(logging.INFO) # 규칙/행 단위 로그 비활성화
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    app.setQuitOnLastWindowClosed(False)
+    if args.trace_memory:
+        tracemalloc.start()
+    print(f"[GUI_BENCH] Qt platform '{app.platformName()}', sizes {args.sizes}, {args.ops} operations each"
+          + (", tracing memory" if args.trace_memory else "") + ".")
+    report = {"platform": app.platformName(), "ops": args.ops, "trace_memory": args.trace_memory, "sizes": {}}
+    for rule_count in sorted(args.sizes): # 작은 크기부터 (최대 RSS 는 프로세스 전체 기준)
+        results = GuiBenchmark(app, rule_count, args.ops, args.seed, args.trace_memory).run()
+        print_report(rule_count, results)
+        report["sizes"][str(rule_count)] = results
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"[GUI_BENCH] Results written to {args.json}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
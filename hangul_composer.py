@@ -0,0 +1,174 @@
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ" # 초성 (유니코드 음절 조합 순서)
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ" # 중성
+JONGSEONG = ("", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+             "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ") # 종성 (0번은 받침 없음)
+
+CHOSEONG_INDEX = {jamo: i for i, jamo in enumerate(CHOSEONG)}
+JUNGSEONG_INDEX = {jamo: i for i, jamo in enumerate(JUNGSEONG)}
+JONGSEONG_INDEX = {jamo: i for i, jamo in enumerate(JONGSEONG) if jamo}
+
+# 두벌식 IME 조합 규칙: 이어서 입력하면 하나로 합쳐지는 모음/받침
+COMPOUND_VOWELS = {("ㅗ", "ㅏ"): "ㅘ", ("ㅗ", "ㅐ"): "ㅙ", ("ㅗ", "ㅣ"): "ㅚ", ("ㅜ", "ㅓ"): "ㅝ",
+                   ("ㅜ", "ㅔ"): "ㅞ", ("ㅜ", "ㅣ"): "ㅟ", ("ㅡ", "ㅣ"): "ㅢ"}
+COMPOUND_FINALS = {("ㄱ", "ㅅ"): "ㄳ", ("ㄴ", "ㅈ"): "ㄵ", ("ㄴ", "ㅎ"): "ㄶ", ("ㄹ", "ㄱ"): "ㄺ",
+                   ("ㄹ", "ㅁ"): "ㄻ", ("ㄹ", "ㅂ"): "ㄼ", ("ㄹ", "ㅅ"): "ㄽ", ("ㄹ", "ㅌ"): "ㄾ",
+                   ("ㄹ", "ㅍ"): "ㄿ", ("ㄹ", "ㅎ"): "ㅀ", ("ㅂ", "ㅅ"): "ㅄ"}
+SPLIT_FINALS = {compound: pair for pair, compound in COMPOUND_FINALS.items()} # 겹받침 -> (남는 받침, 다음 초성)
+
+_EMPTY = (None, None, None) # (초성, 중성, 종성) 모두 없음
+
+def compose_syllable(cho, jung, jong=None):
+    """초성/중성/종성 자모로 완성형 음절 한 글자를 만듭니다."""
+    jong_index = JONGSEONG_INDEX[jong] if jong else 0
+    return chr(0xAC00 + (CHOSEONG_INDEX[cho] * 21 + JUNGSEONG_INDEX[jung]) * 28 + jong_index)
+
+def _render(state):
+    """조합 상태를 화면에 보이는 문자열(0~1글자)로 바꿉니다."""
+    cho, jung, jong = state
+    if cho and jung:
+        return compose_syllable(cho, jung, jong)
+    return cho or jung or ""
+
+class HangulComposer:
+    """
+    키 입력으로 들어오는 한글 자모(ㄱ, ㅏ ...)를 IME와 같은 방식(두벌식)으로 음절로 조합하는 버퍼 계층
+
+    KeyboardListener 버퍼의 마지막 한 글자만 '조합 중인 음절'로 보고 교체하므로,
+    키 하나당 비용은 버퍼 길이와 무관한 상수입니다 (버퍼 전체 정규화 없음).
+    자모가 아닌 문자(영문, 이미 완성된 음절 등)는 조합을 끝내고 그대로 덧붙입니다.
+    """
+
+    __slots__ = ("_history",)
+
+    def __init__(self):
+        # 현재 음절의 조합 단계별 상태 (백스페이스 시 한 단계씩 되돌림, 최대 5단계)
+        self._history = []
+
+    @property
+    def composing(self):
+        """조합 중인 음절 (없으면 빈 문자열)"""
+        return _render(self._history[-1]) if self._history else ""
+
+    def commit(self):
+        """조합을 끝냅니다 (IME 확정과 같음, 버퍼 내용은 그대로)."""
+        self._history = []
+
+    def _sync(self, buffer):
+        """버퍼가 외부에서 초기화/변경되어 조합 중인 글자로 끝나지 않으면 조합 상태를 버립니다."""
+        if self._history and not buffer.endswith(self.composing):
+            self._history = []
+
+    def feed(self, buffer, char):
+        """
+        문자 하나를 입력했을 때의 새 버퍼를 반환합니다.
+
+        Args:
+            buffer (str): 현재 입력 버퍼 (끝 글자가 조합 중인 음절일 수 있음).
+            char (str): 입력된 문자.
+
+        Returns:
+            str: 갱신된 버퍼.
+        """
+        self._sync(buffer)
+        is_vowel = char in JUNGSEONG_INDEX
+        if not is_vowel and char not in CHOSEONG_INDEX and char not in JONGSEONG_INDEX:
+            self._history = [] # 자모가 아님 -> 조합 확정 후 그대로 추가
+            return buffer + char
+
+        composing = self.composing
+        base = buffer[:len(buffer) - len(composing)] if composing else buffer
+        committed, history = self._compose(char, is_vowel)
+        self._history = history
+        return base + committed + (_render(history[-1]) if history else "")
+
+    def _compose(self, char, is_vowel):
+        """자모 하나를 조합합니다. (확정된 문자열, 새 음절의 조합 단계 목록)을 반환합니다."""
+        history = self._history
+        state = history[-1] if history else _EMPTY
+        cho, jung, jong = state
+        if is_vowel:
+            if cho and not jung:
+                return "", history + [(cho, char, None)] # 초성 + 중성
+            if jung and not jong:
+                compound = COMPOUND_VOWELS.get((jung, char))
+                if compound:
+                    return "", history + [(cho, compound, None)] # ㅗ + ㅏ -> ㅘ
+                return _render(state), [(None, char, None)]
+            if jong:
+                # 받침이 다음 음절의 초성으로 이동 (겹받침이면 뒤 자음만 이동: 닭 + ㅏ -> 달가)
+                keep, moved = SPLIT_FINALS.get(jong, (None, jong))
+                return _render((cho, jung, keep)), [(moved, None, None), (moved, char, None)]
+            return "", [(None, char, None)]
+
+        if cho and jung:
+            if not jong and char in JONGSEONG_INDEX:
+                return "", history + [(cho, jung, char)] # 받침 추가
+            compound = COMPOUND_FINALS.get((jong, char)) if jong else None
+            if compound:
+                return "", history + [(cho, jung, compound)] # ㄱ + ㅅ -> ㄳ
+        if char not in CHOSEONG_INDEX:
+            return _render(state) + char, [] # 초성이 될 수 없는 자음(겹자음)은 그대로 확정
+        return _render(state), [(char, None, None)]
+
+    def backspace(self, buffer):
+        """
+        백스페이스 입력 처리. 조합 중이면 IME처럼 마지막 자모 하나만 지웁니다.
+
+        Returns:
+            str | None: 조합 중이었으면 갱신된 버퍼, 아니면 None (호출 측에서 한 글자 삭제).
+        """
+        self._sync(buffer)
+        if not self._history:
+            return None
+        removed = _render(self._history.pop())
+        return buffer[:len(buffer) - len(removed)] + self.composing
+
+if __name__ == '__main__':
+    # 테스트용 코드
+    def type_keys(composer, keys, buffer=""):
+        for key in keys:
+            if key == "\b":
+                updated = composer.backspace(buffer)
+                buffer = updated if updated is not None else buffer[:-1]
+            else:
+                buffer = composer.feed(buffer, key)
+        return buffer
+
+    assert type_keys(HangulComposer(), "ㄱㅏㅁㅅㅏ") == "감사"
+    assert type_keys(HangulComposer(), "ㅎㅏㄴㄱㅡㄹ") == "한글"
+    assert type_keys(HangulComposer(), "ㄷㅏㄹㄱㅏ") == "달가" # 겹받침 분리
+    assert type_keys(HangulComposer(), "ㄷㅏㄹㄱ") == "닭"
+    assert type_keys(HangulComposer(), "ㄱㅗㅏ") == "과"
+    assert type_keys(HangulComposer(), "ㄱㅅ") == "ㄱㅅ" # 초성 약어
+    assert type_keys(HangulComposer(), "!ㄱㅏㅁ ㅅㅏ") == "!감 사"
+    assert type_keys(HangulComposer(), "ㄱㅏㅁ\b") == "가" # 조합 중 백스페이스는 자모 하나만 삭제
+    assert type_keys(HangulComposer(), "ㄱㅏㅁㅅㅏ\b\b") == "감" # 새 음절이 모두 지워지면 이전 음절은 확정 상태
+    assert type_keys(HangulComposer(), "ㄱㅏㅁㅅㅏ\b\b\b") == "" # 확정된 글자는 한 글자씩 삭제
+    assert type_keys(HangulComposer(), "abc\b") == "ab"
+    composer = HangulComposer()
+    buffer = type_keys(composer, "ㄱㅏ")
+    assert type_keys(composer, "ㄴ", buffer="") == "ㄴ" # 외부에서 버퍼가 비워지면 조합 상태도 버림
+
+    # KeyboardListener 재생 테스트: 한글 키워드 규칙 (실제 키 입력 없이 _on_press에 키 이벤트 전달)
+    from pynput.keyboard import Key, KeyCode
+    from keyboard_listener import KeyboardListener
+    from window_provider import FakeActiveWindowProvider
+
+    listener = KeyboardListener(rules={"!감사": "감사합니다.", "ㄱㅅ": "감사합니다!", "!주소": "서울시 강남구", "!까": "까치"},
+                                window_provider=FakeActiveWindowProvider())
+    replaced = []
+    listener._perform_replacement = lambda keyword, text, plan=None: replaced.append(keyword)
+
+    def replay(keys):
+        for key in keys:
+            if isinstance(key, str):
+                key = Key.space if key == " " else Key.backspace if key == "\b" else KeyCode.from_char(key)
+            listener._on_press(key)
+
+    replay("!ㄱㅏㅁㅅㅏ ㄱㅅ !ㅈㅜㅅㅗ ")
+    replay("!ㄱㅏㅁㅅㅏㅁ\b ") # 조합 중 백스페이스
+    replay("ㄱㅏㅁㅅㅏ !ㄱㅏㅁ ") # 키워드 아님
+    replay(["!", Key.shift, "ㄲ", "ㅏ", " "]) # Shift는 조합을 끊지 않음
+    replay(["!", "ㄲ", Key.left, "ㅏ", " "]) # 방향키는 조합 확정 -> "!ㄲㅏ"
+    assert replaced == ["!감사", "ㄱㅅ", "!주소", "!감사", "!까"], replaced
+    print("HangulComposer test finished.")
@@ -0,0 +1,150 @@
+import sys
+import signal
+import logging
+import threading
+from log_setup import setup_logging
+from config_manager import ConfigManager # ConfigManager 임포트
+from keyboard_listener import KeyboardListener # KeyboardListener 임포트
+from usage_stats import UsageStats # 규칙 사용 통계
+from hook_process import HookProcessListener # 키보드 훅을 별도 프로세스에서 실행 (선택)
+from single_instance import SingleInstance, parse_instance_commands # 중복 실행 방지 및 명령 전달
+# 주의: 이 모듈은 PyQt5를 절대 임포트하지 않습니다 (키오스크/CI 환경용)
+
+class HeadlessDaemon:
+    """PyQt5 GUI 없이 ConfigManager와 KeyboardListener만 연결해 실행하는 데몬 클래스"""
+
+    def __init__(self, config_manager=None, use_hook_process=False):
+        self.config_manager = config_manager if config_manager is not None else ConfigManager()
+        self.use_hook_process = use_hook_process # True면 훅을 감시되는 자식 프로세스에서 실행
+        self.listener = None
+        self.usage_stats = UsageStats(self.config_manager.usage_stats_file_path)
+        self._stop_requested = threading.Event()
+        self._reload_requested = threading.Event()
+        self._requested_profile = None # 다음 재로드 전에 전환할 프로필 (다른 실행에서 전달됨)
+        self._wake_event = threading.Event() # 메인 루프를 깨우기 위한 이벤트
+
+    def _load_rules(self):
+        """설정 파일에서 전역 규칙, 앱별 규칙, 규칙 그룹, 자동 교정 목록을 로드합니다."""
+        config = self.config_manager.load_config()
+        rule_set = self.config_manager.load_rule_set(config) # 긴 본문은 blob 파일에서 지연 로드
+        previous_autocorrect = getattr(self.listener, "autocorrect", None) if self.listener else None # 재로드 시 실패하면 유지
+        return (rule_set, rule_set.scope_views(), rule_set.group_configs(),
+                self.config_manager.load_autocorrect(config, previous=previous_autocorrect))
+
+    def request_reload(self):
+        """규칙 재로드를 요청합니다 (시그널 핸들러에서 호출해도 안전)."""
+        self._reload_requested.set()
+        self._wake_event.set()
+
+    def request_stop(self):
+        """데몬 종료를 요청합니다 (시그널 핸들러에서 호출해도 안전)."""
+        self._stop_requested.set()
+        self._wake_event.set()
+
+    def handle_instance_command(self, command, *args):
+        """다른 실행에서 전달된 명령을 처리합니다 (IPC 스레드에서 호출, 실제 적용은 메인 루프에서)."""
+        if command == "reload":
+            self.request_reload()
+        elif command == "profile":
+            self._requested_profile = args[0]
+            self.request_reload()
+        elif command == "show":
+            logging.info("[HEADLESS] Show window requested by another launch, but there is no window in headless mode.")
+        else:
+            logging.warning(f"[HEADLESS] Unknown forwarded command '{command}'. Ignoring it.")
+
+    def reload(self):
+        """설정 파일을 다시 읽어 리스너 규칙을 교체합니다 (요청된 프로필이 있으면 먼저 전환)."""
+        profile, self._requested_profile = self._requested_profile, None
+        if profile is not None and self.config_manager.switch_profile(profile) is None:
+            logging.warning(f"[HEADLESS] Could not switch to rule profile '{profile}'.")
+        rules, scoped_rules, groups, autocorrect = self._load_rules()
+        if self.listener:
+            self.listener.update_rules(rules, scoped_rules)
+            self.listener.update_groups(groups)
+            self.listener.update_autocorrect(autocorrect)
+        logging.info(f"[HEADLESS] Rules reloaded from '{self.config_manager.config_file_path}'. Count: {len(rules)}")
+
+    def install_signal_handlers(self):
+        """종료/재로드 시그널 핸들러를 등록합니다. 메인 스레드에서만 호출 가능합니다."""
+        signal.signal(signal.SIGINT, lambda signum, frame: self.request_stop())
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.request_stop())
+        # POSIX는 SIGHUP, Windows는 Ctrl+Break(SIGBREAK)로 재로드
+        reload_signal = getattr(signal, "SIGHUP", None) or getattr(signal, "SIGBREAK", None)
+        if reload_signal is not None:
+            signal.signal(reload_signal, lambda signum, frame: self.request_reload())
+            logging.info(f"[HEADLESS] Send {signal.Signals(reload_signal).name} to reload rules.")
+        else:
+            logging.warning("[HEADLESS] No reload signal available on this platform.")
+
+    def run(self):
+        """리스너를 시작하고 종료 요청이 올 때까지 대기합니다.
+
+        Returns:
+            int: 프로세스 종료 코드 (정상 종료 0, 리스너 비정상 종료 1).
+        """
+        rules, scoped_rules, groups, autocorrect = self._load_rules()
+        logging.info(f"[HEADLESS] Using config file: {self.config_manager.config_file_path}")
+        self.usage_stats.load()
+        self.usage_stats.start()
+        listener_class = HookProcessListener if self.use_hook_process else KeyboardListener
+        self.listener = listener_class(rules=rules, scoped_rules=scoped_rules, groups=groups,
+                                       usage_stats=self.usage_stats, autocorrect=autocorrect)
+        self.listener.start()
+        logging.info(f"[HEADLESS] Keyboard listener started with {len(rules)} rules.")
+
+        exit_code = 0
+        try:
+            while not self._stop_requested.is_set():
+                # 타임아웃을 두어 Windows에서도 시그널이 처리되도록 함
+                self._wake_event.wait(timeout=0.5)
+                self._wake_event.clear()
+                if self._reload_requested.is_set():
+                    self._reload_requested.clear()
+                    self.reload()
+                if not self._stop_requested.is_set() and not self.listener.is_running():
+                    logging.error("[HEADLESS] Listener thread stopped unexpectedly. Exiting daemon.")
+                    exit_code = 1
+                    break
+        finally:
+            self.shutdown()
+        return exit_code
+
+    def shutdown(self):
+        """리스너를 중지하고 스레드 종료를 기다립니다."""
+        if self.listener is None:
+            return
+        if self.listener.is_running():
+            logging.info("[HEADLESS] Stopping keyboard listener...")
+            self.listener.stop() # 리스너 스레드 종료까지 기다림
+        self.usage_stats.stop() # 남은 사용 통계 저장
+        logging.info("[HEADLESS] Daemon shut down.")
+
+def main(argv=None):
+    """헤드리스 모드 진입점. main.py의 /headless 인자 또는 단독 실행으로 호출됩니다."""
+    argv = sys.argv if argv is None else argv
+    setup_logging() # 로그 설정 먼저 호출
+    logging.info(f"[HEADLESS] Starting headless daemon. Command line arguments: {argv}")
+
+    config_manager = ConfigManager()
+    instance_commands = parse_instance_commands(argv)
+    single_instance = SingleInstance(config_manager.app_config_dir)
+    if not single_instance.acquire():
+        # GUI나 다른 데몬이 이미 훅을 설치했으면 명령(재로드/프로필 전환)만 전달하고 종료
+        return 0 if single_instance.forward(instance_commands) else 1
+    for command, *args in instance_commands:
+        if command == "profile" and config_manager.switch_profile(args[0]) is None:
+            logging.warning(f"[HEADLESS] Could not switch to rule profile '{args[0]}' from the command line.")
+
+    use_hook_process = (config_manager.load_config().get("settings", {}).get("hook_process", False)
+                        or "/hookprocess" in argv)
+    daemon = HeadlessDaemon(config_manager, use_hook_process=use_hook_process)
+    daemon.install_signal_handlers()
+    single_instance.start(daemon.handle_instance_command)
+    try:
+        return daemon.run()
+    finally:
+        single_instance.release()
+
+if __name__ == '__main__':
+    sys.exit(main())
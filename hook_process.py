@@ -0,0 +1,358 @@
+import os
+import time
+import signal
+import logging
+import logging.handlers
+import threading
+import multiprocessing
+from metrics import ListenerMetrics # 훅 프로세스 지표를 GUI 쪽에 반영
+
+STATUS_INTERVAL = 1.0 # 훅 프로세스가 지표/사용 기록을 보내는 주기 (초, 하트비트 겸용)
+HEARTBEAT_TIMEOUT = 10.0 # 이 시간 동안 아무 메시지가 없으면 훅 프로세스가 멈춘 것으로 보고 재시작 (초)
+RESTART_DELAYS = (0.5, 1.0, 2.0, 5.0, 10.0) # 연속 재시작 대기 시간 (초)
+MAX_RESTARTS = 5 # RESTART_WINDOW 안에서 허용하는 최대 재시작 횟수 (초과 시 감시 중단)
+RESTART_WINDOW = 60.0 # 재시작 횟수를 세는 구간 (초)
+
+class _HitForwarder:
+    """훅 프로세스 안에서 UsageStats 대신 사용: 적중 키워드를 모았다가 상태 메시지로 부모에게 전달"""
+
+    def __init__(self):
+        self._hits = []
+        self._lock = threading.Lock()
+
+    def record(self, keyword):
+        with self._lock:
+            self._hits.append(keyword)
+
+    def drain(self):
+        with self._lock:
+            hits, self._hits = self._hits, []
+        return hits
+
+def _hook_process_main(conn, log_queue, rules, scoped_rules, groups, autocorrect=None):
+    """
+    훅 프로세스 진입점. KeyboardListener를 이 프로세스에서 실행하고,
+    파이프로 규칙 변경 명령을 받으며 STATUS_INTERVAL 마다 지표와 적중 기록을 보냅니다.
+    """
+    # 로그는 부모 프로세스의 로그 파일로 전달 (같은 파일을 두 프로세스가 회전시키지 않도록)
+    root_logger = logging.getLogger()
+    root_logger.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root_logger.setLevel(logging.DEBUG)
+    # Ctrl+C는 부모 프로세스가 처리 (종료는 부모의 "stop" 명령으로만)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from keyboard_listener import KeyboardListener # 자식 프로세스에서만 pynput 훅 설치
+    hits = _HitForwarder()
+    listener = KeyboardListener(rules=rules, scoped_rules=scoped_rules, groups=groups, usage_stats=hits, autocorrect=autocorrect)
+    listener.start()
+    logging.info(f"[HOOK_PROCESS] Hook process {os.getpid()} started.")
+
+    stack_results = [] # 스택 샘플링 스레드가 결과를 넣고 메인 루프가 부모에게 보냄 (파이프 전송은 이 스레드에서만)
+    def sample_for_parent(duration, interval):
+        from profile_capture import sample_stacks, HOOK_PROCESS_THREAD_PREFIX
+        stack_results.append(sample_stacks(duration, interval, thread_prefix=HOOK_PROCESS_THREAD_PREFIX))
+
+    stop_requested = False
+    next_status = 0.0
+    try:
+        while listener.is_running():
+            if conn.poll(min(STATUS_INTERVAL, max(0.0, next_status - time.monotonic()))):
+                command, *args = conn.recv()
+                if command == "update_rules":
+                    listener.update_rules(*args)
+                elif command == "update_groups":
+                    listener.update_groups(*args)
+                elif command == "set_group_enabled":
+                    listener.set_group_enabled(*args)
+                elif command == "update_autocorrect":
+                    listener.update_autocorrect(*args)
+                elif command == "reset_metrics":
+                    listener.metrics.reset()
+                elif command == "capture_stacks":
+                    threading.Thread(target=sample_for_parent, args=args, daemon=True, name="ProfileCaptureThread").start()
+                elif command == "stop":
+                    stop_requested = True
+                    break
+                else:
+                    logging.warning(f"[HOOK_PROCESS] Unknown command '{command}'. Ignoring.")
+            while stack_results:
+                conn.send(("stacks", *stack_results.pop()))
+            if time.monotonic() >= next_status:
+                conn.send(("status", listener.metrics.export_state(), hits.drain()))
+                next_status = time.monotonic() + STATUS_INTERVAL
+    except (EOFError, OSError):
+        logging.warning("[HOOK_PROCESS] Connection to main process lost. Stopping hook.")
+        stop_requested = True
+    finally:
+        if listener.is_running():
+            listener.stop() # 훅 감시 스레드 종료까지 기다림
+        try:
+            # 마지막 지표/적중 기록 전달 후 종료 사유 보고 (리스너가 훅 재시작을 포기한 경우 프로세스째 다시 시작)
+            conn.send(("status", listener.metrics.export_state(), hits.drain()))
+            conn.send(("exited", "stop" if stop_requested else "listener_stopped"))
+        except (EOFError, OSError):
+            pass
+        logging.info(f"[HOOK_PROCESS] Hook process {os.getpid()} exiting.")
+
+class _ParentLogHandler(logging.Handler):
+    """훅 프로세스 로그 레코드를 부모 프로세스의 같은 이름 로거로 다시 보내는 핸들러"""
+
+    def emit(self, record):
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+
+class HookProcessListener:
+    """
+    KeyboardListener 엔진을 별도 프로세스에서 실행하고 감시하는 리스너 (KeyboardListener와 같은 인터페이스)
+
+    훅 콜백이 GUI(Qt 이벤트 루프, 큰 설정 저장 등)와 GIL을 다투지 않도록 pynput 훅은 자식 프로세스에서 돌고,
+    이 객체는 규칙 변경을 파이프로 보내고 지표/사용 기록을 받기만 합니다.
+    자식 프로세스가 비정상 종료하거나 응답이 없으면 감시 스레드가 마지막 규칙 상태로 다시 시작합니다.
+    """
+
+    def __init__(self, rules=None, scoped_rules=None, window_provider=None, groups=None, usage_stats=None, autocorrect=None):
+        """
+        Args:
+            rules (Mapping): 전역 규칙 (RuleSet은 압축된 형태 그대로 전송됨, None이면 훅 프로세스 기본 규칙).
+            scoped_rules (dict): 앱 이름 -> 규칙 Mapping.
+            window_provider: 사용하지 않음 (포커스 창 조회는 훅 프로세스가 직접 수행, 인터페이스 호환용).
+            groups (dict): 그룹 이름 -> {"enabled": bool, "rules": Mapping}.
+            usage_stats (UsageStats): 훅 프로세스에서 전달된 적중 기록을 저장할 통계 객체 (선택).
+            autocorrect (AutocorrectGraph): 자동 교정 소스 (파일 경로만 전송되고 훅 프로세스가 직접 mmap, 선택).
+        """
+        if window_provider is not None:
+            logging.warning("[HOOK_PROCESS] window_provider is ignored in hook process mode.")
+        self.rules = rules
+        self.scoped_rules = scoped_rules if scoped_rules is not None else {}
+        self.groups = {name: {"enabled": bool(group.get("enabled", True)), "rules": group.get("rules", {})}
+                       for name, group in (groups or {}).items()}
+        self.usage_stats = usage_stats
+        self.autocorrect = autocorrect
+        self.metrics = ListenerMetrics() # 훅 프로세스 지표의 사본 (STATUS_INTERVAL 마다 갱신)
+        self.restart_count = 0 # 감시 스레드가 훅 프로세스를 다시 시작한 횟수
+
+        self.listener_thread = None # 감시 스레드 (KeyboardListener.listener_thread 와 같은 용도)
+        self._context = multiprocessing.get_context("spawn") # Qt 스레드가 있는 프로세스를 fork 하지 않음
+        self._process = None
+        self._conn = None
+        self._send_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._log_queue = None
+        self._log_listener = None
+        self._stack_result = None # 훅 프로세스가 보낸 스택 샘플 (capture_stacks 요청 결과)
+        self._stack_event = threading.Event()
+
+    # --- 규칙 변경 (KeyboardListener 인터페이스) ---
+    def _send(self, *message):
+        """훅 프로세스에 명령을 보냅니다. 프로세스가 없거나 재시작 중이면 무시 (재시작 시 현재 상태 전체를 다시 보냄)."""
+        with self._send_lock:
+            conn = self._conn
+            if conn is None:
+                return False
+            try:
+                conn.send(message)
+                return True
+            except (EOFError, OSError) as e:
+                logging.warning(f"[HOOK_PROCESS] Failed to send '{message[0]}' to hook process: {e}")
+                return False
+
+    def update_rules(self, new_rules, scoped_rules=None):
+        """규칙을 교체합니다 (scoped_rules가 None이면 기존 앱별 규칙 유지). 컴파일은 훅 프로세스에서 수행."""
+        self.rules = new_rules
+        if scoped_rules is not None:
+            self.scoped_rules = scoped_rules
+        self._send("update_rules", new_rules, scoped_rules)
+        logging.info(f"[UPDATE_RULES] Rules sent to hook process. Count: {len(new_rules)}")
+
+    def update_groups(self, groups):
+        """규칙 그룹 전체를 교체합니다."""
+        self.groups = {name: {"enabled": bool(group.get("enabled", True)), "rules": group.get("rules", {})}
+                       for name, group in groups.items()}
+        self._send("update_groups", self.groups)
+
+    def set_group_enabled(self, name, enabled):
+        """
+        규칙 그룹을 켜거나 끕니다.
+
+        Returns:
+            bool: 그룹이 존재하면 True.
+        """
+        group = self.groups.get(name)
+        if group is None:
+            logging.warning(f"[SET_GROUP_ENABLED] Unknown rule group '{name}'.")
+            return False
+        group["enabled"] = bool(enabled)
+        self._send("set_group_enabled", name, bool(enabled))
+        return True
+
+    def update_autocorrect(self, autocorrect):
+        """자동 교정 소스를 교체합니다 (None이면 자동 교정 끔)."""
+        self.autocorrect = autocorrect
+        self._send("update_autocorrect", autocorrect)
+
+    def is_group_enabled(self, name):
+        """규칙 그룹의 활성화 여부를 반환합니다 (없는 그룹은 False)."""
+        group = self.groups.get(name)
+        return bool(group and group["enabled"])
+
+    # --- 프로파일 캡처 ---
+    def capture_stacks(self, duration, interval):
+        """
+        훅 프로세스에 duration 동안 스택 샘플링을 요청합니다 (pynput 스레드는 훅 프로세스에 있음).
+
+        Returns:
+            bool: 요청을 보냈으면 True. 결과는 collect_stacks()로 받습니다.
+        """
+        self._stack_event.clear()
+        self._stack_result = None
+        return self._send("capture_stacks", duration, interval)
+
+    def collect_stacks(self, timeout):
+        """
+        capture_stacks() 결과를 기다립니다.
+
+        Returns:
+            tuple | None: (접힌 스택 Counter, 샘플 횟수, 스레드 ID -> 이름). timeout 안에 오지 않으면 None
+            (캡처 중 훅 프로세스가 재시작된 경우 등).
+        """
+        if not self._stack_event.wait(timeout):
+            return None
+        return self._stack_result
+
+    # --- 훅 프로세스 시작/감시 ---
+    def _spawn(self):
+        """현재 규칙 상태로 훅 프로세스를 시작합니다."""
+        parent_conn, child_conn = self._context.Pipe()
+        # 시작 중에 들어온 규칙 변경이 유실되지 않도록 전송 잠금을 잡은 채 현재 상태로 시작
+        with self._send_lock:
+            process = self._context.Process(
+                target=_hook_process_main,
+                args=(child_conn, self._log_queue, self.rules, self.scoped_rules, self.groups, self.autocorrect),
+                daemon=True, name="KeyboardHookProcess")
+            process.start()
+            child_conn.close() # 부모 쪽 사본을 닫아야 자식 종료 시 EOF 감지 가능
+            self._process = process
+            self._conn = parent_conn
+        logging.info(f"[HOOK_PROCESS] Started hook process (pid {process.pid}).")
+
+    def _handle_message(self, message):
+        """훅 프로세스 메시지 처리. 종료 보고면 종료 사유를 반환합니다."""
+        kind = message[0]
+        if kind == "status":
+            _, state, hits = message
+            self.metrics.load_state(state)
+            if self.usage_stats is not None:
+                for keyword in hits:
+                    self.usage_stats.record(keyword)
+        elif kind == "stacks":
+            self._stack_result = message[1:]
+            self._stack_event.set()
+        elif kind == "exited":
+            return message[1]
+        return None
+
+    def _reap(self):
+        """현재 훅 프로세스를 정리합니다 (응답이 없으면 강제 종료)."""
+        with self._send_lock:
+            process, conn = self._process, self._conn
+            self._process = self._conn = None
+        if conn is not None:
+            conn.close()
+        if process is not None:
+            process.join(timeout=2)
+            if process.is_alive():
+                logging.warning(f"[HOOK_PROCESS] Hook process {process.pid} did not exit. Terminating.")
+                process.terminate()
+                process.join(timeout=2)
+
+    def _supervise(self):
+        """감시 스레드: 훅 프로세스 메시지를 받고, 비정상 종료나 무응답 시 다시 시작합니다."""
+        restart_times = []
+        while not self._stop_event.is_set():
+            self._spawn()
+            conn, process = self._conn, self._process
+            exit_reason = None
+            last_message = time.monotonic()
+            try:
+                while exit_reason is None:
+                    if conn.poll(0.5):
+                        exit_reason = self._handle_message(conn.recv())
+                        last_message = time.monotonic()
+                    elif not process.is_alive():
+                        exit_reason = "crashed"
+                    elif time.monotonic() - last_message > HEARTBEAT_TIMEOUT:
+                        logging.error(f"[HOOK_PROCESS] No heartbeat from hook process for {HEARTBEAT_TIMEOUT}s.")
+                        exit_reason = "unresponsive"
+            except (EOFError, OSError):
+                exit_reason = "crashed"
+            self._reap()
+
+            if exit_reason == "stop" or self._stop_event.is_set():
+                logging.info(f"[HOOK_PROCESS] Hook process finished ({exit_reason}).")
+                break
+
+            now = time.monotonic()
+            restart_times = [t for t in restart_times if now - t < RESTART_WINDOW]
+            if len(restart_times) >= MAX_RESTARTS:
+                logging.error(f"[HOOK_PROCESS] Hook process failed {len(restart_times)} times within {RESTART_WINDOW}s. Giving up.")
+                break
+            delay = RESTART_DELAYS[min(len(restart_times), len(RESTART_DELAYS) - 1)]
+            restart_times.append(now)
+            self.restart_count += 1
+            logging.warning(f"[HOOK_PROCESS] Hook process exited unexpectedly (exitcode {process.exitcode}, {exit_reason}). Restarting in {delay}s.")
+            if self._stop_event.wait(delay):
+                break
+        logging.info("[HOOK_PROCESS] Supervisor thread finished.")
+
+    def start(self):
+        """훅 프로세스와 감시 스레드를 시작합니다."""
+        if self.is_running():
+            logging.warning("[START] Hook process listener is already running.")
+            return
+        logging.info("[START] Starting keyboard hook process...")
+        self._stop_event.clear()
+        if self._log_listener is None:
+            self._log_queue = self._context.Queue()
+            self._log_listener = logging.handlers.QueueListener(self._log_queue, _ParentLogHandler())
+            self._log_listener.start()
+        self.listener_thread = threading.Thread(target=self._supervise, daemon=True, name="HookSupervisorThread")
+        self.listener_thread.start()
+
+    def stop(self):
+        """훅 프로세스에 종료를 요청하고 감시 스레드 종료를 기다립니다."""
+        if not self.is_running():
+            logging.warning("[STOP] Hook process listener stop requested, but it is not running.")
+        else:
+            logging.info("[STOP] Stopping keyboard hook process...")
+            self._stop_event.set()
+            self._send("stop")
+            self.listener_thread.join(timeout=5)
+            if self.listener_thread.is_alive():
+                logging.warning("[STOP] Hook supervisor thread did not stop within timeout!")
+        if self._log_listener is not None:
+            self._log_listener.stop() # 자식 프로세스의 남은 로그까지 기록
+            self._log_listener = None
+            self._log_queue = None
+
+    def is_running(self):
+        """감시 중인지 확인 (재시작 대기 중에도 True, 재시작을 포기하면 False)"""
+        return self.listener_thread is not None and self.listener_thread.is_alive()
+
+if __name__ == '__main__':
+    # 테스트용 코드 (pynput 훅이 설치되므로 데스크톱 세션에서 실행)
+    log_format = '%(asctime)s - %(levelname)s - [%(processName)s/%(threadName)s] - %(message)s'
+    logging.basicConfig(level=logging.DEBUG, format=log_format)
+
+    hook_listener = HookProcessListener(rules={"!hp": "hook process"})
+    hook_listener.start()
+    time.sleep(3)
+    hook_listener.update_rules({"!hp": "updated"})
+    # 자식 프로세스를 강제 종료하면 감시 스레드가 다시 시작해야 함
+    hook_listener._process.terminate()
+    time.sleep(3)
+    assert hook_listener.is_running() and hook_listener.restart_count == 1
+    print(hook_listener.metrics.summary_text())
+    hook_listener.stop()
+    assert not hook_listener.is_running()
+    print("\nHookProcessListener test finished.")
@@ -0,0 +1,186 @@
+import sys
+import time
+import logging
+from functools import lru_cache
+from pynput import keyboard
+
+# pynput Controller.type() 과 같은 제어 문자 매핑 (pynput.keyboard._CONTROL_CODES)
+_CONTROL_KEYS = {"\n": keyboard.Key.enter, "\r": keyboard.Key.enter, "\t": keyboard.Key.tab}
+
+@lru_cache(maxsize=4096)
+def _key_for(char):
+    """글자 하나의 pynput 키 (같은 글자는 같은 KeyCode 객체를 공유)"""
+    control = _CONTROL_KEYS.get(char)
+    return control if control is not None else keyboard.KeyCode.from_char(char)
+
+class KeyPlan:
+    """
+    치환 텍스트 하나를 미리 키 이벤트로 바꿔 둔 재생 계획
+
+    controller.type() 은 치환할 때마다 글자마다 키 해석(제어 문자 매핑, KeyCode 생성, Key 열거형 검색,
+    수정 키/데드 키 상태 갱신)을 반복하지만, 계획은 규칙당 한 번만 해석해 컴파일된 규칙 인덱스(RuleIndex.plans)에
+    보관하고 치환 시에는 해석된 키를 플랫폼 백엔드에 바로 보냅니다 (글자 입력에는 수정 키/데드 키가 없으므로 결과는 같음).
+    Windows 에서는 SendInput 입력 배열까지 미리 만들어 텍스트 전체를 한 번의 호출로 보냅니다
+    (가상 키/유니코드 선택은 pynput 과 같고, 키보드 배열이 바뀌면 다시 만듦).
+    """
+
+    __slots__ = ("text", "keys", "codes", "_native", "_native_layout")
+
+    def __init__(self, text):
+        self.text = text
+        self.keys = tuple(_key_for(char) for char in text)
+        # Controller.press() 가 해석한 결과와 같은 KeyCode (Key 멤버는 값으로)
+        self.codes = tuple(key.value if isinstance(key, keyboard.Key) else key for key in self.keys)
+        self._native = None # Windows SendInput 입력 배열 (첫 재생 시 생성)
+        self._native_layout = None # _native 를 만들 때의 키보드 배열 (HKL)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def replay(self, controller):
+        """계획한 키 입력을 보냅니다 (잘못된 글자는 pynput 과 같이 InvalidCharacterException)."""
+        if type(controller) is keyboard.Controller: # 실제 pynput 컨트롤러 (테스트용 가짜 컨트롤러는 press/release 사용)
+            if _win32_injector is not None:
+                _win32_injector.send(self)
+                return
+            send, keys = controller._handle, self.codes
+        else:
+            send, keys = None, self.keys
+        for position, key in enumerate(keys):
+            try:
+                if send is not None:
+                    send(key, True)
+                    send(key, False)
+                else:
+                    controller.press(key)
+                    controller.release(key)
+            except (ValueError, controller.InvalidKeyException):
+                raise controller.InvalidCharacterException(position, self.text[position])
+
+class SelectionPlan:
+    """
+    _perform_replacement 의 앞부분: Shift+Left 로 글자를 선택하고 Delete 로 지우는 키 입력 (선택 글자 수별로 한 번만 생성)
+
+    각 이벤트는 (키, 누름 여부, 이후 대기 초)이며 대기 시간은 리스너의 SELECT_KEY_DELAY/SELECTION_SETTLE_DELAY 입니다.
+    """
+
+    __slots__ = ("select_count", "events")
+
+    def __init__(self, select_count, select_key_delay, settle_delay):
+        Key = keyboard.Key
+        events = [(Key.shift, True, 0)]
+        for _ in range(select_count):
+            events.append((Key.left, True, 0))
+            events.append((Key.left, False, select_key_delay))
+        events.append((Key.shift, False, settle_delay))
+        events.append((Key.delete, True, 0))
+        events.append((Key.delete, False, settle_delay))
+        self.select_count = select_count
+        self.events = tuple(events)
+
+    def replay(self, controller):
+        for key, pressed, delay in self.events:
+            if pressed:
+                controller.press(key)
+            else:
+                controller.release(key)
+            if delay:
+                time.sleep(delay)
+
+class _Win32Injector:
+    """KeyPlan 을 SendInput 입력 배열로 만들어 한 번에 보내는 Windows 구현"""
+
+    def __init__(self):
+        import ctypes
+        from pynput._util import win32 # pynput 이 사용하는 것과 같은 구조체/함수
+        self._ctypes = ctypes
+        self._win32 = win32
+        self._get_keyboard_layout = ctypes.windll.user32.GetKeyboardLayout
+
+    def _build(self, plan):
+        """pynput Controller._handle 과 같은 방식으로 키마다 누름/뗌 입력을 만듭니다."""
+        win32 = self._win32
+        KEYBDINPUT, INPUT, INPUT_union = win32.KEYBDINPUT, win32.INPUT, win32.INPUT_union
+        inputs = []
+        for key_code in plan.codes:
+            for is_press in (True, False):
+                if key_code.char is not None and ord(key_code.char) > 0xFFFF:
+                    # UTF-16 한 단위로 표현할 수 없는 글자(이모지 등)는 서로게이트 쌍으로 보냄
+                    data = key_code.char.encode('utf-16le')
+                    flags = KEYBDINPUT.UNICODE | (0 if is_press else KEYBDINPUT.KEYUP)
+                    for offset in range(0, len(data), 2):
+                        scan = data[offset] | (data[offset + 1] << 8)
+                        inputs.append(INPUT(INPUT.KEYBOARD, INPUT_union(ki=KEYBDINPUT(dwFlags=flags, wScan=scan))))
+                else:
+                    inputs.append(INPUT(type=INPUT.KEYBOARD, value=INPUT_union(ki=KEYBDINPUT(**key_code._parameters(is_press)))))
+        return (INPUT * len(inputs))(*inputs)
+
+    def send(self, plan):
+        # VkKeyScan 결과는 호출 스레드의 키보드 배열에 따라 달라지므로 배열이 바뀌면 다시 만듦
+        layout = self._get_keyboard_layout(0)
+        if plan._native is None or plan._native_layout != layout:
+            plan._native = self._build(plan)
+            plan._native_layout = layout
+        if plan._native:
+            self._win32.SendInput(len(plan._native), plan._native, self._ctypes.sizeof(self._win32.INPUT))
+
+def _create_win32_injector():
+    if sys.platform != "win32":
+        return None
+    try:
+        return _Win32Injector()
+    except Exception as e: # pynput 내부 구조가 다른 버전이면 controller 로 한 키씩 재생
+        logging.warning(f"[KEY_PLAN] Batched SendInput unavailable, replaying key plans through pynput: {e}")
+        return None
+
+_win32_injector = _create_win32_injector()
+
+if __name__ == '__main__':
+    # 테스트용 코드
+    class RecordingController:
+        InvalidKeyException = keyboard.Controller.InvalidKeyException
+        InvalidCharacterException = keyboard.Controller.InvalidCharacterException
+
+        def __init__(self):
+            self.events = []
+
+        def press(self, key):
+            self.events.append(("press", key))
+
+        def release(self, key):
+            self.events.append(("release", key))
+
+    plan = KeyPlan("Hi\tA\n")
+    assert len(plan) == 5 and plan.keys[2] is keyboard.Key.tab and plan.keys[4] is keyboard.Key.enter
+    assert KeyPlan("Hi").keys[0] is plan.keys[0] # 같은 글자는 KeyCode 공유
+    controller = RecordingController()
+    plan.replay(controller)
+    assert [event for event, _ in controller.events] == ["press", "release"] * 5
+    assert controller.events[0][1] == keyboard.KeyCode.from_char("H")
+
+    selection = SelectionPlan(3, select_key_delay=0, settle_delay=0)
+    controller = RecordingController()
+    selection.replay(controller)
+    keys = [key for _, key in controller.events]
+    assert keys.count(keyboard.Key.left) == 6 and keys[0] == keys[-3] == keyboard.Key.shift and keys[-1] == keyboard.Key.delete
+
+    # KeyboardListener: 계획은 일치한 인덱스에 한 번만 만들어 보관하고 다음 치환부터 재사용
+    from keyboard_listener import KeyboardListener
+    from window_provider import FakeActiveWindowProvider
+
+    class InstantListener(KeyboardListener):
+        SELECT_KEY_DELAY = 0
+        SELECTION_SETTLE_DELAY = 0
+
+    listener = InstantListener(rules={"btw": "by the way"}, window_provider=FakeActiveWindowProvider())
+    listener.controller = controller = RecordingController()
+    for _ in range(2):
+        for char in "btw":
+            listener._on_press(keyboard.KeyCode.from_char(char))
+        listener._on_press(keyboard.Key.space)
+    global_index = listener._compiled[0]
+    assert list(global_index.plans) == ["btw"] and global_index.plans["btw"].text == "by the way"
+    typed = "".join(key.char for event, key in controller.events if event == "press" and isinstance(key, keyboard.KeyCode))
+    assert typed == "by the way" * 2, typed
+    assert sum(1 for event, key in controller.events if event == "press" and key == keyboard.Key.left) == 8 # (3 + 1) x 2
+    print("KeyPlan test finished.")
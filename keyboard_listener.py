@@ -1,30 +1,87 @@
+import sys
 import threading
 import time
 from pynput import keyboard
 from pynput.keyboard import Controller # Controller 임포트
 import logging
+from metrics import ListenerMetrics # 런타임 지표
+from rule_index import RuleIndex # 컴파일된 규칙 인덱스
+from window_provider import create_default_provider # 포커스 앱 감지 (앱별 규칙용)
+from hangul_composer import HangulComposer # 한글 자모 -> 음절 조합 (IME 입력용)
+from autocorrect import trailing_word # 자동 교정 대상 단어 추출
+from key_plan import KeyPlan, SelectionPlan # 미리 만든 치환 키 입력 계획
 # from collections import deque # deque 대신 간단한 문자열 슬라이싱 사용
 
 class KeyboardListener:
     """전역 키보드 입력을 감지하고 키워드 매칭 및 치환을 처리하는 리스너 클래스"""
 
-    def __init__(self, rules=None):
+    SCOPE_CACHE_LIMIT = 256 # (창 핸들, 프로세스 ID) -> 인덱스 체인 캐시 최대 크기
+    BUFFER_MARGIN = 5 # 버퍼 최대 크기 = 가장 긴 키워드 길이 + 여유분
+    SELECT_KEY_DELAY = 0.01 # 치환 시 키워드 선택용 Shift+Left 키 사이 대기 (초)
+    SELECTION_SETTLE_DELAY = 0.02 # 선택 완료 후 / 삭제 후 대기 (초)
+    TYPE_CHAR_SECONDS_ESTIMATE = 0.001 # controller.type() 의 글자당 입력 시간 추정치 (초, 저장 시 보고서용)
+    CACHED_PLAN_MAX_CHARS = 4096 # 이보다 긴 치환 텍스트는 키 입력 계획을 인덱스에 보관하지 않음 (치환할 때만 생성)
+    WATCHDOG_INTERVAL = 0.5 # 감시 스레드가 훅 상태를 확인하는 주기 (초)
+    CALLBACK_STALL_SECONDS = 5.0 # 훅 콜백 하나가 이 시간(+ 예상 치환 시간)을 넘기면 멈춘 것으로 보고 훅 재시작 (초)
+    RESTART_DELAYS = (0.1, 0.5, 1.0, 2.0, 5.0) # 연속 재시작 대기 시간 (초)
+    MAX_RESTARTS = 5 # RESTART_WINDOW 안에서 허용하는 최대 재시작 횟수 (초과 시 감시 중단)
+    RESTART_WINDOW = 60.0 # 재시작 횟수를 세는 구간 (초)
+    STOP_JOIN_TIMEOUT = 2.0 # stop() 이 감시 스레드 종료를 기다리는 최대 시간 (초)
+    # Windows 에서는 추천 수락 키를 훅의 이벤트 필터에서 처리해 앱에 전달되지 않도록 막음 (F8 은 IDE 의 "계속" 등)
+    ACCEPT_IN_EVENT_FILTER = sys.platform == "win32"
+    WM_KEYDOWN = 0x0100
+    WM_SYSKEYDOWN = 0x0104
+    LLKHF_INJECTED = 0x10 # SendInput 으로 주입된 키 이벤트 플래그
+
+    def __init__(self, rules=None, scoped_rules=None, window_provider=None, groups=None, usage_stats=None, autocorrect=None, suggestions=None):
         self.listener_thread = None
         self.listener = None
         self._stop_event = threading.Event()
         self.is_simulating = False # <<< 추가: 시뮬레이션 중인지 나타내는 플래그
+        # 훅 상태 감시: 현재 훅 세대(재시작마다 증가), 실행 중인 콜백의 시작 시각(0이면 없음), 치환으로 늘어난 허용 시간
+        self._hook_generation = 0
+        self._callback_started_ns = 0
+        self._injection_budget_seconds = 0.0
         
         # 입력 버퍼 및 규칙 설정
         self.buffer = "" 
+        # 한글 IME 입력 시 자모를 음절로 조합해 버퍼에 반영 (키당 상수 비용)
+        self.composer = HangulComposer()
         # TODO: GUI나 파일에서 실제 규칙 로드하도록 수정 필요
         self.rules = rules if rules is not None else self._get_default_rules()
+        self.scoped_rules = scoped_rules if scoped_rules is not None else {} # 앱 이름 -> 규칙 딕셔너리
+        # 규칙 그룹: 그룹 이름 -> {"enabled": bool, "rules": dict} (그룹별로 따로 컴파일)
+        self.groups = {}
+        self._group_indexes = {} # 그룹 이름 -> RuleIndex
+        self._enabled_group_indexes = () # 활성화된 그룹 인덱스 (설정 순서)
+        # 자동 교정 규칙 소스 (AutocorrectGraph 등 get/correct 제공, 선택). 어떤 규칙도 일치하지 않을 때 단어 단위로 조회
+        self.autocorrect = autocorrect
+
+        # 앱별 규칙 선택용 포커스 창 정보 제공자 (테스트에서는 FakeActiveWindowProvider 주입)
+        self.window_provider = window_provider if window_provider is not None else create_default_provider()
+        self._compile_rules()
+        self._compile_groups(groups if groups is not None else {})
         self.max_buffer_size = self._calculate_max_buffer_size() # 가장 긴 키워드 길이 + 여유분
 
         # 치환 트리거 키 설정 (pynput Key 객체 사용)
         self.trigger_keys = {keyboard.Key.space} # 엔터키 제거하고 스페이스바만 유지
+        # 한글 조합을 끝내지 않는 보조 키 (쌍자음 ㄲ 등은 Shift와 함께 입력)
+        self.composition_keep_keys = {keyboard.Key.shift, keyboard.Key.shift_l, keyboard.Key.shift_r}
 
         # 키 입력 제어를 위한 Controller 인스턴스 생성
         self.controller = Controller()
+        self._selection_plans = {} # 선택 글자 수 -> SelectionPlan (Shift+Left 선택 후 Delete)
+
+        # 런타임 지표 (키 수, 매칭/치환 시간 등 - GUI 상태 표시줄에서 조회)
+        self.metrics = ListenerMetrics()
+        # 규칙별 사용 통계 (선택, UsageStats - 메모리에만 기록하고 저장은 별도 스레드가 처리)
+        self.usage_stats = usage_stats
+        # 키워드 접두사 추천 (선택, SuggestionEngine - 훅 스레드는 버퍼를 큐에 넣기만 하고 계산은 작업 스레드가 처리)
+        self.suggestions = suggestions
+        self.suggestion_accept_key = keyboard.Key.f8 # 첫 번째 추천 키워드를 치환하는 키
+        self._accept_key_held = False # 이벤트 필터가 막은 수락 키가 아직 눌려 있음 (반복/뗌 이벤트도 막음)
+        if self.suggestions is not None:
+            self.suggestions.update_rules(self.rules)
 
         logging.info(f"[INIT] KeyboardListener initialized. Rules: {len(self.rules)}, Max buffer: {self.max_buffer_size}")
 
@@ -38,22 +95,162 @@ class KeyboardListener:
         }
 
     def _calculate_max_buffer_size(self):
-        """규칙 중 가장 긴 키워드 길이를 기준으로 버퍼 최대 크기 계산"""
-        if not self.rules:
+        """규칙 중 가장 긴 키워드 길이를 기준으로 버퍼 최대 크기 계산 (앱별 규칙 포함)"""
+        global_index, scope_indexes = self._compiled
+        max_len = max([global_index.max_keyword_length] +
+                      [index.max_keyword_length for index in scope_indexes.values()] +
+                      [index.max_keyword_length for index in self._enabled_group_indexes] +
+                      [self.autocorrect.max_key_length if self.autocorrect is not None else 0])
+        if not max_len:
             return 10 # 규칙 없으면 기본값
-        max_len = max(len(k) for k in self.rules.keys())
-        return max_len + 5 # 가장 긴 키워드 + 약간의 여유
+        return max_len + self.BUFFER_MARGIN # 가장 긴 키워드 + 약간의 여유
 
-    def update_rules(self, new_rules):
-        """외부에서 규칙을 업데이트하는 메서드"""
+    def _compile_rules(self):
+        """전역 규칙과 앱별 규칙을 RuleIndex로 컴파일합니다 (트리거 스레드와 경합하지 않도록 한 번에 교체)."""
+        # RuleSet 은 이미 컴파일된 인덱스를 재사용 (최근 프로필로 다시 전환할 때 재컴파일 없음)
+        self._compiled = (RuleIndex.for_rules(self.rules), RuleIndex.build_scoped(self.scoped_rules))
+        self._scope_chain_cache = {} # (창 핸들, 프로세스 ID) -> 검사할 인덱스 튜플
+
+    def update_rules(self, new_rules, scoped_rules=None):
+        """외부에서 규칙을 업데이트하는 메서드 (scoped_rules가 None이면 기존 앱별 규칙 유지)"""
         self.rules = new_rules
+        if scoped_rules is not None:
+            self.scoped_rules = scoped_rules
+        self._compile_rules()
         self.max_buffer_size = self._calculate_max_buffer_size()
         self.buffer = "" # 규칙 변경 시 버퍼 초기화
-        logging.info(f"[UPDATE_RULES] Rules updated. Count: {len(self.rules)}, Max buffer: {self.max_buffer_size}")
-
-    def _perform_replacement(self, keyword, replacement_text):
-        """실제 키 입력 시뮬레이션을 통해 텍스트를 치환하는 메서드 (자기 입력 무시 플래그 추가)"""
+        if self.suggestions is not None:
+            self.suggestions.update_rules(self.rules)
+            self.suggestions.request(self.buffer)
+        logging.info(f"[UPDATE_RULES] Rules updated. Count: {len(self.rules)}, App scopes: {len(self.scoped_rules)}, Max buffer: {self.max_buffer_size}")
+
+    def _compile_groups(self, groups):
+        """
+        규칙 그룹을 그룹별 RuleIndex로 컴파일합니다.
+        같은 규칙 객체를 그대로 넘긴 그룹만 기존 인덱스를 재사용합니다. 내용 비교(==)는 본문을 모두 읽어 재컴파일보다 비싸고,
+        재사용한 인덱스가 이전 RuleSet 을 계속 붙잡으므로 하지 않습니다 (RuleSetView 는 for_rules 가 자체 인덱스를 재사용).
+        """
+        group_indexes = {}
+        for name, group in groups.items():
+            rules = group.get("rules", {})
+            previous = self.groups.get(name)
+            if previous is not None and name in self._group_indexes and previous.get("rules") is rules:
+                group_indexes[name] = self._group_indexes[name]
+            else:
+                group_indexes[name] = RuleIndex.for_rules(rules, name=f"group:{name}")
+        self.groups = {name: {"enabled": bool(group.get("enabled", True)), "rules": group.get("rules", {})}
+                       for name, group in groups.items()}
+        self._group_indexes = group_indexes
+        self._refresh_enabled_groups()
+
+    def update_autocorrect(self, autocorrect):
+        """자동 교정 규칙 소스를 교체합니다 (None이면 자동 교정 끔)."""
+        self.autocorrect = autocorrect
+        self.max_buffer_size = self._calculate_max_buffer_size()
+        word_count = len(autocorrect) if autocorrect is not None else 0
+        logging.info(f"[UPDATE_AUTOCORRECT] Autocorrect words: {word_count}, Max buffer: {self.max_buffer_size}")
+
+    def _correct_word(self):
+        """
+        버퍼 끝 단어를 자동 교정 소스에서 찾습니다.
+
+        Returns:
+            tuple | None: 교정 대상이면 (단어, 교정 텍스트), 아니면 None.
+        """
+        word = trailing_word(self.buffer)
+        # 단어가 버퍼 전체를 채웠으면 앞부분이 잘렸을 수 있으므로 (가장 긴 오타보다 긴 단어) 교정하지 않음
+        if not word or len(word) >= self.max_buffer_size:
+            return None
+        fix = self.autocorrect.correct(word)
+        return (word, fix) if fix is not None and fix != word else None
+
+    def _refresh_enabled_groups(self):
+        """활성화된 그룹 인덱스 튜플을 다시 만듭니다 (재컴파일 없음)."""
+        self._enabled_group_indexes = tuple(self._group_indexes[name] for name, group in self.groups.items()
+                                            if group["enabled"] and name in self._group_indexes)
+
+    def update_groups(self, groups):
+        """외부에서 규칙 그룹 전체를 교체하는 메서드 (변경된 그룹만 다시 컴파일)"""
+        self._compile_groups(groups)
+        self.max_buffer_size = self._calculate_max_buffer_size()
+        self.buffer = "" # 규칙 변경 시 버퍼 초기화
+        logging.info(f"[UPDATE_GROUPS] Groups updated. Groups: {len(self.groups)}, Enabled: {len(self._enabled_group_indexes)}, Max buffer: {self.max_buffer_size}")
+
+    def set_group_enabled(self, name, enabled):
+        """
+        규칙 그룹을 켜거나 끕니다. 이미 컴파일된 인덱스를 포함/제외만 하므로 그룹 크기와 무관하게 즉시 반영됩니다.
+
+        Returns:
+            bool: 그룹이 존재하면 True.
+        """
+        group = self.groups.get(name)
+        if group is None:
+            logging.warning(f"[SET_GROUP_ENABLED] Unknown rule group '{name}'.")
+            return False
+        group["enabled"] = bool(enabled)
+        self._refresh_enabled_groups()
+        self.max_buffer_size = self._calculate_max_buffer_size()
+        logging.info(f"[SET_GROUP_ENABLED] Rule group '{name}' {'enabled' if enabled else 'disabled'}. Max buffer: {self.max_buffer_size}")
+        return True
+
+    def is_group_enabled(self, name):
+        """규칙 그룹의 활성화 여부를 반환합니다 (없는 그룹은 False)."""
+        group = self.groups.get(name)
+        return bool(group and group["enabled"])
+
+    def _get_active_indexes(self):
+        """
+        현재 포커스된 앱에 적용할 인덱스 튜플을 반환합니다 (앱 전용 -> 전역 -> 활성 그룹 순서).
+        앱 이름 조회는 (창 핸들, 프로세스 ID) 기준으로 캐시되므로 같은 창에서의 반복 트리거는 딕셔너리 조회 한 번입니다.
+        핸들이 다른 프로세스의 창에 재사용되면 프로세스 ID가 달라 다시 조회하고,
+        조회에 실패한 창(권한이 높은 프로세스 등)은 캐시하지 않아 다음 트리거에서 다시 시도합니다.
+        """
+        global_index, scope_indexes = self._compiled
+        if not scope_indexes:
+            return (global_index,) + self._enabled_group_indexes
+        try:
+            window_handle = self.window_provider.get_foreground_window()
+            window_key = (window_handle, self.window_provider.get_process_id(window_handle)) if window_handle is not None else None
+        except Exception as e:
+            logging.error(f"[_GET_ACTIVE_INDEXES] Failed to query foreground window: {e}", exc_info=True)
+            return (global_index,) + self._enabled_group_indexes
+        if window_key is None:
+            return (global_index,) + self._enabled_group_indexes
+
+        chain = self._scope_chain_cache.get(window_key)
+        if chain is None:
+            try:
+                app_name = self.window_provider.get_app_name(window_handle)
+            except Exception as e:
+                logging.error(f"[_GET_ACTIVE_INDEXES] Failed to resolve app name: {e}", exc_info=True)
+                app_name = None
+            scope_index = scope_indexes.get(app_name) if app_name else None
+            chain = (scope_index, global_index) if scope_index is not None else (global_index,)
+            if app_name: # 실패한 조회는 캐시하지 않음 (일시적인 실패가 그 창에 계속 남지 않도록)
+                if len(self._scope_chain_cache) >= self.SCOPE_CACHE_LIMIT:
+                    self._scope_chain_cache.clear()
+                self._scope_chain_cache[window_key] = chain
+            logging.debug(f"[_GET_ACTIVE_INDEXES] Window {window_key} -> app '{app_name}', scope index: {scope_index is not None}")
+        return chain + self._enabled_group_indexes
+
+    def _replacement_plan(self, index, keyword, replacement_text):
+        """일치한 인덱스에 보관된 키 입력 계획을 반환합니다 (처음 치환할 때 만들어 보관)."""
+        plan = index.plans.get(keyword)
+        if plan is None:
+            plan = KeyPlan(replacement_text)
+            if len(replacement_text) <= self.CACHED_PLAN_MAX_CHARS:
+                index.plans[keyword] = plan
+        return plan
+
+    def _perform_replacement(self, keyword, replacement_text, select_count=None, plan=None):
+        """
+        실제 키 입력 시뮬레이션을 통해 텍스트를 치환하는 메서드 (자기 입력 무시 플래그 추가)
+
+        select_count 를 생략하면 키워드와 방금 입력한 트리거(스페이스) 한 글자를 선택해 지웁니다.
+        plan 은 replacement_text 의 KeyPlan 이며, 생략하면 이번 치환에만 쓸 계획을 만듭니다.
+        """
         logging.debug(f"[_PERFORM_REPLACEMENT] <<< ENTER >>> Keyword='{keyword}', Replacement='{replacement_text}'")
+        self._injection_budget_seconds = self.estimate_injection_seconds(keyword, replacement_text) # 긴 치환은 훅 멈춤으로 보지 않음
         self.is_simulating = True
         logging.debug(f"[_PERFORM_REPLACEMENT] Set is_simulating = True")
         try:
@@ -67,54 +264,46 @@ class KeyboardListener:
             #     time.sleep(1) # <<< 딜레이를 1초로 변경하여 테스트
             # logging.debug(f"[_PERFORM_REPLACEMENT] Backspace loop finished. Typing replacement text...")
 
-            # --- 새로운 방식: Shift + 화살표로 선택 후 삭제 ---
-            logging.debug(f"[_PERFORM_REPLACEMENT] Starting selection using Shift+Left Arrow for {len(keyword)} characters.")
-            
-            # Shift 키 누르기
-            self.controller.press(keyboard.Key.shift)
-            logging.debug("[_PERFORM_REPLACEMENT] Pressed Shift.")
-            
+            # --- 새로운 방식: Shift + 화살표로 선택 후 삭제 (선택 글자 수별로 미리 만든 계획 재생) ---
             # 키워드 길이 + 1 만큼 왼쪽 화살표 누르기 (실험적 수정)
-            select_count = len(keyword) + 1
-            logging.debug(f"[_PERFORM_REPLACEMENT] Simulating Left Arrow {select_count} times (keyword_len + 1)...")
-            for i in range(select_count):
-                self.controller.press(keyboard.Key.left)
-                self.controller.release(keyboard.Key.left)
-                logging.debug(f"[_PERFORM_REPLACEMENT] Simulated Left Arrow #{i+1}")
-                time.sleep(0.01) # 키 입력 사이에 아주 짧은 딜레이 추가 (선택적)
-
-            # Shift 키 떼기
-            self.controller.release(keyboard.Key.shift)
-            logging.debug("[_PERFORM_REPLACEMENT] Released Shift.")
-            
-            time.sleep(0.02) # 선택 완료 후 잠시 대기
-
-            # Delete 키 누르기
-            logging.debug("[_PERFORM_REPLACEMENT] Simulating Delete key...")
-            self.controller.press(keyboard.Key.delete)
-            self.controller.release(keyboard.Key.delete)
-            logging.debug("[_PERFORM_REPLACEMENT] Simulated Delete key.")
-            
-            time.sleep(0.02) # 삭제 후 잠시 대기
+            if select_count is None:
+                select_count = len(keyword) + 1
+            selection = self._selection_plans.get(select_count)
+            if selection is None:
+                selection = SelectionPlan(select_count, self.SELECT_KEY_DELAY, self.SELECTION_SETTLE_DELAY)
+                self._selection_plans[select_count] = selection
+            logging.debug(f"[_PERFORM_REPLACEMENT] Selecting {select_count} characters with Shift+Left Arrow, then Delete...")
+            selection.replay(self.controller)
             # --- 선택 후 삭제 끝 ---
 
-            logging.debug(f"[_PERFORM_REPLACEMENT] Typing replacement text...") # 기존 코드
-            self.controller.type(replacement_text)
+            if plan is None: # 인덱스에 없는 치환 (자동 교정, 긴 텍스트)
+                plan = KeyPlan(replacement_text)
+            logging.debug(f"[_PERFORM_REPLACEMENT] Replaying key plan ({len(plan)} keys)...")
+            plan.replay(self.controller)
             logging.debug(f"[_PERFORM_REPLACEMENT] Finished typing replacement text.")
             logging.info(f"[_PERFORM_REPLACEMENT] Replacement successful for keyword '{keyword}'.")
         except Exception as e:
             logging.error(f"[_PERFORM_REPLACEMENT] !!! Error during replacement simulation: {e}", exc_info=True)
         finally:
             self.is_simulating = False
+            self._injection_budget_seconds = 0.0
             logging.debug(f"[_PERFORM_REPLACEMENT] Set is_simulating = False in finally block")
         logging.debug(f"[_PERFORM_REPLACEMENT] <<< EXIT >>>")
 
+    @classmethod
+    def estimate_injection_seconds(cls, keyword, replacement_text):
+        """_perform_replacement 방식(Shift+Left 선택 -> Delete -> 글자 단위 입력)으로 치환할 때의 예상 소요 시간(초)"""
+        return ((len(keyword) + 1) * cls.SELECT_KEY_DELAY + 2 * cls.SELECTION_SETTLE_DELAY
+                + len(replacement_text) * cls.TYPE_CHAR_SECONDS_ESTIMATE)
+
     def _on_press(self, key):
         """키가 눌렸을 때 호출될 콜백 함수 (자기 입력 무시 로직 추가)"""
         if self.is_simulating:
             # 시뮬레이션 중인 키 종류 로깅 (Shift, Left, Delete 등 확인용)
             logging.debug(f"[_ON_PRESS] Ignoring simulated key press {key} because is_simulating is True.") 
             return True # 시뮬레이션 중인 키는 무시하고 리스너 계속 실행
+
+        self.metrics.keys_seen += 1
         
         # <<< 로그 추가 시작 >>>
         try:
@@ -146,7 +335,7 @@ class KeyboardListener:
             if char is not None: 
                 logging.debug(f"[_ON_PRESS] Key has char='{char}'. Appending to buffer.")
                 buffer_before = self.buffer
-                self.buffer += char
+                self.buffer = self.composer.feed(self.buffer, char) # 자모는 조합 중인 음절에 합침, 그 외는 덧붙임
                 if len(self.buffer) > self.max_buffer_size:
                     buffer_trimmed_from = self.buffer[:-self.max_buffer_size]
                     self.buffer = self.buffer[-self.max_buffer_size:]
@@ -158,6 +347,7 @@ class KeyboardListener:
                  # char가 None인 특수 키는 여기서 처리하지 않음 (AttributeError로 감)
                  # 혹시 모를 NoneType 오류 방지용 로깅만 남김
                  logging.debug(f"[_ON_PRESS] Key has char=None. Key={key}. Possible unhandled case?")
+                 self.composer.commit() # 한/영 전환 등 문자 없는 키는 IME 조합을 확정함
                  # 필요하다면 여기서도 버퍼 초기화 등 처리 가능
                  processed = True # None을 처리한 것으로 간주
 
@@ -171,26 +361,35 @@ class KeyboardListener:
                 logging.debug(f"[_ON_PRESS] _check_for_replacement() returned: {replaced}")
                 buffer_before = self.buffer
                 self.buffer = "" # 트리거 입력 시 버퍼 초기화
+                self.composer.commit()
+                self.metrics.buffer_resets += 1
                 logging.debug(f"[_ON_PRESS] Buffer reset due to trigger key: '{buffer_before}' -> '{self.buffer}'")
                 processed = True
             elif key == keyboard.Key.backspace:
                 logging.debug(f"[_ON_PRESS] ---> Backspace key detected.")
                 buffer_before = self.buffer
-                if self.buffer:
+                composed = self.composer.backspace(self.buffer) # 조합 중이면 자모 하나만 삭제
+                if composed is not None:
+                    self.buffer = composed
+                    logging.debug(f"[_ON_PRESS] Backspace applied to composing syllable. Buffer: '{buffer_before}' -> '{self.buffer}'")
+                elif self.buffer:
                     self.buffer = self.buffer[:-1]
                     logging.debug(f"[_ON_PRESS] Backspace applied. Buffer: '{buffer_before}' -> '{self.buffer}'")
                 else:
                     logging.debug(f"[_ON_PRESS] Backspace pressed but buffer was already empty.")
                 processed = True
-            elif key == keyboard.Key.esc:
-                 logging.info(f"[_ON_PRESS] ---> ESC key detected. Stopping listener.")
-                 return_value = False # 리스너 루프 중단 신호
-                 processed = True # 처리됨
+            elif self.suggestions is not None and key == self.suggestion_accept_key:
+                logging.debug(f"[_ON_PRESS] ---> Suggestion accept key detected: {key}")
+                if not self.ACCEPT_IN_EVENT_FILTER: # Windows 는 _win32_event_filter 가 처리 (여기 오면 수락할 추천이 없었음)
+                    self._accept_suggestion()
+                processed = True
             # Shift, 화살표, Delete 등 _perform_replacement에서 사용할 키들은 여기서 특별히 처리할 필요 없음
             # (is_simulating 플래그로 걸러지거나, 일반 사용자 입력으로 들어와도 버퍼에 영향 없음)
             else:
                  # 기타 알려진 특수키 (Ctrl, Alt, F1 등)
                  logging.debug(f"[_ON_PRESS] ---> Ignoring known special key: {key}")
+                 if key not in self.composition_keep_keys:
+                     self.composer.commit() # 방향키 등은 IME 조합을 확정함
                  # 특수 키 입력 시 버퍼 초기화 여부 결정 (현재는 초기화 안 함)
                  # self.buffer = ""
                  processed = True
@@ -198,6 +397,10 @@ class KeyboardListener:
         if not processed:
             logging.warning(f"[_ON_PRESS] !!! Unhandled key press type: {key}. Clearing buffer.")
             self.buffer = "" 
+            self.metrics.buffer_resets += 1
+
+        if self.suggestions is not None:
+            self.suggestions.request(self.buffer) # 대기 없이 큐에 넣기만 함 (빈 버퍼면 추천 숨김)
 
         logging.debug(f"[_ON_PRESS] <<< EXITING HANDLER >>> Returning: {return_value}")
         return return_value
@@ -208,6 +411,88 @@ class KeyboardListener:
         # logging.debug(f"[_ON_RELEASE] Key released: {key}") 
         return True # 리스너는 계속 실행
 
+    def _current_suggestion(self):
+        """
+        지금 수락할 수 있는 추천을 반환합니다.
+
+        Returns:
+            tuple | None: (입력한 접두사, 첫 번째 추천 키워드, 치환 텍스트). 버퍼가 추천 접두사로 끝나지 않으면 None.
+        """
+        prefix, keywords = self.suggestions.current # 작업 스레드가 튜플째 교체하므로 한 번만 읽음
+        if not keywords or not prefix or not self.buffer.endswith(prefix):
+            return None
+        replacement_text = self.rules.get(keywords[0])
+        if replacement_text is None: # 추천 계산 이후 규칙이 바뀐 경우
+            return None
+        return prefix, keywords[0], replacement_text
+
+    def _win32_event_filter(self, msg, data):
+        """
+        (Windows) 훅이 키 이벤트를 처리하기 전에 호출됩니다. 수락할 추천이 있을 때 누른 수락 키는
+        앱에 전달되지 않도록 막고(누름/반복/뗌 모두) 별도 스레드에서 치환합니다.
+        pynput 은 막은 이벤트를 on_press 로 보내지 않으며, 훅 콜백 안에서는 키를 주입할 수 없기 때문입니다.
+        """
+        if self.suggestions is None or data.flags & self.LLKHF_INJECTED:
+            return True
+        if data.vkCode != getattr(getattr(self.suggestion_accept_key, "value", None), "vk", None):
+            return True
+        listener = self.listener
+        if listener is None:
+            return True
+        if msg not in (self.WM_KEYDOWN, self.WM_SYSKEYDOWN): # 뗌: 막은 누름의 짝이면 함께 막음
+            if self._accept_key_held:
+                self._accept_key_held = False
+                listener.suppress_event()
+            return True
+        if self._accept_key_held: # 누르고 있는 동안의 자동 반복
+            listener.suppress_event()
+        suggestion = None if self.is_simulating else self._current_suggestion()
+        if suggestion is None:
+            return True # 수락할 추천이 없으면 앱에 그대로 전달
+        self._accept_key_held = True
+        self.is_simulating = True # 치환 스레드가 시작되기 전에 입력된 키가 버퍼를 바꾸지 않도록
+        threading.Thread(target=self._accept_suggestion_from_filter, args=(suggestion,), daemon=True,
+                         name="SuggestionAcceptThread").start()
+        listener.suppress_event()
+
+    def _accept_suggestion_from_filter(self, suggestion):
+        """_win32_event_filter 가 막은 수락 키의 치환을 훅 밖의 스레드에서 수행합니다."""
+        try:
+            self._accept_suggestion(suggestion)
+        except Exception as e:
+            logging.error(f"[_ACCEPT_SUGGESTION] Failed to expand suggestion: {e}", exc_info=True)
+        finally:
+            self.is_simulating = False
+
+    def _accept_suggestion(self, suggestion=None):
+        """
+        추천 목록의 첫 번째 키워드로 입력 중인 접두사를 치환합니다 (트리거 입력 없이).
+
+        Args:
+            suggestion (tuple): _current_suggestion() 결과 (생략하면 지금 조회).
+
+        Returns:
+            bool: 치환했으면 True.
+        """
+        if suggestion is None:
+            suggestion = self._current_suggestion()
+        if suggestion is None:
+            logging.debug(f"[_ACCEPT_SUGGESTION] No current suggestion for buffer '{self.buffer}'.")
+            return False
+        prefix, keyword, replacement_text = suggestion
+        logging.info(f"[_ACCEPT_SUGGESTION] Accepted suggestion '{keyword}' for prefix '{prefix}'.")
+        injection_started_ns = time.perf_counter_ns()
+        plan = self._replacement_plan(self._compiled[0], keyword, replacement_text)
+        self._perform_replacement(keyword, replacement_text, select_count=len(prefix), plan=plan) # 수락 키는 글자를 입력하지 않음
+        self.metrics.injection_time.record(time.perf_counter_ns() - injection_started_ns)
+        self.metrics.record_hit(keyword)
+        if self.usage_stats is not None:
+            self.usage_stats.record(keyword)
+        self.buffer = ""
+        self.composer.commit()
+        self.metrics.buffer_resets += 1
+        return True
+
     def _check_for_replacement(self):
         """현재 버퍼가 규칙 키워드로 끝나는지 확인하고, 일치 시 실제 치환 수행 (상세 로그 추가)"""
         logging.debug(f"[_CHECK_REPLACEMENT] <<< ENTER >>> Checking buffer: '{self.buffer}'")
@@ -218,23 +503,43 @@ class KeyboardListener:
 
         matched_keyword = None
         replacement_text = None
+        matched_index = None
+        autocorrected = False
+        self.metrics.match_checks += 1
+        match_started_ns = time.perf_counter_ns()
         
-        logging.debug(f"[_CHECK_REPLACEMENT] Iterating through {len(self.rules)} rules...")
-        for keyword, text in self.rules.items():
-            logging.debug(f"[_CHECK_REPLACEMENT]   Checking rule: Keyword='{keyword}'")
-            is_match = self.buffer.endswith(keyword)
-            logging.debug(f"[_CHECK_REPLACEMENT]   Does buffer ('{self.buffer}') end with keyword ('{keyword}')? -> {is_match}")
-            if is_match:
-                matched_keyword = keyword
-                replacement_text = text
-                logging.info(f"[_CHECK_REPLACEMENT] Match found! Keyword: '{matched_keyword}', Replacement: '{replacement_text}'")
-                break # 첫 번째 일치하는 규칙 사용
+        # 앱 전용 인덱스 -> 전역 인덱스 -> 활성 그룹 순으로 검사, 먼저 일치하는 인덱스 사용
+        for index in self._get_active_indexes():
+            match = index.match(self.buffer)
+            if match is not None:
+                matched_keyword, replacement_text = match
+                matched_index = index
+                logging.info(f"[_CHECK_REPLACEMENT] Match found in '{index.name}' rules! Keyword: '{matched_keyword}', Replacement: '{replacement_text}'")
+                break # 첫 번째 일치하는 인덱스 사용
+        else:
+            # 규칙이 하나도 일치하지 않으면 단어 경계에서 자동 교정 목록 조회
+            if self.autocorrect is not None:
+                correction = self._correct_word()
+                if correction is not None:
+                    matched_keyword, replacement_text = correction
+                    autocorrected = True
+                    logging.info(f"[_CHECK_REPLACEMENT] Autocorrect: '{matched_keyword}' -> '{replacement_text}'")
         
-        logging.debug(f"[_CHECK_REPLACEMENT] Iteration finished.")
+        self.metrics.match_time.record(time.perf_counter_ns() - match_started_ns)
+        logging.debug(f"[_CHECK_REPLACEMENT] Index lookup finished.")
 
         if matched_keyword:
             logging.debug(f"[_CHECK_REPLACEMENT] Match confirmed. Calling _perform_replacement().")
-            self._perform_replacement(matched_keyword, replacement_text) # 실제 치환 함수 호출
+            injection_started_ns = time.perf_counter_ns()
+            plan = self._replacement_plan(matched_index, matched_keyword, replacement_text) if matched_index is not None else None
+            if autocorrected: # 교정은 단어만 바꾸므로 키워드와 함께 지운 트리거(스페이스)를 다시 입력
+                self._perform_replacement(matched_keyword, replacement_text + " ")
+            else:
+                self._perform_replacement(matched_keyword, replacement_text, plan=plan) # 실제 치환 함수 호출
+            self.metrics.injection_time.record(time.perf_counter_ns() - injection_started_ns)
+            self.metrics.record_hit(matched_keyword)
+            if self.usage_stats is not None and not autocorrected: # 사용 통계는 규칙 테이블의 키워드만 기록
+                self.usage_stats.record(matched_keyword)
             logging.debug(f"[_CHECK_REPLACEMENT] <<< EXIT >>> Returning: True (Match found and replacement attempted)")
             return True # 치환 성공 (시도)
         else:
@@ -242,82 +547,130 @@ class KeyboardListener:
             logging.debug(f"[_CHECK_REPLACEMENT] <<< EXIT >>> Returning: False (No match)")
             return False # 치환 실패
 
-    # --- 리스너 시작/중지 및 실행 로직 (이전과 거의 동일) ---
+    # --- 리스너 시작/중지, 훅 감시 및 재시작 ---
+    def _make_hook_callback(self, callback, generation):
+        """
+        pynput 콜백 래퍼: 실행 시간을 기록하고(감시 스레드가 멈춤 판단에 사용), 재시작으로 교체된
+        이전 훅의 콜백이면 False를 반환해 그 훅을 스스로 끝냅니다.
+        """
+        def hook_callback(key):
+            if generation != self._hook_generation:
+                return False
+            started_ns = time.perf_counter_ns()
+            self._callback_started_ns = started_ns
+            try:
+                return callback(key)
+            finally:
+                self._callback_started_ns = 0
+                self.metrics.callback_time.record(time.perf_counter_ns() - started_ns)
+        return hook_callback
+
     def _run_listener(self):
-        """리스너를 실행하는 내부 메서드 (별도 스레드에서 실행됨)"""
-        logging.info("[_RUN_LISTENER] Keyboard listener thread starting.")
+        """
+        pynput 훅을 하나 시작하고 중지 요청, 훅 종료, 콜백 멈춤 중 하나가 생길 때까지 감시합니다.
+
+        Returns:
+            str: 종료 사유 ("stop", "exited", "stalled").
+        """
+        generation = self._hook_generation
+        listener = keyboard.Listener(
+            on_press=self._make_hook_callback(self._on_press, generation),
+            on_release=self._make_hook_callback(self._on_release, generation),
+            suppress=False,
+            **({"win32_event_filter": self._win32_event_filter} if self.ACCEPT_IN_EVENT_FILTER else {})
+        )
+        self.listener = listener
+        listener.start()
+        logging.info(f"[_RUN_LISTENER] Keyboard hook started (generation {generation}).")
+        reason = "stop"
         try:
-            self.listener = keyboard.Listener(
-                on_press=self._on_press,
-                on_release=self._on_release,
-                suppress=False
-            )
-            with self.listener as l:
-                l.join()
-        except Exception as e:
-            # 오류 발생 시 스레드가 조용히 종료되지 않도록 에러 로깅 강화
-            logging.error(f"[_RUN_LISTENER] !!! UNEXPECTED ERROR in listener thread: {e}", exc_info=True)
+            while not self._stop_event.wait(self.WATCHDOG_INTERVAL):
+                if not listener.is_alive():
+                    reason = "exited"
+                    break
+                started_ns = self._callback_started_ns
+                if started_ns:
+                    stalled_seconds = (time.perf_counter_ns() - started_ns) / 1e9
+                    if stalled_seconds > self.CALLBACK_STALL_SECONDS + self._injection_budget_seconds:
+                        logging.error(f"[_RUN_LISTENER] Hook callback has been running for {stalled_seconds:.1f}s. Hook considered stalled.")
+                        reason = "stalled"
+                        break
         finally:
-            logging.info("[_RUN_LISTENER] Keyboard listener thread finished.")
-            self.listener = None # 리스너 객체 확실히 정리
+            self.listener = None
+            if reason == "stalled":
+                # 멈춘 콜백은 끝나는 대로 이전 세대로 인식되어 훅을 끝냄. 새 훅이 입력을 무시하지 않도록 상태만 정리
+                self._hook_generation += 1
+                self._callback_started_ns = 0
+                self._injection_budget_seconds = 0.0
+                self.is_simulating = False
+            try:
+                listener.stop()
+                if reason != "stalled": # 멈춘 훅 스레드는 기다리지 않음
+                    listener.join(self.STOP_JOIN_TIMEOUT) # pynput은 콜백에서 발생한 예외를 join()에서 다시 발생시킴
+            except Exception as e:
+                logging.error(f"[_RUN_LISTENER] !!! Keyboard hook failed: {e}", exc_info=True)
+        return reason
+
+    def _supervise(self):
+        """감시 스레드: 훅을 실행하고, 훅이 예기치 않게 끝나거나 멈추면 규칙과 입력 버퍼를 유지한 채 다시 시작합니다."""
+        logging.info("[_SUPERVISE] Keyboard listener thread starting.")
+        restart_times = []
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    reason = self._run_listener()
+                except Exception as e:
+                    # 오류 발생 시 스레드가 조용히 종료되지 않도록 에러 로깅 강화
+                    logging.error(f"[_SUPERVISE] !!! UNEXPECTED ERROR while starting keyboard hook: {e}", exc_info=True)
+                    reason = "failed"
+                if reason == "stop" or self._stop_event.is_set():
+                    break
+
+                now = time.monotonic()
+                restart_times = [t for t in restart_times if now - t < self.RESTART_WINDOW]
+                if len(restart_times) >= self.MAX_RESTARTS:
+                    logging.error(f"[_SUPERVISE] Keyboard hook failed {len(restart_times)} times within {self.RESTART_WINDOW}s. Giving up.")
+                    break
+                delay = self.RESTART_DELAYS[min(len(restart_times), len(self.RESTART_DELAYS) - 1)]
+                restart_times.append(now)
+                self.metrics.hook_restarts += 1
+                logging.warning(f"[_SUPERVISE] Keyboard hook {reason}. Restarting in {delay}s (buffer '{self.buffer}' kept).")
+                if self._stop_event.wait(delay):
+                    break
+        finally:
+            logging.info("[_SUPERVISE] Keyboard listener thread finished.")
 
     def start(self):
-        """키보드 리스너를 별도 스레드에서 시작"""
+        """키보드 리스너(훅 감시 스레드)를 별도 스레드에서 시작"""
         if self.listener_thread is not None and self.listener_thread.is_alive():
             logging.warning("[START] Listener is already running.")
             return
 
         logging.info("[START] Starting keyboard listener...")
         self._stop_event.clear()
-        self.listener_thread = threading.Thread(target=self._run_listener, daemon=True, name="KeyboardListenerThread")
+        self.listener_thread = threading.Thread(target=self._supervise, daemon=True, name="KeyboardListenerThread")
         self.listener_thread.start()
         logging.info("[START] Listener thread started.")
 
     def stop(self):
-        """키보드 리스너를 중지"""
-        if self.listener is None:
-            logging.warning("[STOP] Listener stop requested, but listener object does not exist (already stopped or failed to start?).")
-            # 스레드가 살아있는지 확인하고 정리 시도
-            if self.listener_thread and self.listener_thread.is_alive():
-                 logging.info("[STOP] Attempting to stop the listener thread directly (might not be clean)...")
-                 # 강제 종료는 위험하므로 여기서는 시도하지 않음
-                 pass
+        """키보드 리스너를 중지하고 감시 스레드 종료를 기다림 (훅 콜백 안에서 호출되면 기다리지 않음)"""
+        if not self.is_running():
+            logging.warning("[STOP] Listener stop requested, but it is not running.")
             return
 
-        if not self._stop_event.is_set(): # 중지 요청이 이미 발생하지 않았는지 확인
-             logging.info("[STOP] Stopping keyboard listener...")
-             self._stop_event.set()
-             try:
-                 # Listener.stop()은 Listener 스레드 내에서 호출되어야 안전하게 중단됨
-                 # 외부 스레드에서 호출하면 데드락 발생 가능성 있음
-                 # 따라서 여기서는 직접 호출 대신, 내부 콜백(on_press/on_release)에서
-                 # self._stop_event 플래그를 확인하거나, 특정 키(ESC)를 통해 중단하도록 유도
-                 # 여기서는 ESC키로 중단하는 로직이 _on_press에 이미 있음.
-                 # 즉시 중단을 원하면 Controller로 ESC 키를 보내는 방법도 고려 가능.
-                 # keyboard.Controller().press(keyboard.Key.esc)
-                 # keyboard.Controller().release(keyboard.Key.esc)
-                 
-                 # 또는 리스너 객체에 직접 stop 호출 (pynput 버전/환경에 따라 동작 다를 수 있음)
-                  if self.listener:
-                      self.listener.stop() # Listener.stop()이 join()을 해제
-                      logging.debug("[STOP] Called listener.stop()")
-
-             except Exception as e:
-                 logging.error(f"[_STOP] Error during listener stop: {e}", exc_info=True)
+        logging.info("[STOP] Stopping keyboard listener...")
+        self._stop_event.set() # 감시 스레드가 즉시 깨어나 훅을 중지함
+        if threading.current_thread() in (self.listener, self.listener_thread):
+            logging.info("[STOP] Stop requested from the listener itself. Not waiting for the thread to finish.")
+            return
+        self.listener_thread.join(timeout=self.STOP_JOIN_TIMEOUT)
+        if self.listener_thread.is_alive():
+            logging.warning("[STOP] Listener thread did not stop within timeout!")
         else:
-             logging.warning("[STOP] Listener stop requested, but already in progress or stopped.")
-
-        # 스레드 종료 대기 (선택 사항, 너무 길면 GUI 블록 가능)
-        # if self.listener_thread and self.listener_thread.is_alive():
-        #     self.listener_thread.join(timeout=0.5)
-        #     if self.listener_thread.is_alive():
-        #         logging.warning("Listener thread did not stop within timeout.")
-
-        # self.listener = None # _run_listener의 finally 블록에서 처리
-        logging.info("[STOP] Keyboard listener stop sequence initiated.")
+            logging.info("[STOP] Keyboard listener stopped.")
 
     def is_running(self):
-        """리스너 스레드가 현재 실행 중인지 확인"""
+        """리스너가 현재 실행 중인지 확인 (훅 재시작 대기 중에도 True, 재시작을 포기하면 False)"""
         return self.listener_thread is not None and self.listener_thread.is_alive()
 
 # 테스트용 코드
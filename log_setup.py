@@ -1,18 +1,29 @@
 import os
 import sys
+import time
+import queue
+import atexit
 import logging
+import logging.handlers
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+LOG_MAX_BYTES = 5 * 1024 * 1024 # 로그 파일 하나의 최대 크기 (5MB)
+LOG_BACKUP_COUNT = 3 # 보관할 이전 로그 파일 개수 (debug.log.1 ~ debug.log.3)
+LOG_FLUSH_INTERVAL = 1.0 # 파일 버퍼를 디스크로 내보내는 주기 (초)
+
+_queue_listener = None # 백그라운드 로그 기록 스레드 (setup_logging에서 생성)
 
 class TeeStream:
     def __init__(self, *streams):
         self.streams = [s for s in streams if s is not None] # None이 아닌 스트림만 저장
 
     def write(self, message):
+        # 쓰기마다 flush 하지 않음 (flush는 flush() 호출 시 또는 각 스트림의 버퍼 정책에 맡김)
         for stream in self.streams:
             # 각 스트림에 쓰기 전에 None 여부 확인 (이중 확인, 생성자에서 이미 처리)
             if stream:
                 try:
                     stream.write(message)
-                    stream.flush()
                 except Exception as e:
                     # 스트림 쓰기 오류 발생 시 예외 처리 (선택적)
                     # print(f"Error writing to stream {stream}: {e}")
@@ -27,7 +38,97 @@ class TeeStream:
                     # print(f"Error flushing stream {stream}: {e}")
                     pass
 
-def setup_logging():
+class LoggerStream:
+    """print/traceback 출력을 줄 단위로 logging 큐에 넘기는 파일 유사 객체 (디스크 I/O 없음)"""
+
+    def __init__(self, logger, level):
+        self.logger = logger
+        self.level = level
+        self._pending = ""
+
+    def write(self, message):
+        self._pending += message
+        while "\n" in self._pending:
+            line, self._pending = self._pending.split("\n", 1)
+            if line:
+                self.logger.log(self.level, line)
+
+    def flush(self):
+        if self._pending:
+            self.logger.log(self.level, self._pending)
+            self._pending = ""
+
+class BatchedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """크기 기준으로 회전하며, 레코드마다가 아니라 flush_interval 주기로만 디스크에 flush 하는 핸들러"""
+
+    def __init__(self, filename, flush_interval=LOG_FLUSH_INTERVAL, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        # StreamHandler.emit()이 매 레코드마다 호출하므로 주기가 지났을 때만 실제 flush
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self.force_flush()
+
+    def force_flush(self):
+        """주기와 상관없이 즉시 flush 합니다."""
+        self._last_flush = time.monotonic()
+        super().flush()
+
+    def close(self):
+        self.force_flush()
+        super().close()
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """큐가 한동안 비어 있어도 flush_interval 마다 핸들러 버퍼를 비워주는 QueueListener"""
+
+    _FLUSH_TICK = object() # 큐 대기 타임아웃을 나타내는 내부 표식
+
+    def __init__(self, log_queue, *handlers, flush_interval=LOG_FLUSH_INTERVAL):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block):
+        try:
+            return self.queue.get(block, timeout=self.flush_interval)
+        except queue.Empty:
+            return self._FLUSH_TICK
+
+    def handle(self, record):
+        if record is self._FLUSH_TICK:
+            for handler in self.handlers:
+                if isinstance(handler, BatchedRotatingFileHandler):
+                    handler.force_flush()
+            return
+        super().handle(record)
+
+def stop_logging():
+    """백그라운드 로그 스레드를 멈추고 남은 레코드를 모두 기록합니다 (종료 시 atexit로 호출)."""
+    global _queue_listener
+    if _queue_listener is None:
+        return
+    listener, _queue_listener = _queue_listener, None
+    try:
+        listener.stop() # 센티널을 넣고 남은 레코드 처리 후 스레드 join
+    except Exception:
+        pass
+    for handler in listener.handlers:
+        try:
+            handler.close()
+        except Exception:
+            pass
+
+def setup_logging(log_dir="logs", level=logging.DEBUG, max_bytes=LOG_MAX_BYTES,
+                  backup_count=LOG_BACKUP_COUNT, flush_interval=LOG_FLUSH_INTERVAL):
+    """
+    큐 기반 비동기 로깅을 설정합니다.
+    호출 스레드(키보드 훅 스레드 포함)는 레코드를 큐에 넣기만 하고,
+    실제 콘솔/파일 쓰기와 회전은 백그라운드 스레드가 처리합니다.
+    """
+    global _queue_listener
+
     # --- 조건부 로깅 비활성화 ---
     # PyInstaller로 패키징되었고(--windowed 추정, sys.stdout이 None) 로그 비활성화
     is_frozen = getattr(sys, 'frozen', False)
@@ -40,23 +141,48 @@ def setup_logging():
         return # 로깅 설정 건너뛰기
     # --- 조건부 로깅 비활성화 끝 ---
 
+    if _queue_listener is not None:
+        logging.debug("Logging already initialized. Skipping.")
+        return
+
     # logs 디렉토리 생성
-    os.makedirs("logs", exist_ok=True)
-    log_file_path = os.path.abspath("logs/debug.log")
-
-    # 로그 파일 열기 (덮어쓰기)
-    log_file = open(log_file_path, mode='w', encoding='utf-8')
-
-    # stdout, stderr 를 TeeStream으로 교체 (터미널 + 파일 모두 출력)
-    # 원본 스트림이 None일 경우 TeeStream에 포함시키지 않음
-    sys.stdout = TeeStream(sys.__stdout__, log_file)
-    sys.stderr = TeeStream(sys.__stderr__, log_file)
-
-    # logging 설정
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        stream=sys.stdout  # stdout도 이미 TeeStream이므로 파일+터미널로 감
+    os.makedirs(log_dir, exist_ok=True)
+    log_file_path = os.path.abspath(os.path.join(log_dir, "debug.log"))
+
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    # 로그 파일은 덮어쓰지 않고 이어서 기록, 크기 초과 시 회전
+    file_handler = BatchedRotatingFileHandler(
+        log_file_path, flush_interval=flush_interval,
+        mode='a', maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
     )
+    file_handler.setFormatter(formatter)
+    handlers = [file_handler]
+
+    # 터미널 출력 (원본 stdout이 있을 때만)
+    if sys.__stdout__ is not None:
+        console_handler = logging.StreamHandler(sys.__stdout__)
+        console_handler.setFormatter(formatter)
+        # print 출력은 TeeStream이 터미널에 직접 쓰므로 파일에만 기록 (중복 출력 방지)
+        console_handler.addFilter(lambda record: record.name != "stdio")
+        handlers.append(console_handler)
+
+    # 모든 로거는 큐에만 기록 (논블로킹), 백그라운드 스레드가 핸들러로 전달
+    log_queue = queue.SimpleQueue()
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _queue_listener = BatchingQueueListener(log_queue, *handlers, flush_interval=flush_interval)
+    _queue_listener.start()
+    atexit.register(stop_logging) # logging.shutdown 보다 먼저 실행되어 남은 레코드를 기록
+
+    # print/예외 traceback 도 로그 파일에 남도록 stdout, stderr 를 TeeStream으로 교체
+    # (터미널에는 직접, 파일에는 logging 큐를 거쳐 기록 / 원본 스트림이 None이면 제외)
+    stream_logger = logging.getLogger("stdio")
+    stream_logger.propagate = False
+    stream_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    sys.stdout = TeeStream(sys.__stdout__, LoggerStream(stream_logger, logging.INFO))
+    sys.stderr = TeeStream(sys.__stderr__, LoggerStream(stream_logger, logging.ERROR))
 
     logging.debug("Logging initialized.")
@@ -1,18 +1,56 @@
 import sys
 import logging # logging 임포트 추가
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtGui import QIcon # QIcon 임포트 추가
-from PyQt5.QtCore import Qt # Qt 임포트 추가
-from log_setup import setup_logging
-from gui import TextReplacerSettingsWindow # GUI 윈도우 임포트
-from keyboard_listener import KeyboardListener # KeyboardListener 임포트
-from config_manager import ConfigManager # ConfigManager 임포트
+import multiprocessing # 훅 프로세스 모드 (PyInstaller 빌드 지원)
 
-setup_logging() # 로그 설정 먼저 호출
+if __name__ == '__main__':
+    # PyInstaller로 빌드된 exe에서 훅 프로세스(spawn)가 다시 앱 전체를 실행하지 않도록 가장 먼저 호출
+    multiprocessing.freeze_support()
+
+# <<< /headless 인자가 있으면 PyQt5를 임포트하기 전에 헤드리스 데몬으로 분기 >>>
+if __name__ == '__main__' and "/headless" in sys.argv:
+    from headless import main as headless_main
+    sys.exit(headless_main(sys.argv))
+
+# <<< /batch 인자가 있으면 GUI 없이 파일/표준 입력에 규칙을 적용하는 일괄 변환 도구로 분기 (/batch 뒤의 인자를 그대로 전달) >>>
+if __name__ == '__main__' and "/batch" in sys.argv:
+    from batch_transform import main as batch_main
+    sys.exit(batch_main(sys.argv[sys.argv.index("/batch") + 1:]))
 
 # CONFIG_FILE = "rules.json" # 설정 파일 경로 -> ConfigManager 내부에서 결정하므로 제거
 
 if __name__ == '__main__':
+    # 훅 프로세스(spawn)는 이 모듈을 __mp_main__ 으로 다시 실행하므로, PyQt5/GUI 모듈은 여기서만 임포트
+    # (훅 프로세스는 hook_process 에서 필요한 모듈만 임포트해 가볍게 시작)
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtGui import QIcon # QIcon 임포트 추가
+    from PyQt5.QtCore import Qt # Qt 임포트 추가
+    from log_setup import setup_logging
+    from gui import TextReplacerSettingsWindow # GUI 윈도우 임포트
+    from keyboard_listener import KeyboardListener # KeyboardListener 임포트
+    from config_manager import ConfigManager # ConfigManager 임포트
+    from usage_stats import UsageStats # 규칙 사용 통계
+    from hook_process import HookProcessListener # 키보드 훅을 별도 프로세스에서 실행 (선택)
+    from suggestions import SuggestionEngine # 키워드 접두사 추천 (선택)
+    from pynput import keyboard # 추천 수락 키 이름 -> Key
+    from single_instance import SingleInstance, parse_instance_commands # 중복 실행 방지 및 명령 전달
+
+    # 로그 설정 먼저 호출 (훅 프로세스가 이 모듈을 임포트할 때는 로그 파일을 열지 않도록 __main__ 안에서)
+    setup_logging()
+    logging.info(f"Command line arguments: {sys.argv}")
+
+    # ConfigManager 인스턴스 생성 (설정 디렉토리의 잠금 파일로 중복 실행 확인)
+    config_manager = ConfigManager()
+    instance_commands = parse_instance_commands(sys.argv)
+    single_instance = SingleInstance(config_manager.app_config_dir)
+    if not single_instance.acquire():
+        # 이미 실행 중이면 훅을 하나 더 설치하지 않고 명령(창 표시/재로드/프로필 전환)만 전달한 뒤 바로 종료
+        forwarded = single_instance.forward(instance_commands)
+        sys.exit(0 if forwarded else 1)
+    # 첫 실행의 /profile 은 규칙을 로드하기 전에 적용 (/reload, 창 표시는 시작 시 자동으로 이루어짐)
+    for command, *args in instance_commands:
+        if command == "profile" and config_manager.switch_profile(args[0]) is None:
+            logging.warning(f"Could not switch to rule profile '{args[0]}' from the command line.")
+
     # DPI 스케일링 활성화 (QApplication 생성 전 호출)
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling) 
     
@@ -23,13 +61,13 @@ if __name__ == '__main__':
 
     # <<< 시작 시 트레이 모드로 실행할지 결정 >>>
     start_in_tray_mode = "/tray" in sys.argv
-    logging.info(f"Command line arguments: {sys.argv}")
     logging.info(f"Start in tray mode evaluated to: {start_in_tray_mode}")
 
-    # ConfigManager 인스턴스 생성 및 전체 설정 로드
-    config_manager = ConfigManager()
+    # 전체 설정 로드
     config = config_manager.load_config()
-    initial_rules = config.get("rules", {}) # rules 키가 없으면 빈 딕셔너리
+    # 전역/앱별/그룹 규칙을 하나의 RuleSet으로 (긴 치환 텍스트는 blob 파일로 분리, 리스너와 GUI가 공유)
+    rule_set = config_manager.load_rule_set(config)
+    initial_rules = rule_set # 전역 규칙 (RuleSet 자체가 전역 규칙 Mapping)
     initial_settings = config.get("settings", {}) # settings 키가 없으면 빈 딕셔너리
     start_on_boot_setting = initial_settings.get("start_on_boot", False) # start_on_boot 없으면 False
     
@@ -39,8 +77,38 @@ if __name__ == '__main__':
     # TODO: 로드된 start_on_boot_setting 값에 따라 실제 시작 프로그램 등록/해제 로직 수행
     # (예: update_startup_registry(start_on_boot_setting))
 
-    # KeyboardListener 인스턴스 생성 시 로드된 규칙 전달
-    kb_listener = KeyboardListener(rules=initial_rules)
+    # 규칙 사용 통계 로드 및 주기적 저장 시작
+    usage_stats = UsageStats(config_manager.usage_stats_file_path)
+    usage_stats.load()
+    usage_stats.start()
+
+    # 훅 프로세스 모드: 키보드 훅을 자식 프로세스에서 실행해 GUI 작업과 GIL을 다투지 않도록 함
+    use_hook_process = initial_settings.get("hook_process", False) or "/hookprocess" in sys.argv
+    listener_class = HookProcessListener if use_hook_process else KeyboardListener
+    logging.info(f"Hook process mode: {use_hook_process}")
+
+    # 키워드 접두사 추천: 팝업은 GUI 프로세스에 있으므로 리스너가 같은 프로세스에서 돌 때만 지원
+    suggestion_engine = None
+    if initial_settings.get("suggestions_enabled", False):
+        if use_hook_process:
+            logging.warning("Keyword suggestions are not available in hook process mode. Suggestions disabled.")
+        else:
+            suggestion_engine = SuggestionEngine(usage_stats=usage_stats,
+                                                 min_prefix=initial_settings.get("suggestion_min_prefix", 2),
+                                                 limit=initial_settings.get("suggestion_count", 5))
+            suggestion_engine.start()
+    listener_options = {"suggestions": suggestion_engine} if suggestion_engine is not None else {}
+
+    # 리스너 인스턴스 생성 시 로드된 규칙 전달
+    kb_listener = listener_class(rules=initial_rules, scoped_rules=rule_set.scope_views(), groups=rule_set.group_configs(),
+                                 usage_stats=usage_stats, **listener_options) # 자동 교정 목록은 창 생성 후 백그라운드에서 로드
+    if suggestion_engine is not None:
+        accept_key_name = initial_settings.get("suggestion_accept_key", "f8")
+        accept_key = getattr(keyboard.Key, accept_key_name, None)
+        if accept_key is not None:
+            kb_listener.suggestion_accept_key = accept_key
+        else:
+            logging.warning(f"Unknown suggestion accept key '{accept_key_name}'. Using {kb_listener.suggestion_accept_key.name}.")
     kb_listener.start()
     logging.info("Keyboard listener started from main with loaded rules.")
 
@@ -53,6 +121,12 @@ if __name__ == '__main__':
     )
     # window.show() # <<< 시작 시 창을 보여주도록 변경 -> 조건부 호출로 변경
 
+    # 자동 교정 목록 로드: 처음 실행 시 텍스트 목록에서 그래프를 빌드하므로 트레이/창 표시를 막지 않도록 백그라운드에서
+    window.load_autocorrect_in_background(config)
+
+    # 이후 실행에서 전달되는 명령은 GUI 스레드에서 처리 (시그널로 전달)
+    single_instance.start(lambda command, *args: window.instance_command_received.emit(command, list(args)))
+
     # <<< 트레이 모드 시작 여부에 따라 창 표시 결정 >>>
     if not start_in_tray_mode:
         window.show()
@@ -68,5 +142,12 @@ if __name__ == '__main__':
     if kb_listener and kb_listener.is_running():
         logging.info("Stopping keyboard listener before exiting...")
         kb_listener.stop()
+
+    if suggestion_engine is not None:
+        suggestion_engine.stop()
+
+    # 남은 사용 통계 저장
+    usage_stats.stop()
+    single_instance.release()
         
     sys.exit(exit_code)
@@ -0,0 +1,277 @@
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+
+# 차등 테스트(differential testing) 도구:
+# 무작위 규칙/키 입력 스트림을 만들어 선형 탐색 참조 구현과 실제 KeyboardListener(RuleIndex)를 나란히 실행하고,
+# 결과가 다르면 최소화한 재현 케이스를 출력합니다.
+# 사용법: python match_oracle.py --events 1000000 --seed 1 --out repro.json
+
+ALPHABET = "ab!.x가" # 접미사가 자주 겹치도록 작은 알파벳 사용 (완성형 음절 포함, 자모 조합은 hangul_composer 자체 테스트에서 검증)
+MAX_KEYWORD_LENGTH = 8
+APP_NAMES = ("code.exe", "chat.exe") # 포커스 전환 이벤트에 쓰는 앱 이름 (앱별 규칙 키는 대소문자를 섞어 생성)
+
+def _buffer_limit(max_keyword_length):
+    """KeyboardListener._calculate_max_buffer_size 와 같은 버퍼 크기 정책"""
+    return max_keyword_length + 5 if max_keyword_length else 10
+
+class ReferenceMatcher:
+    """
+    인덱스 없이 규칙을 순서대로 endswith()로 검사하는 참조 구현 (원래 _check_for_replacement 의미)
+
+    검사 순서: 포커스 앱의 규칙 -> 전역 규칙 -> 활성 그룹(설정 순서). 먼저 일치하는 층의,
+    그 층에서 규칙 순서상 처음 일치한 키워드를 사용합니다 (빈 키워드가 선택되면 치환 없음).
+    버퍼 정책(문자 추가, 최대 크기 초과 시 앞부분 제거, 백스페이스, 트리거 시 초기화)도 리스너와 같습니다.
+    """
+
+    def __init__(self, rules, scoped_rules, groups):
+        self.rules = rules
+        self.scoped_rules = {app_name.lower(): app_rules for app_name, app_rules in scoped_rules.items()}
+        self.groups = {name: {"enabled": group.get("enabled", True), "rules": group["rules"]} for name, group in groups.items()}
+        self.active_app = None
+        self.buffer = ""
+        self.max_buffer_size = self._max_buffer_size()
+
+    def _max_buffer_size(self):
+        layers = [self.rules] + list(self.scoped_rules.values()) + [g["rules"] for g in self.groups.values() if g["enabled"]]
+        return _buffer_limit(max((len(keyword) for layer in layers for keyword in layer), default=0))
+
+    def _layers(self):
+        layers = []
+        if self.active_app in self.scoped_rules and self.scoped_rules[self.active_app]:
+            layers.append(self.scoped_rules[self.active_app])
+        layers.append(self.rules)
+        layers.extend(g["rules"] for g in self.groups.values() if g["enabled"])
+        return layers
+
+    def _check(self):
+        if not self.buffer:
+            return None
+        for layer in self._layers():
+            for keyword, text in layer.items():
+                if self.buffer.endswith(keyword):
+                    # 원래 구현과 같이 빈 키워드가 먼저 일치하면 검사를 멈추고 치환하지 않음
+                    return (keyword, text) if keyword else None
+        return None
+
+    def feed(self, event):
+        """이벤트 하나를 처리합니다. 트리거면 일치 결과 (키워드, 치환 텍스트) 또는 None 반환."""
+        kind = event[0]
+        if kind == "key":
+            self.buffer += event[1]
+            if len(self.buffer) > self.max_buffer_size:
+                self.buffer = self.buffer[-self.max_buffer_size:]
+        elif kind == "backspace":
+            self.buffer = self.buffer[:-1]
+        elif kind == "trigger":
+            match = self._check()
+            self.buffer = ""
+            return match
+        elif kind == "focus":
+            self.active_app = event[1]
+        elif kind == "toggle":
+            if event[1] in self.groups:
+                self.groups[event[1]]["enabled"] = event[2]
+                self.max_buffer_size = self._max_buffer_size()
+        return None
+
+class EngineRunner:
+    """실제 KeyboardListener 에 키 이벤트를 재생하는 래퍼 (치환 시뮬레이션 대신 결과만 기록)"""
+
+    def __init__(self, rules, scoped_rules, groups):
+        from pynput.keyboard import Key, KeyCode
+        from keyboard_listener import KeyboardListener
+        from window_provider import FakeActiveWindowProvider
+        self._key_space = Key.space
+        self._key_backspace = Key.backspace
+        self._key_codes = {}
+        self._key_code_class = KeyCode
+        self.window_provider = FakeActiveWindowProvider()
+        self.listener = KeyboardListener(rules=rules, scoped_rules=scoped_rules, groups=groups,
+                                         window_provider=self.window_provider)
+        self._last_match = None
+        self.listener._perform_replacement = self._record_replacement
+
+    def _record_replacement(self, keyword, replacement_text, plan=None):
+        self._last_match = (keyword, replacement_text)
+
+    @property
+    def buffer(self):
+        return self.listener.buffer
+
+    def feed(self, event):
+        kind = event[0]
+        if kind == "key":
+            key = self._key_codes.get(event[1])
+            if key is None:
+                key = self._key_codes[event[1]] = self._key_code_class.from_char(event[1])
+            self.listener._on_press(key)
+        elif kind == "backspace":
+            self.listener._on_press(self._key_backspace)
+        elif kind == "trigger":
+            self._last_match = None
+            self.listener._on_press(self._key_space)
+            return self._last_match
+        elif kind == "focus":
+            self.window_provider.set_active_app(event[1])
+        elif kind == "toggle":
+            self.listener.set_group_enabled(event[1], event[2])
+        return None
+
+def _random_rules(rng, count, label):
+    rules = {}
+    for i in range(count):
+        if rng.random() < 0.01:
+            keyword = "" # 빈 키워드 (endswith("")는 항상 참)
+        else:
+            keyword = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, MAX_KEYWORD_LENGTH)))
+        rules.setdefault(keyword, f"{label}{i}")
+    return rules
+
+def random_case(rng, event_count):
+    """무작위 규칙 집합과 키 이벤트 스트림 하나를 만듭니다."""
+    rules = _random_rules(rng, rng.randint(0, 30), "g")
+    scoped_rules = {}
+    for app_name in APP_NAMES[:rng.randint(0, len(APP_NAMES))]:
+        scoped_rules[app_name.capitalize() if rng.random() < 0.5 else app_name] = _random_rules(rng, rng.randint(0, 10), f"{app_name}:")
+    groups = {f"grp{i}": {"enabled": rng.random() < 0.5, "rules": _random_rules(rng, rng.randint(0, 10), f"grp{i}:")}
+              for i in range(rng.randint(0, 3))}
+
+    events = []
+    while len(events) < event_count:
+        roll = rng.random()
+        if roll < 0.02:
+            # 트리거 없이 긴 입력 -> 버퍼 최대 크기 초과
+            events.extend(("key", rng.choice(ALPHABET)) for _ in range(rng.randint(15, 40)))
+        elif roll < 0.10:
+            events.append(("backspace",))
+        elif roll < 0.22:
+            events.append(("trigger",))
+        elif roll < 0.23:
+            events.append(("focus", rng.choice(APP_NAMES + (None,))))
+        elif roll < 0.24 and groups:
+            events.append(("toggle", rng.choice(list(groups)), rng.random() < 0.5))
+        else:
+            events.append(("key", rng.choice(ALPHABET)))
+    return {"rules": rules, "scoped_rules": scoped_rules, "groups": groups, "events": events[:event_count]}
+
+def _copy_groups(groups):
+    # 토글 이벤트가 그룹 설정을 바꾸므로 실행마다 복사본 사용
+    return {name: {"enabled": group["enabled"], "rules": group["rules"]} for name, group in groups.items()}
+
+def run_case(case):
+    """
+    참조 구현과 실제 엔진을 나란히 실행합니다.
+
+    Returns:
+        dict | None: 첫 번째 차이 (이벤트 번호, 이벤트, 기대/실제 결과와 버퍼). 차이가 없으면 None.
+    """
+    reference = ReferenceMatcher(case["rules"], case["scoped_rules"], _copy_groups(case["groups"]))
+    engine = EngineRunner(case["rules"], case["scoped_rules"], _copy_groups(case["groups"]))
+    for position, event in enumerate(case["events"]):
+        buffer_before = reference.buffer
+        expected = reference.feed(event)
+        actual = engine.feed(event)
+        if expected != actual or reference.buffer != engine.buffer:
+            return {"position": position, "event": event, "buffer_before": buffer_before,
+                    "expected": expected, "actual": actual,
+                    "expected_buffer": reference.buffer, "actual_buffer": engine.buffer}
+    return None
+
+def minimize(case):
+    """
+    차이가 유지되는 범위에서 이벤트와 규칙을 줄여 최소 재현 케이스를 만듭니다 (이벤트는 ddmin 방식).
+    """
+    def fails(candidate):
+        return run_case(candidate) is not None
+
+    case = dict(case)
+    # 첫 차이 이후의 이벤트는 필요 없음
+    case["events"] = case["events"][:run_case(case)["position"] + 1]
+
+    chunk = max(1, len(case["events"]) // 2)
+    while chunk >= 1:
+        start = 0
+        while start < len(case["events"]):
+            candidate = dict(case, events=case["events"][:start] + case["events"][start + chunk:])
+            if candidate["events"] and fails(candidate):
+                case = candidate
+            else:
+                start += chunk
+        chunk //= 2
+
+    # 앱별 규칙/그룹을 통째로 제거해 본 뒤, 규칙을 하나씩 제거해 봄 (전역 -> 앱별 -> 그룹)
+    for app_name in list(case["scoped_rules"]):
+        candidate = dict(case, scoped_rules={k: v for k, v in case["scoped_rules"].items() if k != app_name})
+        if fails(candidate):
+            case = candidate
+    for name in list(case["groups"]):
+        candidate = dict(case, groups={k: v for k, v in case["groups"].items() if k != name},
+                         events=[event for event in case["events"] if not (event[0] == "toggle" and event[1] == name)])
+        if fails(candidate):
+            case = candidate
+    for keyword in list(case["rules"]):
+        candidate = dict(case, rules={k: v for k, v in case["rules"].items() if k != keyword})
+        if fails(candidate):
+            case = candidate
+    for app_name in list(case["scoped_rules"]):
+        for keyword in list(case["scoped_rules"][app_name]):
+            app_rules = {k: v for k, v in case["scoped_rules"][app_name].items() if k != keyword}
+            candidate = dict(case, scoped_rules=dict(case["scoped_rules"], **{app_name: app_rules}))
+            if fails(candidate):
+                case = candidate
+    for name in list(case["groups"]):
+        for keyword in list(case["groups"][name]["rules"]):
+            group = dict(case["groups"][name], rules={k: v for k, v in case["groups"][name]["rules"].items() if k != keyword})
+            candidate = dict(case, groups=dict(case["groups"], **{name: group}))
+            if fails(candidate):
+                case = candidate
+    return case
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Differential test of the keyword matching engine against a linear-scan reference.")
+    parser.add_argument("--events", type=int, default=1_000_000, help="total number of key events to replay")
+    parser.add_argument("--case-events", type=int, default=2000, help="events per random rule set")
+    parser.add_argument("--seed", type=int, default=None, help="random seed (default: time based)")
+    parser.add_argument("--out", default=None, help="write the minimized reproducer to this JSON file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.disable(logging.INFO) # 리스너의 키 단위 로그 비활성화
+
+    seed = args.seed if args.seed is not None else time.time_ns() % 2**32
+    rng = random.Random(seed)
+    print(f"[ORACLE] Seed {seed}, {args.events} events, {args.case_events} events per case.")
+
+    started = time.perf_counter()
+    replayed = 0
+    cases = 0
+    while replayed < args.events:
+        case = random_case(rng, min(args.case_events, args.events - replayed))
+        cases += 1
+        difference = run_case(case)
+        if difference is not None:
+            print(f"[ORACLE] Mismatch in case {cases} at event {difference['position']}: {difference}")
+            reproducer = minimize(case)
+            print(f"[ORACLE] Minimized reproducer ({len(reproducer['events'])} events):")
+            print(json.dumps(reproducer, ensure_ascii=False))
+            print(f"[ORACLE] Difference: {run_case(reproducer)}")
+            if args.out:
+                with open(args.out, 'w', encoding='utf-8') as f:
+                    json.dump(reproducer, f, ensure_ascii=False, indent=4)
+                print(f"[ORACLE] Reproducer written to '{args.out}'.")
+            return 1
+        replayed += len(case["events"])
+        if cases % 100 == 0:
+            elapsed = time.perf_counter() - started
+            print(f"[ORACLE] {replayed} events, {cases} cases, {replayed / elapsed:.0f} events/s")
+
+    elapsed = time.perf_counter() - started
+    print(f"[ORACLE] OK: {replayed} events in {cases} cases matched the reference ({elapsed:.1f}s, {replayed / elapsed:.0f} events/s).")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
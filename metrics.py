@@ -0,0 +1,165 @@
+import json
+import time
+
+class LatencyHistogram:
+    """마이크로초 단위 2의 거듭제곱 버킷으로 지연 시간을 누적하는 가벼운 히스토그램"""
+
+    __slots__ = ("buckets", "count", "total_ns", "max_ns")
+
+    BUCKET_COUNT = 24 # 버킷 i 는 [2^(i-1), 2^i) µs 범위 (마지막 버킷은 약 8초 이상 전부)
+
+    def __init__(self):
+        self.buckets = [0] * self.BUCKET_COUNT
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, elapsed_ns):
+        """측정값 하나를 기록합니다 (나노초). 훅 스레드에서 호출되므로 잠금 없이 정수 연산만 수행."""
+        index = (elapsed_ns // 1000).bit_length()
+        if index >= self.BUCKET_COUNT:
+            index = self.BUCKET_COUNT - 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def percentile_us(self, fraction):
+        """
+        버킷 상한 기준 근사 백분위수(µs)를 반환합니다. 측정값이 없으면 0.
+        상한이 실제 최대값보다 크면 최대값을 반환합니다 (백분위수가 최대값을 넘지 않도록).
+        """
+        if not self.count:
+            return 0
+        target = self.count * fraction
+        seen = 0
+        upper_bound = 1 << (self.BUCKET_COUNT - 1)
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                upper_bound = 1 << index # 버킷 상한 (µs)
+                break
+        max_us = round(self.max_ns / 1000, 1)
+        return upper_bound if upper_bound <= max_us else max_us
+
+    def snapshot(self):
+        """JSON 직렬화 가능한 요약 딕셔너리를 반환합니다."""
+        return {
+            "count": self.count,
+            "mean_us": round(self.total_ns / self.count / 1000, 1) if self.count else 0,
+            "p50_us": self.percentile_us(0.5),
+            "p99_us": self.percentile_us(0.99),
+            "max_us": round(self.max_ns / 1000, 1),
+            "buckets_us": {f"<{1 << i}": n for i, n in enumerate(self.buckets) if n},
+        }
+
+class ListenerMetrics:
+    """KeyboardListener 의 키 처리/치환 런타임 지표 (카운터 + 히스토그램)
+
+    훅 스레드에서는 정수 증가와 perf_counter_ns 호출만 하며,
+    GUI 스레드는 snapshot()으로 값을 읽기만 합니다 (잠금 없음, 약간의 불일치 허용).
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.keys_seen = 0 # 훅이 처리한 사용자 키 입력 수 (시뮬레이션 키 제외)
+        self.buffer_resets = 0 # 트리거/예외 상황으로 버퍼가 초기화된 횟수
+        self.match_checks = 0 # 트리거 시 규칙 매칭을 시도한 횟수
+        self.expansions = 0 # 실제 치환이 수행된 횟수
+        self.hook_restarts = 0 # 감시 스레드가 멈추거나 종료된 pynput 훅을 다시 시작한 횟수
+        self.hits_per_rule = {} # 키워드 -> 치환 횟수
+        self.match_time = LatencyHistogram() # 매칭 검사 소요 시간
+        self.injection_time = LatencyHistogram() # 키 입력 시뮬레이션(치환) 소요 시간
+        self.callback_time = LatencyHistogram() # pynput 훅 콜백 전체 소요 시간 (훅 상태 감시용)
+
+    def record_hit(self, keyword):
+        """규칙 적중을 기록합니다."""
+        self.expansions += 1
+        self.hits_per_rule[keyword] = self.hits_per_rule.get(keyword, 0) + 1
+
+    def reset(self):
+        """모든 지표를 초기화합니다."""
+        self.__init__()
+
+    def summary_text(self):
+        """상태 표시줄용 한 줄 요약을 반환합니다."""
+        return (f"Keys: {self.keys_seen} | Expansions: {self.expansions} | "
+                f"Match p50: {self.match_time.percentile_us(0.5)}µs | "
+                f"Inject p50: {self.injection_time.percentile_us(0.5) / 1000:.1f}ms"
+                + (f" | Hook restarts: {self.hook_restarts}" if self.hook_restarts else ""))
+
+    def snapshot(self):
+        """현재 지표를 JSON 직렬화 가능한 딕셔너리로 반환합니다."""
+        return {
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "keys_seen": self.keys_seen,
+            "buffer_resets": self.buffer_resets,
+            "match_checks": self.match_checks,
+            "expansions": self.expansions,
+            "hook_restarts": self.hook_restarts,
+            "hits_per_rule": dict(self.hits_per_rule), # 복사본 (훅 스레드가 동시에 수정할 수 있음)
+            "match_time": self.match_time.snapshot(),
+            "injection_time": self.injection_time.snapshot(),
+            "callback_time": self.callback_time.snapshot(),
+        }
+
+    def export_state(self):
+        """다른 프로세스로 보낼 원시 지표 값(카운터 + 히스토그램 버킷)을 반환합니다 (pickle 가능)."""
+        histograms = {name: (list(h.buckets), h.count, h.total_ns, h.max_ns)
+                      for name, h in (("match_time", self.match_time), ("injection_time", self.injection_time),
+                                      ("callback_time", self.callback_time))}
+        return {
+            "started_at": self.started_at,
+            "keys_seen": self.keys_seen,
+            "buffer_resets": self.buffer_resets,
+            "match_checks": self.match_checks,
+            "expansions": self.expansions,
+            "hook_restarts": self.hook_restarts,
+            "hits_per_rule": dict(self.hits_per_rule),
+            "histograms": histograms,
+        }
+
+    def load_state(self, state):
+        """export_state()로 받은 값으로 현재 지표를 덮어씁니다 (훅 프로세스 지표를 GUI 쪽에 반영)."""
+        self.started_at = state["started_at"]
+        self.keys_seen = state["keys_seen"]
+        self.buffer_resets = state["buffer_resets"]
+        self.match_checks = state["match_checks"]
+        self.expansions = state["expansions"]
+        self.hook_restarts = state["hook_restarts"]
+        self.hits_per_rule = state["hits_per_rule"]
+        for name, (buckets, count, total_ns, max_ns) in state["histograms"].items():
+            histogram = getattr(self, name)
+            histogram.buckets, histogram.count, histogram.total_ns, histogram.max_ns = buckets, count, total_ns, max_ns
+
+    def dump_json(self, file_path):
+        """스냅샷을 JSON 파일로 저장합니다."""
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=4)
+
+if __name__ == '__main__':
+    # 테스트용 코드
+    metrics = ListenerMetrics()
+    for ns in (500, 1500, 3000, 12000, 900000):
+        metrics.match_time.record(ns)
+    metrics.record_hit("!email")
+    metrics.record_hit("!email")
+    metrics.keys_seen = 42
+    snap = metrics.snapshot()
+    print(json.dumps(snap, indent=4))
+    assert snap["hits_per_rule"]["!email"] == 2
+    assert snap["match_time"]["count"] == 5
+    assert snap["match_time"]["p50_us"] == 4 # 3µs 는 [2,4) 버킷
+    assert snap["match_time"]["p99_us"] == 900.0 # 버킷 상한(1024µs)이 아니라 최대값으로 제한
+    single = LatencyHistogram()
+    single.record(0)
+    assert single.percentile_us(0.5) == 0 # 대기 없는 잠금 획득만 있으면 0µs
+    print(metrics.summary_text())
+
+    mirrored = ListenerMetrics()
+    mirrored.load_state(metrics.export_state())
+    assert mirrored.snapshot()["match_time"] == snap["match_time"]
+    assert mirrored.summary_text() == metrics.summary_text()
+    print("\nListenerMetrics test finished.")
@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from metrics import LatencyHistogram, ListenerMetrics # 훅 지연 시간 구간 계산
+
+PROFILE_SAMPLE_INTERVAL = 0.005 # 스택 샘플링 주기 (초)
+TRACEMALLOC_FRAMES = 10 # tracemalloc 이 할당마다 저장하는 스택 깊이
+TOP_ALLOCATIONS = 30 # 보고서에 남길 메모리 증가 상위 항목 수
+HOOK_STACKS_GRACE = 5.0 # 캡처 시간이 끝난 뒤 훅 프로세스의 스택 샘플을 더 기다리는 시간 (초)
+HOOK_PROCESS_THREAD_PREFIX = "hook-process/" # 훅 프로세스에서 샘플한 스레드 이름 앞에 붙이는 접두사
+
+def _histogram_delta(before, after):
+    """export_state() 히스토그램 두 개의 차이로 캡처 구간의 지연 시간 요약을 만듭니다."""
+    histogram = LatencyHistogram()
+    buckets_before, count_before, total_before, _ = before
+    buckets_after, count_after, total_after, max_after = after
+    histogram.buckets = [a - b for a, b in zip(buckets_after, buckets_before)]
+    histogram.count = count_after - count_before
+    histogram.total_ns = total_after - total_before
+    # 구간 최대값은 따로 알 수 없으므로, 누적 최대값이 구간의 가장 높은 버킷 안에 있을 때만 사용하고 아니면 버킷 상한 사용
+    top = max((i for i, n in enumerate(histogram.buckets) if n), default=None)
+    histogram.max_ns = 0 if top is None else min(max_after, (1 << top) * 1000)
+    return histogram.snapshot()
+
+def sample_stacks(duration, interval=PROFILE_SAMPLE_INTERVAL, thread_prefix=""):
+    """
+    duration 동안 현재 프로세스의 모든 스레드(호출한 스레드 제외) 스택을 샘플링합니다.
+
+    Returns:
+        tuple: (접힌(folded) 스택 -> 횟수 Counter, 샘플 횟수, 스레드 ID -> 이름). 스레드 이름에는 thread_prefix 가 붙습니다.
+    """
+    own_ident = threading.get_ident()
+    stacks = Counter()
+    thread_names = {}
+    sample_count = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            name = thread_prefix + names.get(ident, f"thread-{ident}")
+            thread_names[ident] = name
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            frames.append(name)
+            stacks[";".join(reversed(frames))] += 1
+        sample_count += 1
+        time.sleep(interval)
+    return stacks, sample_count, thread_names
+
+class ProfileCapture:
+    """
+    지정한 시간 동안 프로세스의 모든 스레드 스택 샘플, tracemalloc 스냅샷, 훅 지연 시간을 기록해
+    설정 디렉토리의 타임스탬프 폴더(profile_YYYYmmdd_HHMMSS)에 저장하는 클래스
+
+    캡처 중이 아닐 때는 아무 훅도 설치하지 않으므로 오버헤드가 없습니다
+    (샘플링 스레드와 tracemalloc 은 캡처 동안에만 동작).
+    훅 프로세스 모드(HookProcessListener)에서는 pynput 스레드가 자식 프로세스에 있으므로 자식에게도 같은 시간 동안
+    스택 샘플링을 요청해 HOOK_PROCESS_THREAD_PREFIX 를 붙여 합칩니다 (tracemalloc 은 이 프로세스만 기록).
+    """
+
+    def __init__(self, output_dir, listener=None, duration=10.0, interval=PROFILE_SAMPLE_INTERVAL):
+        """
+        Args:
+            output_dir (str): 번들 폴더를 만들 디렉토리 (보통 설정 디렉토리).
+            listener: 지연 시간 지표를 읽을 리스너 (metrics.export_state() 제공, 없으면 생략).
+            duration (float): 캡처 시간 (초).
+            interval (float): 스택 샘플링 주기 (초).
+        """
+        self.output_dir = output_dir
+        self.listener = listener
+        self.duration = duration
+        self.interval = interval
+        self.bundle_path = None # 완료 후 번들 폴더 경로
+        self.error = None # 실패 시 예외
+        self._thread = None
+
+    def start(self):
+        """백그라운드 스레드에서 캡처를 시작합니다."""
+        if self.is_running():
+            logging.warning("[PROFILE] Capture already running.")
+            return
+        self.bundle_path = None
+        self.error = None
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ProfileCaptureThread")
+        self._thread.start()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _metrics_state(self):
+        metrics = getattr(self.listener, "metrics", None)
+        return metrics.export_state() if metrics is not None else None
+
+    def _run(self):
+        started_tracemalloc = not tracemalloc.is_tracing()
+        try:
+            logging.info(f"[PROFILE] Capturing for {self.duration}s (sample interval {self.interval * 1000:.0f}ms)...")
+            if started_tracemalloc:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            snapshot_before = tracemalloc.take_snapshot()
+            metrics_before = self._metrics_state()
+            capture_hook_stacks = getattr(self.listener, "capture_stacks", None) # 훅 프로세스 모드
+            hook_stacks_requested = capture_hook_stacks is not None and capture_hook_stacks(self.duration, self.interval)
+
+            stacks, sample_count, thread_names = self._sample()
+            hook_process = None
+            if capture_hook_stacks is not None:
+                hook_process = self._merge_hook_stacks(hook_stacks_requested, stacks, thread_names)
+
+            snapshot_after = tracemalloc.take_snapshot()
+            metrics_after = self._metrics_state()
+            self.bundle_path = self._write_bundle(stacks, sample_count, thread_names, snapshot_before, snapshot_after,
+                                                  metrics_before, metrics_after, hook_process)
+            logging.info(f"[PROFILE] Capture written to '{self.bundle_path}'.")
+        except Exception as e:
+            self.error = e
+            logging.error(f"[PROFILE] Profile capture failed: {e}", exc_info=True)
+        finally:
+            if started_tracemalloc:
+                tracemalloc.stop() # 캡처가 켠 경우에만 끔 (캡처 후 오버헤드 없음)
+
+    def _sample(self):
+        """duration 동안 모든 스레드(자기 자신 제외)의 스택을 샘플링합니다. 접힌(folded) 스택 -> 횟수를 반환."""
+        return sample_stacks(self.duration, self.interval)
+
+    def _merge_hook_stacks(self, requested, stacks, thread_names):
+        """훅 프로세스의 스택 샘플을 받아 합치고, summary.json 에 남길 훅 프로세스 캡처 상태를 반환합니다."""
+        result = self.listener.collect_stacks(HOOK_STACKS_GRACE) if requested else None
+        if result is None:
+            reason = "no reply from hook process" if requested else "hook process not running"
+            logging.warning(f"[PROFILE] Listener stacks are missing from this capture: {reason}.")
+            return {"stacks": False, "reason": reason}
+        hook_stacks, hook_sample_count, hook_thread_names = result
+        stacks.update(hook_stacks)
+        for ident, name in hook_thread_names.items():
+            thread_names[("hook", ident)] = name
+        return {"stacks": True, "samples": hook_sample_count}
+
+    def _write_bundle(self, stacks, sample_count, thread_names, snapshot_before, snapshot_after, metrics_before, metrics_after,
+                      hook_process=None):
+        bundle_path = os.path.join(self.output_dir, f"profile_{time.strftime('%Y%m%d_%H%M%S')}")
+        os.makedirs(bundle_path, exist_ok=True)
+
+        # 1. 스택 샘플 (flamegraph.pl / speedscope 에서 바로 열 수 있는 folded 형식)
+        with open(os.path.join(bundle_path, "stacks.folded"), 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        # 스레드별 가장 많이 샘플된 함수 (스택 맨 위 프레임 기준)
+        per_thread = {}
+        for stack, count in stacks.items():
+            parts = stack.split(";")
+            per_thread.setdefault(parts[0], Counter())[parts[-1]] += count
+        with open(os.path.join(bundle_path, "stacks_top.txt"), 'w', encoding='utf-8') as f:
+            for thread_name, leaf_counts in per_thread.items():
+                total = sum(leaf_counts.values())
+                f.write(f"== {thread_name} ({total} samples) ==\n")
+                for leaf, count in leaf_counts.most_common(15):
+                    f.write(f"{count / total * 100:6.1f}%  {leaf}\n")
+                f.write("\n")
+
+        # 2. tracemalloc: 캡처 동안의 메모리 증가 상위 항목 + 종료 시점 스냅샷 (python -m tracemalloc 등으로 분석)
+        with open(os.path.join(bundle_path, "tracemalloc_top.txt"), 'w', encoding='utf-8') as f:
+            f.write(f"Traced memory at end: {tracemalloc.get_traced_memory()[0] / 1024:.1f} KiB\n\n")
+            for stat in snapshot_after.compare_to(snapshot_before, "lineno")[:TOP_ALLOCATIONS]:
+                f.write(f"{stat}\n")
+        snapshot_after.dump(os.path.join(bundle_path, "tracemalloc_end.snapshot"))
+
+        # 3. 훅 지연 시간 (리스너 지표의 캡처 전후 차이)
+        latency = None
+        if metrics_before is not None and metrics_after is not None:
+            if metrics_before["started_at"] != metrics_after["started_at"]:
+                metrics_before = ListenerMetrics().export_state() # 캡처 중 지표가 초기화됨 (훅 프로세스 재시작 등)
+            latency = {
+                "keys_seen": metrics_after["keys_seen"] - metrics_before["keys_seen"],
+                "match_checks": metrics_after["match_checks"] - metrics_before["match_checks"],
+                "expansions": metrics_after["expansions"] - metrics_before["expansions"],
+            }
+            for name, after in metrics_after["histograms"].items():
+                latency[name] = _histogram_delta(metrics_before["histograms"][name], after)
+
+        summary = {
+            "captured_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_s": self.duration,
+            "sample_interval_ms": self.interval * 1000,
+            "samples": sample_count,
+            "threads": sorted(set(thread_names.values())),
+            "hook_latency": latency,
+        }
+        if hook_process is not None:
+            summary["hook_process"] = hook_process # 훅 프로세스 스택 포함 여부 (빠졌으면 그 이유)
+        with open(os.path.join(bundle_path, "summary.json"), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=4)
+        return bundle_path
+
+if __name__ == '__main__':
+    # 테스트용 코드
+    import tempfile
+    logging.basicConfig(level=logging.INFO)
+
+    def busy_worker(stop_event):
+        data = []
+        while not stop_event.is_set():
+            data.append("x" * 100)
+            sum(range(1000))
+
+    stop_event = threading.Event()
+    worker = threading.Thread(target=busy_worker, args=(stop_event,), name="BusyWorker", daemon=True)
+    worker.start()
+    capture = ProfileCapture(tempfile.mkdtemp(), duration=0.5)
+    capture.start()
+    capture._thread.join()
+    stop_event.set()
+    assert capture.error is None and not tracemalloc.is_tracing()
+    print(open(os.path.join(capture.bundle_path, "stacks_top.txt"), encoding='utf-8').read())
+    assert "BusyWorker" in json.load(open(os.path.join(capture.bundle_path, "summary.json")))["threads"]
+    print("ProfileCapture test finished.")
@@ -0,0 +1,111 @@
+class RuleIndex:
+    """키워드 접미사 매칭용으로 컴파일된 규칙 인덱스 (생성 후 변경하지 않음)
+
+    규칙을 하나씩 endswith()로 검사하는 대신, 존재하는 키워드 길이별로
+    버퍼 끝 조각을 딕셔너리에서 찾습니다. 비용은 규칙 수가 아니라
+    서로 다른 키워드 길이 수에 비례합니다.
+    여러 키워드가 동시에 일치하면 기존 동작과 같이 규칙 순서상 먼저 나온 키워드를 사용합니다.
+    치환 텍스트는 복사하지 않고 일치했을 때만 원본 매핑에서 읽습니다 (지연 로드 매핑 지원).
+    """
+
+    __slots__ = ("name", "_rules", "_entries", "_lengths", "max_keyword_length", "plans")
+
+    def __init__(self, rules, name="global"):
+        """
+        Args:
+            rules (Mapping): 키워드 -> 치환 텍스트 (삽입 순서가 우선순위).
+            name (str): 로그/디버깅용 인덱스 이름 (예: "global", 앱 이름).
+        """
+        self.name = name
+        self._rules = rules
+        # 키워드 -> 규칙 순서. RuleSet/RuleSetView 는 위치 딕셔너리를 그대로 공유 (위치가 곧 규칙 순서)
+        # 일반 Mapping은 키워드만 순회해 새로 만듦 (본문을 읽지 않음)
+        positions = getattr(rules, "positions", None)
+        self._entries = positions if positions is not None else {keyword: order for order, keyword in enumerate(rules)}
+        self._lengths = tuple(sorted({len(keyword) for keyword in self._entries}))
+        self.max_keyword_length = self._lengths[-1] if self._lengths else 0
+        # 키워드 -> 치환 키 입력 계획 (KeyPlan). 처음 치환할 때 리스너가 채우며, 인덱스와 함께 재사용/해제됨
+        self.plans = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, keyword):
+        return keyword in self._entries
+
+    def keywords(self):
+        """인덱스에 포함된 키워드 목록을 반환합니다."""
+        return self._entries.keys()
+
+    def keyword_orders(self):
+        """키워드 -> 규칙 순서 매핑을 반환합니다 (읽기 전용으로 사용, RuleSet 이면 위치 딕셔너리 자체)."""
+        return self._entries
+
+    def keyword_lengths(self):
+        """인덱스에 있는 서로 다른 키워드 길이를 오름차순 튜플로 반환합니다."""
+        return self._lengths
+
+    def match(self, buffer):
+        """
+        버퍼가 어떤 키워드로 끝나는지 확인합니다.
+
+        Returns:
+            tuple | None: 일치 시 (키워드, 치환 텍스트), 없으면 None.
+        """
+        entries = self._entries
+        buffer_len = len(buffer)
+        best = None
+        best_keyword = None
+        for length in self._lengths:
+            if length > buffer_len:
+                break
+            keyword = buffer[buffer_len - length:] # length가 0이면 빈 문자열
+            order = entries.get(keyword)
+            if order is not None and (best is None or order < best):
+                best = order
+                best_keyword = keyword
+        if best is None:
+            return None
+        try:
+            return best_keyword, self._rules[best_keyword]
+        except KeyError: # 본문을 읽을 수 없음 (RuleSet 의 blob 파일이 삭제된 경우 등) -> 치환하지 않음
+            return None
+
+    @classmethod
+    def for_rules(cls, rules, name="global"):
+        """
+        규칙 매핑의 인덱스를 반환합니다. RuleSet/RuleSetView 는 처음 만든 인덱스를 compiled_index 에 보관해
+        같은 규칙 집합으로 다시 전환할 때(프로필 전환 등) 재컴파일하지 않습니다.
+        """
+        cached = getattr(rules, "compiled_index", None)
+        if cached is not None and cached.name == name:
+            return cached
+        index = cls(rules, name=name)
+        if hasattr(rules, "compiled_index"):
+            rules.compiled_index = index
+        return index
+
+    @classmethod
+    def build_scoped(cls, scoped_rules):
+        """
+        앱 이름 -> 규칙 딕셔너리를 앱 이름 -> RuleIndex 로 컴파일합니다.
+        앱 이름은 소문자로 정규화됩니다 (예: "Code.exe" -> "code.exe").
+        """
+        return {app_name.lower(): cls.for_rules(rules, name=app_name.lower())
+                for app_name, rules in (scoped_rules or {}).items() if rules}
+
+if __name__ == '__main__':
+    # 테스트용 코드
+    index = RuleIndex({"mail": "M", "!email": "E", "btw": "by the way"})
+    assert index.match("my !email") == ("mail", "M") # 규칙 순서상 먼저인 키워드 우선 (기존 동작)
+    assert index.match("xbtw") == ("btw", "by the way")
+    assert index.match("bt") is None
+    assert index.match("") is None
+    assert RuleIndex({"": "empty"}).match("abc") == ("", "empty") # endswith("")와 동일한 동작
+    assert index.max_keyword_length == 6
+
+    scoped = RuleIndex.build_scoped({"Code.exe": {"!fn": "def "}, "empty.exe": {}})
+    assert list(scoped) == ["code.exe"]
+    assert scoped["code.exe"].match("x!fn") == ("!fn", "def ")
+    assert RuleIndex.for_rules({"a": "b"}) is not RuleIndex.for_rules({"a": "b"}) # 일반 dict는 캐시하지 않음
+    print("RuleIndex test finished.")
@@ -0,0 +1,175 @@
+import time
+import heapq
+import logging
+import tracemalloc
+from rule_index import RuleIndex # 저장 전 실제 매칭 인덱스를 미리 컴파일
+from hangul_composer import HangulComposer, CHOSEONG_INDEX, JUNGSEONG_INDEX, JONGSEONG_INDEX # 한글 키워드가 입력 가능한지 확인
+from keyboard_listener import KeyboardListener # 버퍼 크기 정책, 치환 시간 추정
+
+SLOW_INJECTION_SECONDS = 1.0 # 이보다 오래 걸릴 것으로 추정되는 치환은 경고
+LONGEST_REPLACEMENTS_REPORTED = 3 # 보고서에 남길 가장 긴 치환 수
+CONFLICTS_LISTED = 10 # 상세 보고서에 나열할 충돌 수
+_JAMO = frozenset(CHOSEONG_INDEX) | frozenset(JUNGSEONG_INDEX) | frozenset(JONGSEONG_INDEX)
+
+def _keyword_error(keyword, replacement):
+    """매칭 엔진에서 동작할 수 없는 규칙이면 사유를, 아니면 None을 반환합니다."""
+    if not isinstance(keyword, str) or not isinstance(replacement, str):
+        return "keyword and replacement must be text"
+    if not keyword:
+        return "empty keyword matches every input and blocks the rules after it"
+    if any(char.isspace() for char in keyword):
+        return "keyword contains whitespace (Space is the trigger key, so it can never be typed)"
+    if not keyword.isprintable():
+        return "keyword contains control characters that cannot be typed"
+    if _JAMO.isdisjoint(keyword):
+        return None
+    # 자모가 있으면 IME 조합 결과가 키워드와 같은지 확인 (예: "ㄱㅏ" 는 입력하면 "가"가 됨)
+    composer = HangulComposer()
+    typed = ""
+    for char in keyword:
+        typed = composer.feed(typed, char)
+    if typed != keyword:
+        return f"Hangul IME composes this keyword as '{typed}', so it can never match"
+    return None
+
+class RuleCompileReport:
+    """규칙 저장 시 컴파일 단계의 결과 (오류, 인덱스 비용, 충돌, 치환 시간 추정)"""
+
+    def __init__(self):
+        self.rule_count = 0
+        self.errors = [] # (키워드, 사유) - 하나라도 있으면 저장하지 않음
+        self.build_ms = 0.0 # RuleIndex 생성 시간
+        self.index_bytes = 0 # RuleIndex 가 새로 할당해 유지하는 메모리 (tracemalloc 측정, 키워드 문자열은 규칙과 공유하므로 제외)
+        self.longest_keyword = ""
+        self.buffer_size = 0 # 리스너 입력 버퍼 최대 크기 (전역 규칙 기준)
+        self.conflicts = [] # (긴 키워드, 그 접미사인 키워드, 긴 키워드가 가려지는지 여부)
+        self.longest_replacements = [] # (키워드, 글자 수, 예상 치환 시간 초), 긴 순서
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    @property
+    def shadowed_count(self):
+        """규칙 순서상 접미사 키워드가 먼저 일치해 절대 치환되지 않는 키워드 수"""
+        return sum(1 for _, _, shadowed in self.conflicts if shadowed)
+
+    def summary_text(self):
+        """상태 표시줄용 한 줄 요약을 반환합니다."""
+        if self.errors:
+            return f"{len(self.errors)} invalid rule(s). Nothing was saved."
+        slowest = self.longest_replacements[0][2] if self.longest_replacements else 0.0
+        return (f"Compiled {self.rule_count} rules in {self.build_ms:.1f} ms ({self.index_bytes / 1024:.1f} KiB) | "
+                f"Buffer: {self.buffer_size} | Conflicts: {len(self.conflicts)} ({self.shadowed_count} shadowed) | "
+                f"Longest expansion: ~{slowest:.2f}s")
+
+    def details_text(self):
+        """여러 줄 상세 보고서를 반환합니다 (툴팁/로그용)."""
+        lines = [f"Rules: {self.rule_count}"]
+        if self.errors:
+            lines.extend(f"ERROR '{keyword}': {reason}" for keyword, reason in self.errors)
+            return "\n".join(lines)
+        lines.append(f"Index build: {self.build_ms:.2f} ms, {self.index_bytes / 1024:.1f} KiB")
+        lines.append(f"Longest keyword: '{self.longest_keyword}' ({len(self.longest_keyword)} chars) -> buffer size {self.buffer_size}")
+        lines.append(f"Conflicts: {len(self.conflicts)} ({self.shadowed_count} shadowed)")
+        for keyword, suffix, shadowed in self.conflicts[:CONFLICTS_LISTED]:
+            state = "never expands" if shadowed else "checked first"
+            lines.append(f"  '{keyword}' ends with '{suffix}' ({state})")
+        if len(self.conflicts) > CONFLICTS_LISTED:
+            lines.append(f"  ... and {len(self.conflicts) - CONFLICTS_LISTED} more")
+        lines.append("Estimated injection time (keystroke typing):")
+        for keyword, length, seconds in self.longest_replacements:
+            warning = " (slow)" if seconds >= SLOW_INJECTION_SECONDS else ""
+            lines.append(f"  '{keyword}': {length} chars, ~{seconds:.2f}s{warning}")
+        return "\n".join(lines)
+
+def _index_retained_bytes(rules, name):
+    """
+    인덱스를 한 번 더 만들어 tracemalloc 으로 새로 할당되어 유지되는 메모리를 잽니다.
+    (빌드 시간에 추적 오버헤드가 섞이지 않도록 시간 측정용 빌드와 분리. 이미 추적 중이면 그대로 둠)
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        index = RuleIndex(rules, name=name)
+        retained = tracemalloc.get_traced_memory()[0] - before
+        del index
+        return max(0, retained)
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+def compile_rules(rules, name="global"):
+    """
+    규칙을 리스너와 같은 방식으로 컴파일해 보고서를 만듭니다 (설정 저장 전 검사용).
+
+    Args:
+        rules (Mapping): 키워드 -> 치환 텍스트 (삽입 순서가 우선순위).
+        name (str): 인덱스 이름 (로그용).
+
+    Returns:
+        RuleCompileReport: errors 가 비어 있지 않으면 저장하면 안 되는 규칙이 있음.
+    """
+    report = RuleCompileReport()
+    report.rule_count = len(rules)
+    lengths = []
+    for keyword, replacement in rules.items():
+        reason = _keyword_error(keyword, replacement)
+        if reason is not None:
+            report.errors.append((keyword, reason))
+            continue
+        lengths.append((len(replacement), keyword))
+    if report.errors:
+        logging.warning(f"[COMPILE] {len(report.errors)} invalid rule(s) in '{name}': {report.errors[:CONFLICTS_LISTED]}")
+        return report
+
+    started = time.perf_counter()
+    index = RuleIndex(rules, name=name)
+    report.build_ms = (time.perf_counter() - started) * 1000
+    report.index_bytes = _index_retained_bytes(rules, name)
+
+    report.longest_keyword = max(index.keywords(), key=len, default="")
+    report.buffer_size = (index.max_keyword_length + KeyboardListener.BUFFER_MARGIN) if index.max_keyword_length else 10
+
+    # 다른 키워드로 끝나는 키워드 찾기 (비용: 규칙 수 x 서로 다른 키워드 길이 수)
+    entries = index.keyword_orders()
+    lengths_present = index.keyword_lengths()
+    for keyword, order in entries.items():
+        for length in lengths_present:
+            if length >= len(keyword):
+                break
+            suffix_order = entries.get(keyword[len(keyword) - length:])
+            if suffix_order is not None:
+                report.conflicts.append((keyword, keyword[len(keyword) - length:], suffix_order < order))
+
+    for length, keyword in heapq.nlargest(LONGEST_REPLACEMENTS_REPORTED, lengths):
+        report.longest_replacements.append((keyword, length, KeyboardListener.estimate_injection_seconds(keyword, rules[keyword])))
+    logging.info(f"[COMPILE] {report.summary_text()}")
+    return report
+
+if __name__ == '__main__':
+    # 테스트용 코드
+    logging.basicConfig(level=logging.INFO)
+    report = compile_rules({"mail": "M", "!email": "E", "btw": "by the way", "xbtw": "x" * 2000, "!long": "y" * 100})
+    print(report.details_text())
+    assert report.ok and report.rule_count == 5
+    assert ("!email", "mail", True) in report.conflicts # "mail" 이 먼저라 "!email" 은 치환되지 않음
+    assert ("xbtw", "btw", True) in report.conflicts and report.shadowed_count == 2
+    assert report.longest_keyword == "!email" and report.buffer_size == 6 + KeyboardListener.BUFFER_MARGIN
+    assert report.longest_replacements[0][0] == "xbtw" and report.longest_replacements[0][2] >= SLOW_INJECTION_SECONDS
+    assert compile_rules({"xbtw": "X", "btw": "B"}).shadowed_count == 0 # 긴 키워드가 먼저면 둘 다 동작
+
+    from rule_set import RuleSet
+    plain_rules = {f"!kw{i}": "x" for i in range(5000)}
+    plain_bytes = compile_rules(plain_rules).index_bytes
+    shared_bytes = compile_rules(RuleSet(plain_rules)).index_bytes
+    print(f"Index memory: plain dict {plain_bytes} bytes, RuleSet {shared_bytes} bytes")
+    assert plain_bytes > 5000 * 8 and shared_bytes < plain_bytes // 10 # RuleSet 은 위치 딕셔너리를 공유
+
+    invalid = compile_rules({"ok": "fine", "": "empty", "two words": "x", "tab\t": "x", "ㄱㅏ": "x", "!감사": "x", "ㄱㅅ": "x"})
+    print(invalid.details_text())
+    assert [keyword for keyword, _ in invalid.errors] == ["", "two words", "tab\t", "ㄱㅏ"]
+    assert not invalid.ok and "Nothing was saved" in invalid.summary_text()
+    print("RuleCompileReport test finished.")
@@ -0,0 +1,290 @@
+import logging
+import threading
+from array import array
+from collections.abc import Mapping
+
+PREVIEW_CHARS = 80 # GUI 테이블 등에 표시할 미리보기 길이 (문자)
+
+SECTION_GLOBAL = "global" # 전역 규칙 섹션 종류
+SECTION_SCOPE = "scope" # 앱별 규칙 섹션 종류
+SECTION_GROUP = "group" # 규칙 그룹 섹션 종류
+
+def make_preview(text, max_chars=PREVIEW_CHARS):
+    """긴 텍스트를 미리보기 길이로 자릅니다 (잘린 경우 끝에 '…')."""
+    return text if len(text) <= max_chars else text[:max_chars] + "…"
+
+class RuleSet(Mapping):
+    """ConfigManager, KeyboardListener, GUI가 복사 없이 공유하는 압축 규칙 표현 (읽기 전용)
+
+    규칙 하나는 정수 위치로 식별되며, 값은 레코드 객체 대신 열 단위 병렬 배열에 저장됩니다.
+      keywords     : 키워드 (섹션 간 같은 키워드는 한 객체로 공유)
+      inline       : 메모리에 둔 짧은 본문 (blob에 있으면 None)
+      blob_offsets : blob 파일 내 본문 오프셋 (-1 이면 inline, blob이 없으면 배열 자체가 None)
+      blob_lengths : blob 파일 내 본문 바이트 길이 (blob이 없으면 None)
+      section_ids  : 소속 섹션 번호 (섹션 표 sections[id] = (종류, 이름))
+    RuleSet 자체는 전역 규칙 섹션의 키워드 -> 본문 Mapping 이며,
+    앱별 규칙/그룹은 section_view()로 얻는 RuleSetView 로 접근합니다.
+    """
+
+    def __init__(self, rules, scoped_rules=None, groups=None, blob_path=None, blob_offsets=None):
+        """
+        Args:
+            rules (Mapping): 전역 규칙 (키워드 -> 치환 텍스트, 순서가 우선순위).
+            scoped_rules (dict): 앱 이름 -> 규칙 딕셔너리.
+            groups (dict): 그룹 이름 -> {"enabled": bool, "rules": dict}.
+            blob_path (str): 전역 규칙의 긴 본문이 저장된 blob 파일 경로.
+            blob_offsets (dict): 키워드 -> (오프셋, 바이트 길이). 여기 있는 전역 규칙 본문은 메모리에 두지 않음.
+        """
+        self.blob_path = blob_path
+        self.keywords = []
+        self.inline = []
+        # blob에 둔 본문이 없으면 오프셋/길이 배열을 만들지 않음 (규칙당 16바이트 절약)
+        self.blob_offsets = array('q') if blob_offsets else None
+        self.blob_lengths = array('q') if blob_offsets else None
+        self.section_ids = array('H')
+        self.sections = [] # 섹션 번호 -> (종류, 이름)
+        self.group_enabled = {} # 그룹 이름 -> 활성화 여부 (설정 파일 값)
+        self._views = {} # (종류, 이름) -> RuleSetView
+        self.compiled_index = None # RuleIndex.for_rules() 가 만든 전역 섹션 인덱스 (재전환 시 재사용)
+        self._read_lock = threading.Lock()
+        # 생성 중에만 쓰는 키워드 공유 표 (sys.intern은 전역 표에 규칙당 항목이 남아 오히려 메모리가 늘어남)
+        self._intern_table = {}
+
+        blob_offsets = blob_offsets or {}
+        # 전역 섹션은 항상 0번이며 위치 0부터 시작하므로 RuleSet 자체의 positions 로 사용
+        self.positions = self._add_section(SECTION_GLOBAL, None, rules, blob_offsets)
+        for app_name, app_rules in (scoped_rules or {}).items():
+            self._views[(SECTION_SCOPE, app_name.lower())] = RuleSetView(
+                self, SECTION_SCOPE, app_name.lower(), self._add_section(SECTION_SCOPE, app_name.lower(), app_rules))
+        for group_name, group in (groups or {}).items():
+            self.group_enabled[group_name] = bool(group.get("enabled", True))
+            self._views[(SECTION_GROUP, group_name)] = RuleSetView(
+                self, SECTION_GROUP, group_name, self._add_section(SECTION_GROUP, group_name, group.get("rules", {})))
+        del self._intern_table
+
+    def _add_section(self, kind, name, rules, blob_offsets=None):
+        """섹션 하나의 규칙을 병렬 배열에 추가하고 키워드 -> 위치 딕셔너리를 반환합니다."""
+        section_id = len(self.sections)
+        self.sections.append((kind, name))
+        positions = {}
+        has_blob = self.blob_offsets is not None
+        intern_table = self._intern_table
+        for keyword in rules:
+            keyword = intern_table.setdefault(keyword, keyword)
+            entry = blob_offsets.get(keyword) if blob_offsets else None
+            positions[keyword] = len(self.keywords)
+            self.keywords.append(keyword)
+            if entry is None:
+                self.inline.append(rules[keyword])
+                if has_blob:
+                    self.blob_offsets.append(-1)
+                    self.blob_lengths.append(0)
+            else:
+                self.inline.append(None)
+                self.blob_offsets.append(entry[0])
+                self.blob_lengths.append(entry[1])
+            self.section_ids.append(section_id)
+        return positions
+
+    # --- pickle 지원 (훅 프로세스로 규칙 전송, 본문은 같은 blob 파일에서 지연 로드) ---
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_read_lock"] # 잠금은 pickle 불가 -> 받는 쪽에서 새로 생성
+        state["compiled_index"] = None # 인덱스는 받는 쪽에서 다시 컴파일
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._read_lock = threading.Lock()
+
+    # --- 전역 섹션 Mapping 인터페이스 ---
+    def __getitem__(self, keyword):
+        return self.body_at(self.positions[keyword]) # 없으면 KeyError
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, keyword):
+        return keyword in self.positions
+
+    # --- 위치 기반 접근 ---
+    def body_at(self, position):
+        """
+        위치의 본문을 반환합니다 (blob에 있으면 그때 파일에서 읽음).
+        blob 파일을 읽을 수 없으면(삭제된 이전 세대 등) KeyError 를 발생시키므로 Mapping.get()은 None 을 반환합니다.
+        """
+        body = self.inline[position]
+        if body is not None:
+            return body
+        data = self._read_bytes(self.blob_offsets[position], self.blob_lengths[position])
+        if data is None:
+            raise KeyError(self.keywords[position])
+        return data.decode('utf-8')
+
+    def _read_bytes(self, offset, length):
+        """blob 파일에서 필요한 구간만 읽습니다 (파일은 열어 두지 않아 교체/삭제가 자유로움). 읽을 수 없으면 None."""
+        try:
+            with self._read_lock:
+                with open(self.blob_path, 'rb') as f:
+                    f.seek(offset)
+                    return f.read(length)
+        except OSError as e:
+            logging.error(f"[RULE_SET] Cannot read replacement body from '{self.blob_path}': {e}")
+            return None
+
+    def section_of(self, position):
+        """위치가 속한 섹션의 (종류, 이름)을 반환합니다."""
+        return self.sections[self.section_ids[position]]
+
+    def is_out_of_line(self, keyword):
+        """전역 규칙 본문이 blob 파일에 저장되어 있는지 여부를 반환합니다."""
+        return self.inline[self.positions[keyword]] is None
+
+    def body_length(self, keyword):
+        """본문을 읽지 않고 전역 규칙 본문의 바이트 길이를 반환합니다."""
+        position = self.positions[keyword]
+        body = self.inline[position]
+        return len(body.encode('utf-8')) if body is not None else self.blob_lengths[position]
+
+    def preview_at(self, position, max_chars=PREVIEW_CHARS):
+        """위치의 본문 앞부분만 읽어 미리보기 문자열을 반환합니다."""
+        body = self.inline[position]
+        if body is None:
+            length = self.blob_lengths[position]
+            # UTF-8 한 문자는 최대 4바이트, 잘린 멀티바이트 문자는 무시
+            data = self._read_bytes(self.blob_offsets[position], min(length, max_chars * 4))
+            if data is None:
+                return ""
+            body = data.decode('utf-8', errors='ignore')
+            if length > max_chars * 4:
+                body += "…"
+        return make_preview(body, max_chars)
+
+    def preview(self, keyword, max_chars=PREVIEW_CHARS):
+        """전역 규칙 본문의 미리보기를 반환합니다."""
+        return self.preview_at(self.positions[keyword], max_chars)
+
+    # --- 섹션 뷰 ---
+    def section_view(self, kind, name):
+        """앱별 규칙/그룹 섹션의 읽기 전용 뷰를 반환합니다 (없으면 None)."""
+        return self._views.get((kind, name))
+
+    def scope_views(self):
+        """앱 이름 -> RuleSetView (복사 없음)."""
+        return {name: view for (kind, name), view in self._views.items() if kind == SECTION_SCOPE}
+
+    def group_configs(self):
+        """KeyboardListener.update_groups()에 넘길 그룹 이름 -> {"enabled", "rules": RuleSetView}."""
+        return {name: {"enabled": self.group_enabled[name], "rules": view}
+                for (kind, name), view in self._views.items() if kind == SECTION_GROUP}
+
+class RuleSetView(Mapping):
+    """RuleSet 의 섹션 하나(앱별 규칙 또는 그룹)를 키워드 -> 본문 Mapping 으로 보여주는 뷰"""
+
+    __slots__ = ("rule_set", "kind", "name", "positions", "compiled_index")
+
+    def __init__(self, rule_set, kind, name, positions):
+        self.rule_set = rule_set
+        self.kind = kind
+        self.name = name
+        self.positions = positions # 키워드 -> RuleSet 위치 (RuleIndex가 그대로 공유)
+        self.compiled_index = None # RuleIndex.for_rules() 가 만든 인덱스
+
+    def __getstate__(self):
+        return (self.rule_set, self.kind, self.name, self.positions)
+
+    def __setstate__(self, state):
+        self.rule_set, self.kind, self.name, self.positions = state
+        self.compiled_index = None
+
+    def __getitem__(self, keyword):
+        return self.rule_set.body_at(self.positions[keyword])
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, keyword):
+        return keyword in self.positions
+
+    def preview(self, keyword, max_chars=PREVIEW_CHARS):
+        return self.rule_set.preview_at(self.positions[keyword], max_chars)
+
+def _measure_bytes(build):
+    """build()가 만든 객체(들)가 새로 할당한 메모리(바이트)를 tracemalloc으로 측정합니다."""
+    import gc
+    import tracemalloc
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+if __name__ == '__main__':
+    # 테스트 + 규칙당 메모리 벤치마크
+    import json
+    from rule_index import RuleIndex
+
+    rule_set = RuleSet({"!a": "A", "!b": "B"},
+                       scoped_rules={"Code.exe": {"!fn": "def "}},
+                       groups={"legal": {"enabled": False, "rules": {"!nda": "NDA"}}})
+    assert list(rule_set) == ["!a", "!b"] and rule_set["!b"] == "B"
+    assert rule_set.scope_views()["code.exe"]["!fn"] == "def "
+    assert rule_set.group_configs()["legal"] == {"enabled": False, "rules": rule_set.section_view(SECTION_GROUP, "legal")}
+    assert rule_set.section_of(rule_set.section_view(SECTION_GROUP, "legal").positions["!nda"]) == (SECTION_GROUP, "legal")
+    assert RuleIndex(rule_set).keyword_orders() is rule_set.positions # 인덱스가 위치 딕셔너리를 공유
+    assert RuleIndex(rule_set).match("x!b") == ("!b", "B")
+    assert RuleIndex.for_rules(rule_set) is RuleIndex.for_rules(rule_set) # 컴파일된 인덱스 재사용
+    import pickle
+    copied, copied_scopes = pickle.loads(pickle.dumps((rule_set, rule_set.scope_views())))
+    assert dict(copied) == dict(rule_set) and copied_scopes["code.exe"].rule_set is copied # 뷰는 같은 RuleSet 공유
+
+    # 규칙당 메모리 (전역 10만 + 앱별 규칙 + 그룹):
+    # 1) 이 변경 이전 ConfigManager 가 로드한 그대로의 일반 dict (json.loads 결과를 리스너/GUI가 공유, 매칭 인덱스 없음)
+    # 2) 1) + 리스너가 섹션마다 만드는 RuleIndex (키워드 -> 순서 dict 를 따로 만듦, RuleSet 직전의 실제 구조)
+    # 3) RuleSet + 위치 딕셔너리를 공유하는 RuleIndex
+    rule_count = 100_000
+    source_json = json.dumps({
+        "rules": {f"!kw{i}": f"replacement text {i}" for i in range(rule_count)},
+        "scoped_rules": {f"app{a}.exe": {f"!s{a}_{i}": f"scoped {i}" for i in range(1000)} for a in range(3)},
+        "groups": {f"group{g}": {"enabled": g == 0, "rules": {f"!g{g}_{i}": f"group text {i}" for i in range(1000)}}
+                   for g in range(2)},
+    })
+    total_rules = rule_count + 3 * 1000 + 2 * 1000
+
+    def build_plain():
+        return json.loads(source_json)
+
+    def build_plain_indexed():
+        config = json.loads(source_json)
+        indexes = [RuleIndex(config["rules"])]
+        indexes += [RuleIndex(rules, name=app) for app, rules in config["scoped_rules"].items()]
+        indexes += [RuleIndex(group["rules"], name=name) for name, group in config["groups"].items()]
+        return config, indexes
+
+    def build_rule_set():
+        config = json.loads(source_json)
+        shared = RuleSet(config["rules"], scoped_rules=config["scoped_rules"], groups=config["groups"])
+        del config # RuleSet 이 내용을 옮겨 담으므로 원본 dict 는 남지 않음
+        indexes = [RuleIndex(shared)] + [RuleIndex(view) for view in shared.scope_views().values()]
+        indexes += [RuleIndex(group["rules"]) for group in shared.group_configs().values()]
+        return shared, indexes
+
+    plain_bytes = _measure_bytes(build_plain)
+    indexed_bytes = _measure_bytes(build_plain_indexed)
+    compact_bytes = _measure_bytes(build_rule_set)
+    print(f"Rules: {total_rules} ({rule_count} global, 3000 app-scoped, 2000 in groups)")
+    print(f"Plain loaded dicts (no index)  : {plain_bytes / total_rules:.1f} bytes/rule")
+    print(f"Plain dicts + RuleIndex        : {indexed_bytes / total_rules:.1f} bytes/rule")
+    print(f"RuleSet + shared RuleIndex     : {compact_bytes / total_rules:.1f} bytes/rule")
+    print(f"Saved vs plain dicts + index   : {(indexed_bytes - compact_bytes) / total_rules:.1f} bytes/rule")
+    print(f"Saved vs plain dicts (no index): {(plain_bytes - compact_bytes) / total_rules:.1f} bytes/rule")
+    print("\nRuleSet test finished.")
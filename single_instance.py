@@ -0,0 +1,201 @@
+import os
+import sys
+import json
+import time
+import logging
+import secrets
+import threading
+import multiprocessing
+from multiprocessing.connection import Listener, Client
+
+LOCK_FILE_NAME = "instance.lock" # 실행 중 인스턴스가 잠그고 있는 파일 (프로세스가 끝나면 OS가 잠금 해제)
+ADDRESS_FILE_NAME = "instance.json" # 실행 중 인스턴스의 IPC 주소와 인증 키
+FORWARD_TIMEOUT = 3.0 # 두 번째 실행이 실행 중 인스턴스에 명령을 전달하려고 기다리는 최대 시간 (초)
+FORWARD_RETRY_INTERVAL = 0.1 # 실행 중 인스턴스가 아직 IPC를 준비하지 않았을 때 다시 시도하는 간격 (초)
+
+def parse_instance_commands(argv):
+    """
+    명령줄 인자를 실행 중 인스턴스에 전달할 명령 목록으로 바꿉니다.
+
+    /profile <이름> 은 프로필 전환, /reload 는 규칙 재로드이며, 다른 명령 없이 실행하면 설정 창을 띄웁니다
+    (/tray, /headless 로 실행한 경우는 제외 - 자동 시작 등).
+
+    Returns:
+        list[tuple]: ("profile", 이름), ("reload",), ("show",) 중 해당하는 명령 (이 순서로 적용).
+    """
+    commands = []
+    if "/profile" in argv:
+        position = argv.index("/profile") + 1
+        if position < len(argv):
+            commands.append(("profile", argv[position]))
+        else:
+            logging.warning("[INSTANCE] /profile requires a profile name. Ignoring it.")
+    if "/reload" in argv:
+        commands.append(("reload",))
+    if not commands and "/tray" not in argv and "/headless" not in argv:
+        commands.append(("show",))
+    return commands
+
+class SingleInstance:
+    """
+    설정 디렉토리의 잠금 파일로 키보드 훅을 설치하는 인스턴스를 하나로 제한하고,
+    두 번째 실행의 명령(창 표시, 규칙 재로드, 프로필 전환)을 로컬 IPC로 실행 중 인스턴스에 전달합니다.
+
+    IPC는 multiprocessing.connection (Windows 명명된 파이프 / POSIX 유닉스 소켓)을 사용하며,
+    주소와 무작위 인증 키는 사용자 설정 디렉토리의 ADDRESS_FILE_NAME 에만 기록됩니다.
+    """
+
+    def __init__(self, app_config_dir):
+        self.lock_file_path = os.path.join(app_config_dir, LOCK_FILE_NAME)
+        self.address_file_path = os.path.join(app_config_dir, ADDRESS_FILE_NAME)
+        self.handler = None # handler(command, *args) - IPC 스레드에서 호출됨
+        self._lock_file = None
+        self._listener = None
+        self._thread = None
+
+    # --- 잠금 ---
+    def _try_lock(self, lock_file):
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self):
+        """
+        인스턴스 잠금을 시도합니다.
+
+        Returns:
+            bool: 이 프로세스가 유일한 인스턴스가 되었으면 True (이미 다른 인스턴스가 실행 중이면 False).
+        """
+        lock_file = open(self.lock_file_path, "a+b")
+        if not self._try_lock(lock_file):
+            lock_file.close()
+            logging.info(f"[INSTANCE] Another instance holds '{self.lock_file_path}'.")
+            return False
+        self._lock_file = lock_file
+        logging.info(f"[INSTANCE] Instance lock acquired (pid {os.getpid()}).")
+        return True
+
+    # --- 실행 중 인스턴스 ---
+    def start(self, handler):
+        """IPC 수신을 시작합니다 (acquire() 성공 후 호출). 주소 파일은 원자적으로 교체합니다."""
+        self.handler = handler
+        authkey = secrets.token_bytes(32)
+        family = "AF_PIPE" if sys.platform == "win32" else "AF_UNIX"
+        self._listener = Listener(family=family, authkey=authkey)
+        temp_path = self.address_file_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"pid": os.getpid(), "family": family, "address": self._listener.address, "authkey": authkey.hex()}, f)
+        os.replace(temp_path, self.address_file_path)
+        self._thread = threading.Thread(target=self._serve, daemon=True, name="InstanceIPCThread")
+        self._thread.start()
+        logging.info(f"[INSTANCE] Listening for commands from other launches at {self._listener.address}.")
+
+    def _serve(self):
+        """IPC 스레드: 연결마다 명령 목록 하나를 받아 handler 로 넘기고 응답합니다."""
+        while self._listener is not None:
+            try:
+                conn = self._listener.accept()
+            except multiprocessing.AuthenticationError as e:
+                logging.warning(f"[INSTANCE] Rejected IPC connection: {e}")
+                continue
+            except (OSError, EOFError):
+                if self._listener is None: # release() 로 닫힘
+                    return
+                logging.warning("[INSTANCE] IPC accept failed.", exc_info=True)
+                time.sleep(FORWARD_RETRY_INTERVAL)
+                continue
+            with conn:
+                try:
+                    commands = conn.recv()
+                    logging.info(f"[INSTANCE] Received commands from another launch: {commands}")
+                    for command, *args in commands:
+                        self.handler(command, *args)
+                    conn.send("ok")
+                except Exception as e:
+                    logging.error(f"[INSTANCE] Failed to handle IPC commands: {e}", exc_info=True)
+
+    def release(self):
+        """IPC 수신을 멈추고 주소 파일과 잠금을 정리합니다."""
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            try:
+                os.remove(self.address_file_path)
+            except OSError:
+                pass
+            listener.close()
+        if self._lock_file is not None:
+            self._lock_file.close() # 닫으면 잠금 해제
+            self._lock_file = None
+
+    # --- 두 번째 실행 ---
+    def forward(self, commands, timeout=FORWARD_TIMEOUT):
+        """
+        실행 중 인스턴스에 명령 목록을 전달합니다. 실행 중 인스턴스가 막 시작해 주소 파일이 아직 없거나
+        이전 실행의 주소 파일이 남아 있으면 timeout 동안 다시 시도합니다.
+
+        Returns:
+            bool: 실행 중 인스턴스가 명령을 처리했으면 True.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with open(self.address_file_path, "r", encoding="utf-8") as f:
+                    info = json.load(f)
+                with Client(info["address"], family=info["family"], authkey=bytes.fromhex(info["authkey"])) as conn:
+                    conn.send(list(commands))
+                    if conn.poll(max(0.0, deadline - time.monotonic())) and conn.recv() == "ok":
+                        logging.info(f"[INSTANCE] Forwarded {commands} to running instance (pid {info['pid']}).")
+                        return True
+                    logging.warning("[INSTANCE] Running instance did not confirm the forwarded commands.")
+                    return False
+            except (OSError, EOFError, ValueError, KeyError, multiprocessing.AuthenticationError) as e:
+                if time.monotonic() >= deadline:
+                    logging.error(f"[INSTANCE] Could not reach the running instance: {e}")
+                    return False
+            time.sleep(FORWARD_RETRY_INTERVAL)
+
+if __name__ == '__main__':
+    # 테스트용 코드
+    import tempfile
+    logging.basicConfig(level=logging.INFO)
+
+    assert parse_instance_commands(["main.py"]) == [("show",)]
+    assert parse_instance_commands(["main.py", "/tray"]) == []
+    assert parse_instance_commands(["main.py", "/reload", "/profile", "work"]) == [("profile", "work"), ("reload",)]
+
+    config_dir = tempfile.mkdtemp()
+    first = SingleInstance(config_dir)
+    assert first.acquire()
+    received = []
+    done = threading.Event()
+    first.start(lambda command, *args: (received.append((command, *args)), command == "show" and done.set()))
+
+    # 두 번째 실행은 잠금을 얻지 못하고 명령만 전달 (다른 프로세스에서 확인 - flock 은 같은 프로세스 안에서는 열 때마다 독립)
+    import subprocess
+    code = ("import sys; sys.path.insert(0, %r); from single_instance import SingleInstance; "
+            "second = SingleInstance(%r); assert not second.acquire(); "
+            "sys.exit(0 if second.forward([('profile', 'work'), ('show',)]) else 1)") % (os.path.dirname(os.path.abspath(__file__)), config_dir)
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
+    assert done.wait(2) and received == [("profile", "work"), ("show",)], received
+
+    # 주소 파일의 인증 키가 다르면 명령을 처리하지 않음
+    with open(first.address_file_path, "r", encoding="utf-8") as f:
+        info = json.load(f)
+    info["authkey"] = secrets.token_bytes(32).hex()
+    with open(first.address_file_path, "w", encoding="utf-8") as f:
+        json.dump(info, f)
+    assert not SingleInstance(config_dir).forward([("show",)], timeout=0.3)
+    assert len(received) == 2
+
+    first.release()
+    second = SingleInstance(config_dir)
+    assert second.acquire() # 실행 중 인스턴스가 끝나면 잠금을 얻음
+    second.release()
+    print("SingleInstance test finished.")
@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+import logging
+
+SNAPSHOT_CHUNK_RULES = 64 # 청크 하나의 평균 규칙 수 (키워드 해시로 경계를 정하므로 편집한 부분의 청크만 바뀜)
+SNAPSHOT_MAX_CHUNK_RULES = 1024 # 청크 하나의 최대 규칙 수
+SNAPSHOT_KEEP = 100 # 보관할 최대 스냅샷 수 (오래된 것부터 삭제, 참조가 없어진 청크도 삭제)
+RULE_SECTIONS = ("rules", "scoped_rules", "groups") # 스냅샷에 포함되는 규칙 섹션 (settings 제외)
+
+def _chunk_rules(rules):
+    """
+    규칙 매핑을 (키워드, 치환 텍스트) 목록의 청크로 나눕니다. 청크는 해시가 SNAPSHOT_CHUNK_RULES 로 나누어떨어지는
+    키워드 뒤에서 끝나므로, 규칙을 추가/삭제/수정해도 그 규칙이 속한 청크(경계 키워드면 이웃 청크까지)만 바뀝니다.
+    """
+    chunk = []
+    for keyword, replacement in rules.items():
+        chunk.append([keyword, replacement])
+        if zlib.crc32(keyword.encode("utf-8")) % SNAPSHOT_CHUNK_RULES == 0 or len(chunk) >= SNAPSHOT_MAX_CHUNK_RULES:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class RuleSnapshotStore:
+    """규칙 섹션의 내용 주소 기반(content-addressed) 스냅샷 저장소
+
+    규칙은 청크 단위로 objects/<해시 앞 2자리>/<SHA-256> 파일에 압축 저장되고(같은 내용은 한 번만),
+    스냅샷은 섹션별 청크 해시 목록만 담은 작은 manifests/<스냅샷 ID>.json 파일입니다.
+    따라서 저장할 때마다 바뀐 청크만 새로 쓰이고, 이력 목록은 manifest 만 읽어 만듭니다.
+    """
+
+    def __init__(self, directory, keep=SNAPSHOT_KEEP):
+        """
+        Args:
+            directory (str): 스냅샷 디렉토리 (보통 설정 디렉토리의 snapshots).
+            keep (int): 프로필마다 보관할 최대 스냅샷 수.
+        """
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, "objects")
+        self.manifests_dir = os.path.join(directory, "manifests")
+        self.keep = keep
+        self._manifests = None # 스냅샷 ID -> manifest (처음 조회할 때 읽고 이후 메모리에서 갱신)
+
+    # --- 청크 객체 ---
+    def _object_path(self, object_id):
+        return os.path.join(self.objects_dir, object_id[:2], object_id)
+
+    def _write_object(self, chunk):
+        """청크를 저장하고 해시를 반환합니다. 같은 내용의 청크가 이미 있으면 쓰지 않습니다."""
+        payload = json.dumps(chunk, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        object_id = hashlib.sha256(payload).hexdigest()
+        path = self._object_path(object_id)
+        if os.path.exists(path):
+            return object_id, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(zlib.compress(payload))
+        os.replace(temp_path, path) # 중간에 실패해도 불완전한 객체가 남지 않음
+        return object_id, True
+
+    def _read_rules(self, object_ids):
+        """청크 해시 목록을 원래 순서의 규칙 딕셔너리로 되돌립니다."""
+        rules = {}
+        for object_id in object_ids:
+            with open(self._object_path(object_id), "rb") as f:
+                rules.update(json.loads(zlib.decompress(f.read()).decode("utf-8")))
+        return rules
+
+    # --- manifest ---
+    def _load_manifests(self):
+        if self._manifests is None:
+            self._manifests = {}
+            try:
+                file_names = sorted(os.listdir(self.manifests_dir))
+            except FileNotFoundError:
+                file_names = []
+            for file_name in file_names:
+                if not file_name.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(self.manifests_dir, file_name), "r", encoding="utf-8") as f:
+                        manifest = json.load(f)
+                    self._manifests[manifest["id"]] = manifest
+                except Exception as e:
+                    logging.warning(f"[SNAPSHOT] Ignoring unreadable snapshot manifest '{file_name}': {e}")
+        return self._manifests
+
+    def snapshots(self, profile=None):
+        """
+        스냅샷 요약 목록을 최신순으로 반환합니다.
+
+        Returns:
+            list[dict]: id, created, profile, reason, rule_count 를 담은 딕셔너리.
+        """
+        manifests = self._load_manifests()
+        return [{key: manifest[key] for key in ("id", "created", "profile", "reason", "rule_count")}
+                for manifest in sorted(manifests.values(), key=lambda manifest: manifest["created"], reverse=True)
+                if profile is None or manifest["profile"] == profile]
+
+    def create(self, profile, data, reason="save"):
+        """
+        프로필의 규칙 섹션(rules, scoped_rules, groups) 스냅샷을 만듭니다.
+        내용이 같은 프로필의 최신 스냅샷과 같으면 새로 만들지 않고 그 ID를 반환합니다.
+
+        Args:
+            profile (str): 프로필 이름.
+            data (dict): 규칙 섹션을 담은 설정 딕셔너리 (settings 등 다른 키는 무시).
+            reason (str): 이력 목록에 표시할 스냅샷 사유.
+
+        Returns:
+            str: 스냅샷 ID.
+        """
+        started = time.perf_counter()
+        written = 0
+        def store(rules):
+            nonlocal written
+            object_ids = []
+            for chunk in _chunk_rules(rules):
+                object_id, is_new = self._write_object(chunk)
+                object_ids.append(object_id)
+                written += is_new
+            return object_ids
+
+        sections = {
+            "rules": store(data.get("rules", {})),
+            "scoped_rules": {app_name: store(rules) for app_name, rules in data.get("scoped_rules", {}).items()},
+            "groups": {name: {"enabled": bool(group.get("enabled", True)), "rules": store(group.get("rules", {}))}
+                       for name, group in data.get("groups", {}).items()},
+        }
+        digest = hashlib.sha256(json.dumps(sections, sort_keys=True).encode("utf-8")).hexdigest()
+        latest = next(iter(self.snapshots(profile)), None)
+        if latest is not None and self._manifests[latest["id"]]["digest"] == digest:
+            logging.debug(f"[SNAPSHOT] Rules of profile '{profile}' unchanged since snapshot {latest['id']}.")
+            return latest["id"]
+
+        rule_count = (len(data.get("rules", {})) + sum(len(rules) for rules in data.get("scoped_rules", {}).values())
+                      + sum(len(group.get("rules", {})) for group in data.get("groups", {}).values()))
+        created = time.time()
+        snapshot_id = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(created))}{int(created * 1000) % 1000:03d}-{digest[:8]}"
+        manifest = {"id": snapshot_id, "created": created, "profile": profile, "reason": reason,
+                    "rule_count": rule_count, "digest": digest, "sections": sections}
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        path = os.path.join(self.manifests_dir, f"{snapshot_id}.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(f"{path}.tmp", path)
+        self._load_manifests()[snapshot_id] = manifest
+        logging.info(f"[SNAPSHOT] Created snapshot {snapshot_id} of profile '{profile}' ({reason}, {rule_count} rules, "
+                     f"{written} new chunks) in {(time.perf_counter() - started) * 1000:.1f} ms.")
+        self._prune(profile)
+        return snapshot_id
+
+    def read(self, snapshot_id):
+        """
+        스냅샷의 규칙 섹션을 되돌립니다.
+
+        Returns:
+            tuple: (프로필 이름, {"rules", "scoped_rules", "groups"} 딕셔너리). 스냅샷이 없으면 KeyError.
+        """
+        manifest = self._load_manifests()[snapshot_id]
+        sections = manifest["sections"]
+        data = {
+            "rules": self._read_rules(sections["rules"]),
+            "scoped_rules": {app_name: self._read_rules(object_ids) for app_name, object_ids in sections["scoped_rules"].items()},
+            "groups": {name: {"enabled": group["enabled"], "rules": self._read_rules(group["rules"])}
+                       for name, group in sections["groups"].items()},
+        }
+        return manifest["profile"], data
+
+    def _prune(self, profile):
+        """
+        프로필의 오래된 스냅샷을 keep 개만 남기고 지운 뒤, 남은 스냅샷이 참조하지 않는 청크를 지웁니다.
+        (다른 프로필의 이력은 그 프로필을 저장할 때만 정리되므로 한 프로필을 자주 저장해도 지워지지 않음)
+        """
+        manifests = self._load_manifests()
+        expired = [snapshot["id"] for snapshot in self.snapshots(profile)[self.keep:]]
+        if not expired:
+            return
+        for snapshot_id in expired:
+            del manifests[snapshot_id]
+            try:
+                os.remove(os.path.join(self.manifests_dir, f"{snapshot_id}.json"))
+            except OSError as e:
+                logging.warning(f"[SNAPSHOT] Failed to remove snapshot {snapshot_id}: {e}")
+
+        referenced = set()
+        for manifest in manifests.values():
+            sections = manifest["sections"]
+            referenced.update(sections["rules"])
+            for object_ids in sections["scoped_rules"].values():
+                referenced.update(object_ids)
+            for group in sections["groups"].values():
+                referenced.update(group["rules"])
+        removed = 0
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            for object_id in os.listdir(prefix_dir):
+                if object_id not in referenced:
+                    try:
+                        os.remove(os.path.join(prefix_dir, object_id))
+                        removed += 1
+                    except OSError:
+                        pass
+        logging.info(f"[SNAPSHOT] Removed {len(expired)} old snapshots and {removed} unreferenced chunks.")
+
+if __name__ == '__main__':
+    # 테스트용 코드
+    import tempfile
+    logging.basicConfig(level=logging.INFO)
+
+    store = RuleSnapshotStore(os.path.join(tempfile.mkdtemp(), "snapshots"), keep=3)
+    rules = {f"!kw{i}": f"replacement text {i} " * 4 for i in range(20000)}
+    data = {"rules": rules, "scoped_rules": {"code.exe": {"!fn": "def f():"}},
+            "groups": {"support": {"enabled": False, "rules": {"!ty": "Thank you"}}}, "settings": {"start_on_boot": True}}
+    first = store.create("default", data)
+    object_count = lambda: sum(len(files) for _, _, files in os.walk(store.objects_dir))
+    chunks_after_first = object_count()
+
+    # 규칙 하나만 바꾸면 그 규칙이 속한 청크만 새로 저장됨
+    rules["!kw12345"] = "changed"
+    del rules["!kw500"]
+    rules["!new"] = "added at the end"
+    started = time.perf_counter()
+    second = store.create("default", data)
+    print(f"Second snapshot of {len(rules)} rules: {object_count() - chunks_after_first} new chunks, "
+          f"{(time.perf_counter() - started) * 1000:.1f} ms")
+    assert second != first and object_count() - chunks_after_first <= 4
+    assert store.create("default", data) == second # 내용이 같으면 새 스냅샷을 만들지 않음
+
+    profile, restored = store.read(first)
+    assert profile == "default" and list(restored["rules"].items())[:3] == [(f"!kw{i}", f"replacement text {i} " * 4) for i in range(3)]
+    assert restored["rules"]["!kw500"] and "!new" not in restored["rules"]
+    assert restored["groups"] == {"support": {"enabled": False, "rules": {"!ty": "Thank you"}}} and "settings" not in restored
+    assert store.read(second)[1]["rules"] == rules
+
+    # 보관 개수를 넘으면 오래된 스냅샷과 더 이상 참조되지 않는 청크가 지워짐 (보관 개수는 프로필마다 따로)
+    work = store.create("work", {"rules": {"!addr": "Office address"}})
+    for i in range(3):
+        rules["!kw0"] = f"edit {i}"
+        store.create("default", data)
+    assert [s["id"] for s in store.snapshots("default")][-1] != first and first not in store._manifests
+    assert len(store.snapshots("default")) == 3 and [s["id"] for s in store.snapshots("work")] == [work]
+    assert store.read(work)[1]["rules"] == {"!addr": "Office address"}
+    assert RuleSnapshotStore(store.directory).snapshots() == store.snapshots() # 디스크에서 다시 읽어도 같음
+    assert store.read(store.snapshots()[0]["id"])[1]["rules"] == rules
+    print("RuleSnapshotStore test finished.")
@@ -0,0 +1,351 @@
+import os
+import sys
+import time
+import random
+import string
+import logging
+import argparse
+import tempfile
+import threading
+from metrics import LatencyHistogram # 지연 시간 분포
+from usage_stats import UsageStats # 훅 스레드와 GUI 스레드가 같이 쓰는 잠금
+
+# 스트레스 테스트 도구:
+# 가짜 훅 스레드가 KeyboardListener._on_press 에 빠른 타이핑(기본 300 WPM)을 재생하는 동안
+# 다른 스레드들이 큰 규칙 집합 두 개를 번갈아 update_rules 로 교체하고, GUI 스레드처럼 사용 통계를 읽습니다.
+# 놓친/잘못된 치환, 버퍼 손상, 잠금 경합, 키 처리 지연 꼬리를 측정합니다.
+# 사용법: python stress_harness.py --duration 30 --wpm 400 --rules 100000 --reloaders 2
+
+PROBE_COUNT = 50 # 두 규칙 집합에 같은 치환으로 들어 있는 검사용 키워드 수
+PROBE_RATIO = 0.3 # 입력하는 단어 중 검사용 키워드 비율
+TYPO_RATIO = 0.1 # 오타 + 백스페이스가 섞이는 단어 비율
+VERSION_KEYWORD = "!ver" # 규칙 집합마다 치환 텍스트가 다른 키워드 (교체 중 어느 쪽이든 정상)
+CHARS_PER_WORD = 5 # WPM 환산 기준 (표준 5타 = 1단어)
+EXAMPLES_KEPT = 5 # 유형별로 남길 실패 예시 수
+MAX_DROPPED_SHARE = 0.5 # 교체로 버퍼가 비워져 확인하지 못한 검사 단어 비율이 이보다 크면 실패 (검증한 치환이 너무 적음)
+
+def _percentiles(histogram):
+    """LatencyHistogram 의 p50/p99/p99.9/최대값 요약 문자열"""
+    if not histogram.count:
+        return "no samples"
+    return (f"n={histogram.count} p50={histogram.percentile_us(0.5)}µs p99={histogram.percentile_us(0.99)}µs "
+            f"p99.9={histogram.percentile_us(0.999)}µs max={histogram.max_ns / 1000:.0f}µs")
+
+def build_rule_sets(rng, rule_count):
+    """
+    교체용 규칙 집합 두 개를 만듭니다. 검사용 키워드는 두 집합에 같은 치환으로,
+    VERSION_KEYWORD 는 집합마다 다른 치환으로 들어 있고, 나머지는 입력되지 않는 '~' 키워드입니다.
+    """
+    probes = {f"!p{i}": f"probe {i}" for i in range(PROBE_COUNT)}
+    rule_sets = []
+    for label in ("A", "B"):
+        rules = dict(probes)
+        rules[VERSION_KEYWORD] = f"version {label}"
+        for i in range(rule_count):
+            suffix = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(1, 8)))
+            rules[f"~{label}{i}{suffix}"] = f"filler {label}{i} " * rng.randint(1, 8)
+        rule_sets.append(rules)
+    return rule_sets, probes
+
+def _reload_counting_listener_class():
+    """다른 스레드(update_rules)가 버퍼를 비운 횟수를 세는 KeyboardListener 하위 클래스를 반환합니다."""
+    from keyboard_listener import KeyboardListener
+
+    class ReloadCountingListener(KeyboardListener):
+        """
+        buffer 속성을 가로채 타이핑 스레드가 아닌 스레드가 버퍼를 비운 횟수(reload_clears)를 셉니다.
+        대입과 증가를 같은 잠금 안에서 하므로, 타이핑 스레드가 트리거 뒤 잠금을 잡고 읽은 값에는
+        트리거보다 먼저 일어난 초기화가 모두 반영됩니다.
+        """
+
+        def __init__(self, *args, **kwargs):
+            self.typing_thread_id = None
+            self.reload_clears = 0
+            self.reload_clear_lock = threading.Lock()
+            super().__init__(*args, **kwargs)
+
+        @property
+        def buffer(self):
+            return self._buffer
+
+        @buffer.setter
+        def buffer(self, value):
+            if self.typing_thread_id is None or threading.get_ident() == self.typing_thread_id:
+                self._buffer = value
+                return
+            with self.reload_clear_lock:
+                self._buffer = value
+                self.reload_clears += 1
+
+    return ReloadCountingListener
+
+class TimedLock:
+    """threading.Lock 대체: 획득 대기 시간을 기록해 잠금 경합을 측정합니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.wait_time = LatencyHistogram() # 잠금을 잡은 뒤에만 기록하므로 별도 보호 불필요
+        self.contended = 0 # 바로 얻지 못하고 기다린 횟수
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._lock.acquire(False):
+            self.wait_time.record(0)
+            return True
+        started_ns = time.perf_counter_ns()
+        acquired = self._lock.acquire(blocking, timeout)
+        if acquired:
+            self.wait_time.record(time.perf_counter_ns() - started_ns)
+            self.contended += 1
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+class StressRun:
+    """타이핑 스레드 1개, 규칙 교체 스레드 N개, 통계 읽기 스레드 M개를 함께 실행하고 결과를 집계합니다."""
+
+    def __init__(self, rule_sets, probes, wpm, reloaders, reload_interval, readers, seed, stats_dir):
+        from pynput.keyboard import Key, KeyCode
+        from window_provider import FakeActiveWindowProvider
+        self._key_space = Key.space
+        self._key_backspace = Key.backspace
+        self._key_codes = {char: KeyCode.from_char(char) for char in string.ascii_lowercase + string.digits + "!~"}
+
+        self.rule_sets = rule_sets
+        self.probes = probes
+        self.allowed = {keyword: {text} for keyword, text in probes.items()}
+        self.allowed[VERSION_KEYWORD] = {rules[VERSION_KEYWORD] for rules in rule_sets}
+        self.key_interval = 60.0 / (wpm * CHARS_PER_WORD) if wpm > 0 else 0.0 # 0이면 쉬지 않고 입력
+        self.reloaders = reloaders
+        self.reload_interval = reload_interval
+        self.readers = readers
+        self.rng = random.Random(seed)
+
+        self.usage_stats = UsageStats(os.path.join(stats_dir, "usage_stats.json"), flush_interval=0.05)
+        self.stats_lock = TimedLock()
+        self.usage_stats._lock = self.stats_lock # 훅 스레드(record)와 GUI/저장 스레드가 경합하는 잠금
+        self.listener = _reload_counting_listener_class()(rules=rule_sets[0], window_provider=FakeActiveWindowProvider(),
+                                                          usage_stats=self.usage_stats)
+        self.listener._perform_replacement = self._record_replacement
+        self._last_match = None
+        self.max_buffer_limit = max(len(keyword) for rules in rule_sets for keyword in rules) + self.listener.BUFFER_MARGIN
+
+        self._stop_event = threading.Event()
+        self.reloads_finished = 0 # 교체 스레드들만 증가 (GIL 아래 정수 증가, 보고용)
+
+        # 결과
+        self.words = 0
+        self.keys = 0
+        self.expected_expansions = 0
+        self.expansions_ok = 0
+        self.dropped_by_reload = 0 # 단어 입력 도중 교체가 실제로 버퍼를 비워 치환되지 않음 (update_rules 의 의도된 동작)
+        self.missed = [] # 입력 도중 버퍼가 비워지지 않았는데 치환되지 않은 키워드
+        self.incorrect = [] # 다른 키워드/치환 텍스트로 치환됨
+        self.spurious = [] # 키워드가 아닌 단어가 치환됨
+        self.corrupted = [] # 버퍼가 입력한 글자의 접미사가 아니거나 최대 크기를 넘음
+        self.key_latency = LatencyHistogram() # _on_press 한 번의 처리 시간
+        self.trigger_latency = LatencyHistogram() # 트리거 키(매칭 + 치환 기록) 처리 시간
+        self.schedule_lag = LatencyHistogram() # 예정된 입력 시각보다 늦어진 정도 (GIL 경합)
+        self.reload_time = LatencyHistogram() # update_rules 한 번의 소요 시간
+
+    def _record_replacement(self, keyword, replacement_text, plan=None):
+        self._last_match = (keyword, replacement_text)
+
+    @staticmethod
+    def _keep(examples, example):
+        if len(examples) < EXAMPLES_KEPT:
+            examples.append(example)
+        else:
+            examples.append(None) # 개수만 셈
+
+    def _next_word(self):
+        """입력할 단어와 키 이벤트 목록 (오타 후 백스페이스 포함)"""
+        rng = self.rng
+        if rng.random() < PROBE_RATIO:
+            word = VERSION_KEYWORD if rng.random() < 0.2 else rng.choice(list(self.probes))
+        else:
+            word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9)))
+        events = list(word)
+        if rng.random() < TYPO_RATIO:
+            position = rng.randint(1, len(events))
+            events[position:position] = [rng.choice(string.ascii_lowercase), None] # None = 백스페이스
+        return word, events
+
+    def _press(self, key):
+        started_ns = time.perf_counter_ns()
+        self.listener._on_press(key)
+        elapsed_ns = time.perf_counter_ns() - started_ns
+        self.key_latency.record(elapsed_ns)
+        self.keys += 1
+        return elapsed_ns
+
+    def _check_buffer(self, typed, word):
+        buffer = self.listener.buffer
+        if not typed.endswith(buffer) or len(buffer) > self.max_buffer_limit:
+            self._keep(self.corrupted, {"word": word, "typed": typed, "buffer": buffer})
+
+    def _reload_clears(self):
+        with self.listener.reload_clear_lock:
+            return self.listener.reload_clears
+
+    def _typing_loop(self):
+        self.listener.typing_thread_id = threading.get_ident()
+        next_key_at = time.perf_counter()
+        while not self._stop_event.is_set():
+            word, events = self._next_word()
+            clears_at_start = self._reload_clears() # 첫 글자 입력 전 (그 전의 초기화는 이 단어에 영향 없음)
+            typed = ""
+            for event in events + [self._key_space]:
+                if self.key_interval:
+                    delay = next_key_at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    self.schedule_lag.record(max(0, int((time.perf_counter() - next_key_at) * 1e9)))
+                    next_key_at = max(next_key_at + self.key_interval, time.perf_counter() - self.key_interval)
+                if event is self._key_space:
+                    self._last_match = None
+                    self.trigger_latency.record(self._press(self._key_space))
+                    if self.listener.buffer:
+                        self._keep(self.corrupted, {"word": word, "typed": typed, "buffer": self.listener.buffer, "after": "trigger"})
+                elif event is None:
+                    self._press(self._key_backspace)
+                    typed = typed[:-1]
+                    self._check_buffer(typed, word)
+                else:
+                    self._press(self._key_codes[event])
+                    typed += event
+                    self._check_buffer(typed, word)
+            buffer_cleared = self._reload_clears() != clears_at_start
+            self._classify(word, self._last_match, buffer_cleared)
+            self.words += 1
+
+    def _classify(self, word, match, buffer_cleared):
+        allowed = self.allowed.get(word)
+        if allowed is None:
+            if match is not None:
+                self._keep(self.spurious, {"word": word, "match": match})
+            return
+        self.expected_expansions += 1
+        if match is None:
+            if buffer_cleared:
+                self.dropped_by_reload += 1
+            else:
+                self._keep(self.missed, {"word": word})
+        elif match[0] != word or match[1] not in allowed:
+            self._keep(self.incorrect, {"word": word, "match": match})
+        else:
+            self.expansions_ok += 1
+
+    def _reload_loop(self, offset):
+        turn = offset
+        while not self._stop_event.is_set():
+            turn += 1
+            rules = self.rule_sets[turn % len(self.rule_sets)]
+            started_ns = time.perf_counter_ns()
+            self.listener.update_rules(rules, {}) # 일반 dict 이므로 매번 전체 재컴파일
+            self.reload_time.record(time.perf_counter_ns() - started_ns)
+            self.reloads_finished += 1
+            if self.reload_interval:
+                self._stop_event.wait(self.reload_interval)
+
+    def _reader_loop(self):
+        """GUI 스레드 흉내: 사용 통계 열 갱신처럼 잠금을 잡고 통계를 읽음"""
+        keywords = list(self.probes)
+        while not self._stop_event.is_set():
+            self.usage_stats.snapshot()
+            for keyword in keywords[:10]:
+                self.usage_stats.get(keyword)
+            self._stop_event.wait(0.005)
+
+    def run(self, duration):
+        threads = [threading.Thread(target=self._typing_loop, name="FakeHookThread", daemon=True)]
+        threads += [threading.Thread(target=self._reload_loop, args=(i,), name=f"Reloader-{i}", daemon=True)
+                    for i in range(self.reloaders)]
+        threads += [threading.Thread(target=self._reader_loop, name=f"StatsReader-{i}", daemon=True)
+                    for i in range(self.readers)]
+        self.usage_stats.start()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        self._stop_event.wait(duration)
+        self._stop_event.set()
+        for thread in threads:
+            thread.join()
+        self.usage_stats.stop()
+        return time.perf_counter() - started
+
+    def failures(self):
+        return len(self.missed) + len(self.incorrect) + len(self.spurious) + len(self.corrupted)
+
+    def coverage_problem(self):
+        """검증한 치환이 너무 적어 결과를 믿을 수 없으면 그 이유를, 아니면 None을 반환합니다."""
+        if not self.expected_expansions:
+            return "no probe keywords were typed"
+        if not self.expansions_ok:
+            return "no expansion was verified"
+        if self.dropped_by_reload > self.expected_expansions * MAX_DROPPED_SHARE:
+            return (f"{self.dropped_by_reload} of {self.expected_expansions} probe words were dropped by reloads "
+                    f"(more than {MAX_DROPPED_SHARE:.0%}); lengthen --reload-interval")
+        return None
+
+    def print_report(self, elapsed):
+        print(f"[STRESS] {self.words} words / {self.keys} keys in {elapsed:.1f}s "
+              f"({self.keys / elapsed / CHARS_PER_WORD * 60:.0f} WPM effective), {self.reloads_finished} rule reloads.")
+        print(f"[STRESS] Expansions: {self.expansions_ok}/{self.expected_expansions} correct, "
+              f"{self.dropped_by_reload} dropped because a reload reset the buffer mid-word.")
+        for label, examples in (("Missed", self.missed), ("Incorrect", self.incorrect),
+                                ("Spurious", self.spurious), ("Buffer corruption", self.corrupted)):
+            shown = [example for example in examples if example is not None]
+            print(f"[STRESS] {label}: {len(examples)}" + (f" e.g. {shown}" if shown else ""))
+        print(f"[STRESS] Key handling latency: {_percentiles(self.key_latency)}")
+        print(f"[STRESS] Trigger latency: {_percentiles(self.trigger_latency)}")
+        if self.key_interval:
+            print(f"[STRESS] Keystroke schedule lag: {_percentiles(self.schedule_lag)}")
+        print(f"[STRESS] Reload (update_rules) time: {_percentiles(self.reload_time)}")
+        print(f"[STRESS] Usage stats lock: {self.stats_lock.contended} contended of {self.stats_lock.wait_time.count} acquisitions, "
+              f"wait {_percentiles(self.stats_lock.wait_time)}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stress test fast typing against concurrent rule reloads.")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--wpm", type=float, default=300.0, help="typing speed in words per minute (0 = as fast as possible)")
+    parser.add_argument("--rules", type=int, default=50_000, help="filler rules in each of the two swapped rule sets")
+    parser.add_argument("--reloaders", type=int, default=2, help="threads calling update_rules")
+    parser.add_argument("--reload-interval", type=float, default=1.0,
+                        help="pause between reloads per thread (seconds); leaves reload-free windows for whole words")
+    parser.add_argument("--readers", type=int, default=1, help="threads reading usage stats like the GUI")
+    parser.add_argument("--seed", type=int, default=None, help="random seed (default: time based)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.disable(logging.INFO) # 리스너의 키 단위 로그 비활성화
+
+    seed = args.seed if args.seed is not None else time.time_ns() % 2**32
+    rng = random.Random(seed)
+    print(f"[STRESS] Seed {seed}, {args.duration}s, {args.wpm:.0f} WPM, 2 x {args.rules} rules, "
+          f"{args.reloaders} reloader(s), {args.readers} reader(s).")
+    rule_sets, probes = build_rule_sets(rng, args.rules)
+    with tempfile.TemporaryDirectory() as stats_dir:
+        run = StressRun(rule_sets, probes, args.wpm, args.reloaders, args.reload_interval, args.readers,
+                        rng.randrange(2**32), stats_dir)
+        elapsed = run.run(args.duration)
+    run.print_report(elapsed)
+    if run.failures():
+        print(f"[STRESS] FAILED: {run.failures()} failure(s).")
+        return 1
+    coverage_problem = run.coverage_problem()
+    if coverage_problem:
+        print(f"[STRESS] FAILED: {coverage_problem}.")
+        return 1
+    print("[STRESS] OK")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,241 @@
+import time
+import queue
+import bisect
+import logging
+import threading
+
+SUGGESTION_MIN_PREFIX = 2 # 이 길이 이상 입력해야 추천 시작
+SUGGESTION_LIMIT = 5 # 추천 키워드 최대 개수
+USAGE_REFRESH_SECONDS = 5.0 # 사용 횟수 순위를 다시 읽는 최소 간격
+
+class PrefixIndex:
+    """정렬된 키워드 목록에서 이분 탐색으로 접두사 범위를 찾는 인덱스 (생성 후 변경하지 않음)"""
+
+    __slots__ = ("keywords",)
+
+    def __init__(self, keywords):
+        self.keywords = sorted(keyword for keyword in keywords if keyword)
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def range(self, prefix):
+        """prefix 로 시작하는 키워드의 (시작, 끝) 위치를 반환합니다."""
+        low = bisect.bisect_left(self.keywords, prefix)
+        high = bisect.bisect_left(self.keywords, prefix + "\U0010ffff", low)
+        return low, high
+
+    def top(self, prefix, limit, ranked_used=()):
+        """
+        prefix 로 시작하는 키워드 중 상위 limit 개를 (사용 횟수 내림차순, 키워드 순)으로 반환합니다.
+
+        Args:
+            ranked_used (Sequence[str]): 사용 기록이 있는 키워드를 사용 횟수 내림차순으로 정렬한 목록.
+                                         범위 전체를 정렬하지 않고 이 목록과 범위 앞부분만 보므로
+                                         짧은 접두사(수만 개 일치)도 비용이 작습니다.
+        """
+        low, high = self.range(prefix)
+        if low == high:
+            return []
+        used = [keyword for keyword in ranked_used if keyword.startswith(prefix)]
+        result = used[:limit]
+        if len(result) < limit:
+            used = set(used)
+            for position in range(low, high):
+                keyword = self.keywords[position]
+                if keyword in used:
+                    continue # 사용 기록이 있는 키워드는 위에서 이미 순위대로 고려됨
+                result.append(keyword)
+                if len(result) == limit:
+                    break
+        return result
+
+class SuggestionEngine:
+    """
+    입력 중인 키워드의 접두사로 전역 규칙 키워드를 추천하는 엔진
+
+    훅 스레드는 request()로 현재 버퍼를 큐에 넣기만 하고(잠금 대기 없음), 별도 작업 스레드가
+    가장 최근 요청만 계산해 callback(접두사, 키워드 목록)을 호출합니다 (GUI 팝업 갱신 등).
+    규칙 변경 시의 인덱스 재구성과 사용 통계 읽기도 작업 스레드에서만 일어납니다.
+    """
+
+    def __init__(self, usage_stats=None, min_prefix=SUGGESTION_MIN_PREFIX, limit=SUGGESTION_LIMIT, callback=None):
+        """
+        Args:
+            usage_stats (UsageStats): 순위에 쓸 규칙 사용 통계 (없으면 키워드 순).
+            min_prefix (int): 추천을 시작할 최소 접두사 길이.
+            limit (int): 추천 키워드 최대 개수.
+            callback: callback(prefix, keywords) - 작업 스레드에서 호출됨 (빈 목록이면 추천 숨김).
+        """
+        self.usage_stats = usage_stats
+        self.min_prefix = max(1, min_prefix)
+        self.limit = limit
+        self.callback = callback
+        self.current = ("", []) # (접두사, 추천 키워드) - 훅 스레드가 수락 키 입력 시 읽음 (튜플 교체로 갱신)
+        self.lookup_time = None # 마지막 추천 계산 시간 (초, 디버깅용)
+        self._index = PrefixIndex(())
+        self._ranked_used = []
+        self._ranked_at = 0.0
+        self._requests = queue.SimpleQueue()
+        self._thread = None
+
+    # --- 훅 스레드에서 호출 (대기 없음) ---
+    def request(self, buffer):
+        """현재 입력 버퍼에 대한 추천을 요청합니다. 빈 문자열이면 추천을 숨깁니다."""
+        self._requests.put(("buffer", buffer))
+
+    # --- 다른 스레드에서 호출 ---
+    def update_rules(self, rules):
+        """추천 대상 규칙을 교체합니다 (인덱스는 작업 스레드에서 다시 만듦)."""
+        self._requests.put(("rules", rules))
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="SuggestionThread")
+        self._thread.start()
+        logging.info(f"[SUGGEST] Suggestion engine started (min prefix {self.min_prefix}, limit {self.limit}).")
+
+    def stop(self):
+        self._requests.put(("stop", None))
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    # --- 작업 스레드 ---
+    def _ranked_used_keywords(self):
+        """사용 기록이 있는 키워드를 사용 횟수 내림차순으로 반환합니다 (USAGE_REFRESH_SECONDS 동안 캐시)."""
+        now = time.monotonic()
+        if self.usage_stats is not None and now - self._ranked_at >= USAGE_REFRESH_SECONDS:
+            snapshot = self.usage_stats.snapshot()
+            self._ranked_used = [keyword for keyword, _ in sorted(snapshot.items(), key=lambda item: (-item[1]["count"], item[0]))]
+            self._ranked_at = now
+        return self._ranked_used
+
+    def suggest(self, buffer):
+        """
+        버퍼 끝의 접두사에 맞는 추천을 계산합니다. 버퍼 앞에 다른 글자가 있어도 되도록(예: "(!em")
+        가장 긴 끝 부분부터 일치하는 키워드가 있는 접두사를 찾습니다.
+
+        Returns:
+            tuple: (접두사, 추천 키워드 목록). 추천이 없으면 ("", []).
+        """
+        index = self._index
+        for start in range(0, len(buffer) - self.min_prefix + 1):
+            prefix = buffer[start:]
+            low, high = index.range(prefix)
+            if low == high:
+                continue
+            keywords = index.top(prefix, self.limit, self._ranked_used_keywords())
+            if keywords == [prefix]:
+                return "", [] # 키워드를 끝까지 입력했으면 추천 불필요 (트리거로 바로 치환)
+            return prefix, keywords
+        return "", []
+
+    def _run(self):
+        last_buffer = None
+        while True:
+            kind, payload = self._requests.get()
+            # 밀린 요청은 가장 최근 버퍼만 계산 (규칙 교체는 모두 적용)
+            latest_buffer = payload if kind == "buffer" else None
+            while kind != "stop":
+                if kind == "rules":
+                    started = time.perf_counter()
+                    self._index = PrefixIndex(payload)
+                    last_buffer = None
+                    logging.info(f"[SUGGEST] Prefix index rebuilt with {len(self._index)} keywords in {(time.perf_counter() - started) * 1000:.1f} ms.")
+                elif kind == "buffer":
+                    latest_buffer = payload
+                try:
+                    kind, payload = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+            if kind == "stop":
+                return
+            if latest_buffer is None or latest_buffer == last_buffer:
+                continue
+            last_buffer = latest_buffer
+            try:
+                started = time.perf_counter()
+                result = self.suggest(latest_buffer) if len(latest_buffer) >= self.min_prefix else ("", [])
+                self.lookup_time = time.perf_counter() - started
+                if result == self.current:
+                    continue
+                self.current = result
+                if self.callback is not None:
+                    self.callback(*result)
+            except Exception as e:
+                logging.error(f"[SUGGEST] Failed to compute suggestions: {e}", exc_info=True)
+
+if __name__ == '__main__':
+    # 테스트용 코드
+    import random
+    import string
+    logging.basicConfig(level=logging.INFO)
+
+    class FakeUsageStats:
+        def __init__(self, counts):
+            self.counts = counts
+
+        def snapshot(self):
+            return {keyword: {"count": count, "last_used": 0} for keyword, count in self.counts.items()}
+
+    index = PrefixIndex(["!email", "!emoji", "!addr", "!em", "btw", ""])
+    assert index.top("!em", 5) == ["!em", "!email", "!emoji"]
+    assert index.top("!em", 2, ranked_used=["!emoji", "btw"]) == ["!emoji", "!em"] # 사용 횟수 순 -> 키워드 순
+    assert index.top("x", 5) == []
+
+    engine = SuggestionEngine(usage_stats=FakeUsageStats({"!emoji": 3, "!addr": 9}), min_prefix=2, limit=3)
+    engine._index = PrefixIndex(["!email", "!emoji", "!addr", "btw"])
+    assert engine.suggest("!e") == ("!e", ["!emoji", "!email"])
+    assert engine.suggest("(!a") == ("!a", ["!addr"]) # 앞 글자는 건너뜀
+    assert engine.suggest("zz") == ("", [])
+    assert engine.suggest("btw") == ("", []) # 완성된 키워드
+
+    # 큰 규칙 집합: 짧은 접두사(수만 개 일치)도 1ms 미만인지 확인
+    rng = random.Random(1)
+    keywords = {"!" + "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 12))) for _ in range(100000)}
+    used = {keyword: rng.randint(1, 50) for keyword in rng.sample(sorted(keywords), 500)}
+    engine = SuggestionEngine(usage_stats=FakeUsageStats(used), limit=5)
+    engine._index = PrefixIndex(keywords)
+    engine._ranked_used_keywords() # 사용 순위 갱신(USAGE_REFRESH_SECONDS 마다)은 조회 시간에서 제외
+    worst = 0.0
+    for prefix in ["!a", "!ab", "!abc", "!q", "!zz", "x!m", "!" + "a" * 12]:
+        started = time.perf_counter()
+        engine.suggest(prefix)
+        worst = max(worst, time.perf_counter() - started)
+    print(f"Worst lookup over 100k keywords: {worst * 1000:.3f} ms")
+    assert worst < 0.001
+
+    # 작업 스레드: 요청은 큐에만 넣고, 결과는 콜백으로 전달
+    results = []
+    done = threading.Event()
+    engine = SuggestionEngine(min_prefix=2, limit=3, callback=lambda prefix, found: (results.append((prefix, found)), done.set()))
+    engine.start()
+    engine.update_rules({"!email": "E", "!emoji": "J"})
+    engine.request("!em")
+    assert done.wait(2)
+    engine.stop()
+    assert results[-1] == ("!em", ["!email", "!emoji"]) and engine.current == results[-1]
+
+    # KeyboardListener 재생 테스트: 훅 스레드는 요청만 넣고, 수락 키는 접두사만 지우고 첫 번째 추천으로 치환
+    from pynput.keyboard import Key, KeyCode
+    from keyboard_listener import KeyboardListener
+    from window_provider import FakeActiveWindowProvider
+    ready = threading.Event()
+    engine = SuggestionEngine(usage_stats=FakeUsageStats({"!emoji": 2}), min_prefix=2,
+                              callback=lambda prefix, found: prefix == "!em" and ready.set())
+    engine.start()
+    listener = KeyboardListener(rules={"!email": "me@example.com", "!emoji": "🙂", "btw": "by the way"},
+                                window_provider=FakeActiveWindowProvider(), suggestions=engine)
+    replaced = []
+    listener._perform_replacement = lambda keyword, text, select_count=None, plan=None: replaced.append((keyword, text, select_count))
+    for char in "(!em":
+        listener._on_press(KeyCode.from_char(char))
+    assert ready.wait(2) and engine.current == ("!em", ["!emoji", "!email"]), engine.current
+    listener._on_press(listener.suggestion_accept_key)
+    assert replaced == [("!emoji", "🙂", 3)] and listener.buffer == "", replaced
+    listener._on_press(listener.suggestion_accept_key) # 추천이 사라진 뒤의 수락 키는 무시
+    assert len(replaced) == 1
+    engine.stop()
+    print("SuggestionEngine test finished.")
@@ -0,0 +1,146 @@
+import json
+import logging
+import os
+import threading
+import time
+
+class UsageStats:
+    """규칙별 사용 횟수와 마지막 사용 시각을 메모리에 모았다가 주기적으로 별도 파일에 저장하는 클래스
+
+    record()는 훅 스레드에서 호출되므로 메모리만 갱신하고,
+    디스크 쓰기는 백그라운드 타이머 스레드(flush_interval 주기) 또는 stop() 시에만 일어납니다.
+    rules.json 과는 별개의 파일(usage_stats.json)을 사용합니다.
+    """
+
+    def __init__(self, file_path, flush_interval=60.0):
+        """
+        Args:
+            file_path (str): 통계 저장 파일 경로.
+            flush_interval (float): 변경 사항을 파일에 쓰는 주기 (초).
+        """
+        self.file_path = file_path
+        self.flush_interval = flush_interval
+        self._stats = {} # 키워드 -> [사용 횟수, 마지막 사용 시각(epoch 초)]
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._stop_event = threading.Event()
+        self._flush_thread = None
+
+    def load(self):
+        """저장된 통계를 불러옵니다. 파일이 없거나 손상되었으면 빈 통계로 시작합니다."""
+        if not os.path.exists(self.file_path):
+            logging.info(f"Usage stats file '{self.file_path}' not found. Starting with empty stats.")
+            return
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            stats = {}
+            for keyword, entry in data.items():
+                if isinstance(entry, dict):
+                    stats[keyword] = [int(entry.get("count", 0)), float(entry.get("last_used", 0))]
+            with self._lock:
+                self._stats = stats
+                self._dirty = False
+            logging.info(f"Loaded usage stats for {len(stats)} rules from '{self.file_path}'.")
+        except Exception as e:
+            logging.error(f"Failed to load usage stats from '{self.file_path}'. Starting with empty stats: {e}", exc_info=True)
+
+    def record(self, keyword):
+        """규칙 사용을 기록합니다 (메모리만 갱신)."""
+        now = time.time()
+        with self._lock:
+            entry = self._stats.get(keyword)
+            if entry is None:
+                self._stats[keyword] = [1, now]
+            else:
+                entry[0] += 1
+                entry[1] = now
+            self._dirty = True
+
+    def get(self, keyword):
+        """
+        Returns:
+            tuple: (사용 횟수, 마지막 사용 시각 epoch 초). 사용 기록이 없으면 (0, None).
+        """
+        with self._lock:
+            entry = self._stats.get(keyword)
+            return (entry[0], entry[1]) if entry else (0, None)
+
+    def snapshot(self):
+        """키워드 -> {"count", "last_used"} 딕셔너리 복사본을 반환합니다."""
+        with self._lock:
+            return {keyword: {"count": count, "last_used": last_used}
+                    for keyword, (count, last_used) in self._stats.items()}
+
+    def flush(self):
+        """변경 사항이 있으면 파일에 저장합니다 (임시 파일에 쓴 뒤 교체).
+
+        Returns:
+            bool: 저장 성공 여부 (변경 사항이 없으면 True).
+        """
+        with self._lock:
+            if not self._dirty:
+                return True
+            data = {keyword: {"count": count, "last_used": last_used}
+                    for keyword, (count, last_used) in self._stats.items()}
+            self._dirty = False
+
+        temp_path = self.file_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.file_path)
+            logging.debug(f"Usage stats flushed to '{self.file_path}' ({len(data)} rules).")
+            return True
+        except Exception as e:
+            with self._lock:
+                self._dirty = True # 다음 주기에 다시 시도
+            logging.error(f"Failed to save usage stats to '{self.file_path}': {e}", exc_info=True)
+            return False
+
+    def _flush_loop(self):
+        """백그라운드 스레드: flush_interval 마다 변경 사항을 저장합니다."""
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        """주기적 저장 스레드를 시작합니다."""
+        if self._flush_thread is not None and self._flush_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True, name="UsageStatsFlushThread")
+        self._flush_thread.start()
+
+    def stop(self):
+        """주기적 저장 스레드를 멈추고 남은 변경 사항을 저장합니다."""
+        self._stop_event.set()
+        if self._flush_thread is not None and self._flush_thread.is_alive():
+            self._flush_thread.join(timeout=1)
+        self._flush_thread = None
+        self.flush()
+
+if __name__ == '__main__':
+    # 테스트용 코드
+    import tempfile
+    logging.basicConfig(level=logging.DEBUG)
+
+    test_path = os.path.join(tempfile.mkdtemp(), "usage_stats.json")
+    stats = UsageStats(test_path, flush_interval=0.1)
+    stats.load()
+    stats.start()
+    stats.record("!email")
+    stats.record("!email")
+    stats.record("!addr")
+    time.sleep(0.3) # 타이머 저장 대기
+    assert os.path.exists(test_path)
+    stats.record("!addr")
+    stats.stop() # 종료 시 남은 변경 저장
+
+    reloaded = UsageStats(test_path)
+    reloaded.load()
+    assert reloaded.get("!email")[0] == 2
+    assert reloaded.get("!addr")[0] == 2
+    assert reloaded.get("!none") == (0, None)
+    print(json.dumps(reloaded.snapshot(), indent=4))
+    print("\nUsageStats test finished.")
@@ -0,0 +1,139 @@
+import os
+import sys
+import logging
+
+class ActiveWindowProvider:
+    """현재 포커스된 창/앱 정보를 제공하는 인터페이스 (플랫폼별로 교체 가능)
+
+    get_foreground_window()와 get_process_id()는 트리거마다 호출되므로 가벼워야 하고,
+    get_app_name()은 비용이 클 수 있어 호출 측에서 (창 핸들, 프로세스 ID) 기준으로 캐시합니다.
+    (창 핸들은 창이 닫힌 뒤 다른 프로세스의 창에 재사용될 수 있으므로 핸들만으로 캐시하지 않음)
+    """
+
+    def get_foreground_window(self):
+        """현재 포커스된 창의 핸들(해시 가능한 값)을 반환합니다. 알 수 없으면 None."""
+        return None
+
+    def get_process_id(self, window_handle):
+        """창을 만든 프로세스 ID를 반환합니다. 알 수 없으면 None."""
+        return None
+
+    def get_app_name(self, window_handle):
+        """창 핸들에 해당하는 앱 이름(소문자 실행 파일명, 예: "code.exe")을 반환합니다. 알 수 없으면 None."""
+        return None
+
+    def get_caret_position(self):
+        """포커스된 앱의 텍스트 캐럿 아래쪽 끝의 화면 좌표(물리 픽셀 x, y)를 반환합니다. 알 수 없으면 None."""
+        return None
+
+class Win32ActiveWindowProvider(ActiveWindowProvider):
+    """Win32 API(ctypes)로 포그라운드 창과 프로세스 실행 파일명을 조회하는 구현"""
+
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self._ctypes = ctypes
+        self._wintypes = wintypes
+        self._user32 = ctypes.windll.user32
+        self._kernel32 = ctypes.windll.kernel32
+        # 64비트 핸들이 잘리지 않도록 시그니처 지정
+        self._user32.GetForegroundWindow.restype = wintypes.HWND
+        self._user32.GetWindowThreadProcessId.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.DWORD)]
+        self._kernel32.OpenProcess.restype = wintypes.HANDLE
+        self._kernel32.QueryFullProcessImageNameW.argtypes = [
+            wintypes.HANDLE, wintypes.DWORD, wintypes.LPWSTR, ctypes.POINTER(wintypes.DWORD)
+        ]
+        self._kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+        class GUITHREADINFO(ctypes.Structure):
+            _fields_ = [("cbSize", wintypes.DWORD), ("flags", wintypes.DWORD), ("hwndActive", wintypes.HWND),
+                        ("hwndFocus", wintypes.HWND), ("hwndCapture", wintypes.HWND), ("hwndMenuOwner", wintypes.HWND),
+                        ("hwndMoveSize", wintypes.HWND), ("hwndCaret", wintypes.HWND), ("rcCaret", wintypes.RECT)]
+        self._GUITHREADINFO = GUITHREADINFO
+        self._user32.GetGUIThreadInfo.argtypes = [wintypes.DWORD, ctypes.POINTER(GUITHREADINFO)]
+        self._user32.ClientToScreen.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.POINT)]
+
+    def get_foreground_window(self):
+        handle = self._user32.GetForegroundWindow()
+        return handle or None
+
+    def get_process_id(self, window_handle):
+        if not window_handle:
+            return None
+        pid = self._wintypes.DWORD()
+        self._user32.GetWindowThreadProcessId(window_handle, self._ctypes.byref(pid))
+        return pid.value or None
+
+    def get_app_name(self, window_handle):
+        pid = self.get_process_id(window_handle)
+        if pid is None:
+            return None
+        ctypes, wintypes = self._ctypes, self._wintypes
+        process = self._kernel32.OpenProcess(self.PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not process:
+            return None
+        try:
+            size = wintypes.DWORD(260)
+            path_buffer = ctypes.create_unicode_buffer(size.value)
+            if not self._kernel32.QueryFullProcessImageNameW(process, 0, path_buffer, ctypes.byref(size)):
+                return None
+            return os.path.basename(path_buffer.value).lower()
+        finally:
+            self._kernel32.CloseHandle(process)
+
+    def get_caret_position(self):
+        # 시스템 캐럿을 쓰는 앱만 알 수 있음 (Chrome/Electron 등 자체 캐럿을 그리는 앱은 None)
+        window_handle = self.get_foreground_window()
+        if not window_handle:
+            return None
+        ctypes, wintypes = self._ctypes, self._wintypes
+        thread_id = self._user32.GetWindowThreadProcessId(window_handle, None)
+        info = self._GUITHREADINFO(cbSize=ctypes.sizeof(self._GUITHREADINFO))
+        if not thread_id or not self._user32.GetGUIThreadInfo(thread_id, ctypes.byref(info)) or not info.hwndCaret:
+            return None
+        point = wintypes.POINT(info.rcCaret.left, info.rcCaret.bottom)
+        if not self._user32.ClientToScreen(info.hwndCaret, ctypes.byref(point)):
+            return None
+        return point.x, point.y
+
+class FakeActiveWindowProvider(ActiveWindowProvider):
+    """테스트/헤드리스 환경용 가짜 구현. set_active_app()으로 포커스 앱을 흉내 냅니다."""
+
+    def __init__(self, app_name=None):
+        self._handles = {} # 앱 이름 -> 가짜 창 핸들
+        self.app_name_lookups = 0 # get_app_name 호출 횟수 (캐시 동작 확인용)
+        self._active_handle = None
+        self.set_active_app(app_name)
+
+    def set_active_app(self, app_name):
+        """포커스된 앱을 변경합니다. None이면 알 수 없는 창으로 취급합니다."""
+        if app_name is None:
+            self._active_handle = None
+            return
+        app_name = app_name.lower()
+        self._active_handle = self._handles.setdefault(app_name, len(self._handles) + 1)
+
+    def get_foreground_window(self):
+        return self._active_handle
+
+    def get_process_id(self, window_handle):
+        return window_handle # 가짜 창은 앱마다 하나이므로 핸들을 프로세스 ID로 사용
+
+    def get_app_name(self, window_handle):
+        self.app_name_lookups += 1
+        for app_name, handle in self._handles.items():
+            if handle == window_handle:
+                return app_name
+        return None
+
+def create_default_provider():
+    """현재 플랫폼에 맞는 기본 ActiveWindowProvider 를 생성합니다."""
+    if sys.platform == "win32":
+        try:
+            return Win32ActiveWindowProvider()
+        except Exception as e:
+            logging.error(f"Failed to initialize Win32 active window provider: {e}", exc_info=True)
+    logging.info("Active window detection not available on this platform. App-scoped rules are disabled.")
+    return ActiveWindowProvider()